@@ -1,12 +1,13 @@
 #!/usr/bin/env python3
 """Add sample mental load tasks"""
 
-from database import SupabaseClient
+from task_manager import CleaningTaskManager
 
 try:
     print('Adding sample mental load tasks...')
-    client = SupabaseClient()
-    supabase = client.get_client()
+    # Headless data layer: works with any STORAGE_BACKEND and the HOUSEHOLD_ID household
+    # Without the write journal, so the tasks are saved before the script exits
+    manager = CleaningTaskManager(journal_path=None)
     
     # Sample mental load tasks
     sample_tasks = [
@@ -46,16 +47,16 @@ try:
         }
     ]
     
-    # Insert sample tasks
-    result = supabase.table("cleaning_tasks").insert(sample_tasks).execute()
-    print(f'✅ Added {len(sample_tasks)} sample mental load tasks!')
+    # Insert sample tasks (one request; tasks without a due date are scheduled from their frequency)
+    report = manager.import_tasks(sample_tasks)
+    print(f'✅ Added {report.inserted} sample mental load tasks!')
     
     # Show current tasks
-    all_tasks = supabase.table("cleaning_tasks").select("*").execute()
-    print(f'📋 Total tasks in database: {len(all_tasks.data)}')
+    all_tasks = manager.get_all_tasks()
+    print(f'📋 Total tasks in database: {len(all_tasks)}')
     
-    for task in all_tasks.data:
-        print(f"  • {task['task_name']} - {task['assigned_to']} ({task['frequency']})")
+    for task in all_tasks:
+        print(f"  • {task.task_name} - {task.assigned_to} ({task.frequency})")
         
 except Exception as e:
     print(f'❌ Error: {str(e)}')
\ No newline at end of file
@@ -0,0 +1,264 @@
+"""
+HTTP API over the task core, for phone shortcuts, scripts and cron jobs.
+
+A plain ASGI application with no framework behind it; serve it with any
+ASGI server, e.g. ``uvicorn api:app --port 8600``. Every call runs on
+AsyncCleaningTaskManager, so a rotation costs one database request and no
+Streamlit session. Errors come back as {"error": message} with the status
+of their class (400 invalid input, 404 not found, 409 conflict, 503
+storage).
+
+    GET   /health
+    GET   /tasks?person=&status=&room=&limit=25&after=<cursor>   one page, and the cursor of the next
+    GET   /tasks/{id}
+    PATCH /tasks/{id}           {"field": value, ..., "expected_version": n (optional)}, or If-Match: n
+    PATCH /tasks                {"ids": [1, 2], "set": {"field": value, ...}}   bulk edit
+    POST  /tasks/{id}/rotate    {"version": n} (optional)   mark done and hand to the next member
+    GET   /export?format=csv|jsonl
+
+Pick the household with ?household=<id> (default HOUSEHOLD_ID). When
+API_TOKEN is set, every request needs "Authorization: Bearer <API_TOKEN>".
+"""
+
+import asyncio
+import hmac
+import json
+import logging
+import re
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl
+
+import data_io
+from async_task_manager import AsyncCleaningTaskManager
+from database import get_async_storage_backend, API_TOKEN, HOUSEHOLD_ID
+from errors import Conflict, InvalidInput, NotFound, StorageError, TaskManagerError
+from models import Task
+from storage import list_row
+
+logger = logging.getLogger(__name__)
+
+STATUSES = ((InvalidInput, 400), (NotFound, 404), (Conflict, 409), (StorageError, 503))
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(cursor: Optional[Tuple[str, int]]) -> Optional[str]:
+    return None if cursor is None else f"{cursor[0]},{cursor[1]}"
+
+
+def decode_cursor(value: Optional[str]) -> Optional[Tuple[str, int]]:
+    """(created_at, id) of a cursor from encode_cursor
+
+    The timestamp is parsed and written back out, so nothing but a timestamp
+    reaches the backend's filter; its separator and fraction digits are kept,
+    as the stored strings are compared with it.
+    """
+    if not value:
+        return None
+    created_at, _, task_id = value.rpartition(",")
+    try:
+        timestamp = datetime.fromisoformat(created_at)
+        task_id = int(task_id)
+    except ValueError:
+        raise InvalidInput(f"Bad cursor: {value}")
+    fraction = re.match(r"[^.]{19}\.(\d+)", created_at)
+    timespec = ("seconds" if not fraction else "milliseconds" if len(fraction.group(1)) == 3 else "microseconds")
+    return timestamp.isoformat(sep=" " if created_at[10:11] == " " else "T", timespec=timespec), task_id
+
+
+def listed(task: Task) -> Dict:
+    """A task with the list columns only, as pages and writes return it; GET /tasks/{id} has the rest"""
+    return list_row(task.to_row())
+
+
+def _int(value: Optional[str], name: str, default: Optional[int] = None) -> Optional[int]:
+    if value is None or value == "":
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise InvalidInput(f"{name} must be a number, not {value!r}")
+
+
+class Request:
+    """The parts of an ASGI HTTP request the routes need"""
+
+    def __init__(self, scope: Dict, body: bytes, params: Dict[str, str]):
+        self.method = scope["method"]
+        self.path = scope["path"]
+        self.query = dict(parse_qsl(scope.get("query_string", b"").decode("latin-1")))
+        self.headers = {name.decode("latin-1").lower(): value.decode("latin-1") for name, value in scope["headers"]}
+        self.body = body
+        self.params = params
+
+    def json(self) -> Any:
+        if not self.body:
+            return {}
+        try:
+            return json.loads(self.body)
+        except ValueError:
+            raise InvalidInput("The request body is not valid JSON")
+
+
+class TaskAPI:
+    """ASGI application serving the routes above"""
+
+    def __init__(self, backend=None, token: Optional[str] = API_TOKEN):
+        # The async Supabase client belongs to the server's event loop, so it is built on the first request
+        self.backend = backend
+        self.token = token
+        self.managers: Dict[int, AsyncCleaningTaskManager] = {}
+        self._backend_lock: Optional[asyncio.Lock] = None
+        self.routes: List[Tuple[str, re.Pattern, Callable[[Request], Awaitable]]] = [
+            ("GET", re.compile(r"^/health$"), self.health),
+            ("GET", re.compile(r"^/tasks$"), self.list_tasks),
+            ("PATCH", re.compile(r"^/tasks$"), self.edit_tasks),
+            ("GET", re.compile(r"^/tasks/(?P<task_id>\d+)$"), self.get_task),
+            ("PATCH", re.compile(r"^/tasks/(?P<task_id>\d+)$"), self.edit_task),
+            ("POST", re.compile(r"^/tasks/(?P<task_id>\d+)/rotate$"), self.rotate_task),
+            ("GET", re.compile(r"^/export$"), self.export),
+        ]
+
+    async def manager(self, request: Request) -> AsyncCleaningTaskManager:
+        """The household's manager; uncached, as the app and other clients write to the same tasks"""
+        household_id = _int(request.query.get("household"), "household", HOUSEHOLD_ID)
+        if self.backend is None:
+            self._backend_lock = self._backend_lock or asyncio.Lock()
+            async with self._backend_lock:
+                if self.backend is None:
+                    self.backend = await get_async_storage_backend()
+        if household_id not in self.managers:
+            self.managers[household_id] = AsyncCleaningTaskManager(self.backend, household_id=household_id,
+                                                                   cache_ttl=0)
+        return self.managers[household_id]
+
+    async def __call__(self, scope: Dict, receive: Callable, send: Callable):
+        if scope["type"] == "lifespan":
+            # Nothing to set up: the backend is built on the first request
+            await receive()
+            await send({"type": "lifespan.startup.complete"})
+            await receive()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+        if scope["type"] != "http":
+            return
+
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+
+        try:
+            for method, pattern, handler in self.routes:
+                match = pattern.match(scope["path"])
+                if match and method == scope["method"]:
+                    request = Request(scope, body, match.groupdict())
+                    if not self._authorized(request):
+                        return await self._json(send, 401, {"error": "Missing or wrong API token"})
+                    result = await handler(request)
+                    if callable(result):
+                        # Streaming responses send themselves
+                        return await result(send)
+                    return await self._json(send, 200, result)
+            if any(pattern.match(scope["path"]) for _, pattern, _ in self.routes):
+                return await self._json(send, 405, {"error": f"{scope['method']} is not allowed here"})
+            return await self._json(send, 404, {"error": f"No route for {scope['path']}"})
+        except TaskManagerError as e:
+            status = next(status for error, status in STATUSES + ((TaskManagerError, 500),) if isinstance(e, error))
+            return await self._json(send, status, {"error": str(e)})
+        except Exception as e:
+            logger.exception("Unhandled error on %s %s", scope["method"], scope["path"])
+            return await self._json(send, 500, {"error": f"Internal error: {e}"})
+
+    def _authorized(self, request: Request) -> bool:
+        if not self.token:
+            return True
+        return hmac.compare_digest(request.headers.get("authorization", ""), f"Bearer {self.token}")
+
+    @staticmethod
+    async def _json(send: Callable, status: int, payload: Any):
+        body = json.dumps(payload).encode()
+        await send({"type": "http.response.start", "status": status,
+                    "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
+
+    # -- routes ----------------------------------------------------------------
+
+    async def health(self, request: Request) -> Dict:
+        return {"ok": True}
+
+    async def list_tasks(self, request: Request) -> Dict:
+        limit = _int(request.query.get("limit"), "limit", 25)
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise InvalidInput(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+        manager = await self.manager(request)
+        tasks, cursor = await manager.get_tasks_page(
+            request.query.get("person") or None, request.query.get("status") or None,
+            request.query.get("room") or None, page_size=limit, after=decode_cursor(request.query.get("after")))
+        return {"tasks": [listed(task) for task in tasks], "next": encode_cursor(cursor)}
+
+    async def get_task(self, request: Request) -> Dict:
+        manager = await self.manager(request)
+        return (await manager.get_task(int(request.params["task_id"]))).to_row()
+
+    async def edit_task(self, request: Request) -> Dict:
+        updates = request.json()
+        if not isinstance(updates, dict):
+            raise InvalidInput('Send the fields to change as {"field": value, ...}')
+        updates = dict(updates)
+        version = updates.pop("expected_version", None)
+        if version is None:
+            # Quotes and a weak prefix are tolerated, as clients send ETags that way
+            etag = request.headers.get("if-match", "").strip()
+            if etag.startswith("W/"):
+                etag = etag[2:]
+            version = etag.strip('"') or None
+        manager = await self.manager(request)
+        return listed(await manager.edit_task(int(request.params["task_id"]), updates,
+                                              _int(None if version is None else str(version), "expected_version")))
+
+    async def edit_tasks(self, request: Request) -> Dict:
+        payload = request.json()
+        if not isinstance(payload, dict) or not isinstance(payload.get("ids"), list) \
+                or not isinstance(payload.get("set"), dict):
+            raise InvalidInput('Send {"ids": [task ids], "set": {"field": value, ...}}')
+        task_ids = [_int(str(task_id), "ids") for task_id in payload["ids"]]
+        tasks = await (await self.manager(request)).update_tasks(task_ids, payload["set"])
+        return {"updated": len(tasks), "tasks": [listed(task) for task in tasks]}
+
+    async def rotate_task(self, request: Request) -> Dict:
+        payload = request.json()
+        version = payload.get("version") if isinstance(payload, dict) else None
+        manager = await self.manager(request)
+        return listed(await manager.rotate_task(int(request.params["task_id"]),
+                                                _int(None if version is None else str(version), "version")))
+
+    async def export(self, request: Request) -> Callable[[Callable], Awaitable]:
+        fmt = request.query.get("format", "csv")
+        if fmt not in ("csv", "jsonl"):
+            raise InvalidInput("format must be csv or jsonl (use data_io.py for parquet)")
+        manager = await self.manager(request)
+        pages = manager.task_pages()
+        # Read the first page before answering, so a failing database still gets a JSON error
+        try:
+            first = await pages.__anext__()
+        except StopAsyncIteration:
+            first = []
+
+        async def stream(send: Callable):
+            content_type = b"text/csv; charset=utf-8" if fmt == "csv" else b"application/x-ndjson"
+            await send({"type": "http.response.start", "status": 200, "headers": [
+                (b"content-type", content_type),
+                (b"content-disposition", f'attachment; filename="cleaning_tasks.{fmt}"'.encode())]})
+            await send({"type": "http.response.body", "body": data_io.format_rows(first, fmt, header=True).encode(),
+                        "more_body": True})
+            async for rows in pages:
+                await send({"type": "http.response.body", "body": data_io.format_rows(rows, fmt).encode(),
+                            "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+        return stream
+
+
+app = TaskAPI()
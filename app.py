@@ -1,8 +1,15 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
+import html
+import io
+import tempfile
 from datetime import datetime, date, timedelta
 from task_manager import CleaningTaskManager
+from storage import next_member
+from database import ARCHIVE_DIR, DATA_LAYER, HOUSEHOLD_ID, RETENTION_DAYS
+from metrics import set_page
+from fairness import balance, carried_load
+from models import Frequency, Room, Status, TaskColumns
+import data_io
 
 # Page configuration
 st.set_page_config(
@@ -47,35 +54,69 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Initialize the task manager
-@st.cache_resource
-def init_task_manager():
+# This Week switches to the grid view by default above this many pending tasks
+LIST_VIEW_MAX_TASKS = 30
+# Task names listed in the overdue / due-this-week banners before "and N more"
+DUE_BANNER_MAX_TASKS = 10
+# Rows of the rotation calendar rendered before it is cut short
+CALENDAR_MAX_ROWS = 100
+
+# Initialize one task manager (query cache and task replica) per household
+@st.cache_resource(max_entries=64)
+def init_task_manager(household_id: int):
     try:
-        return CleaningTaskManager()
+        if DATA_LAYER == "async":
+            from async_task_manager import SyncTaskManager
+            return SyncTaskManager(on_error=st.error, household_id=household_id)
+        return CleaningTaskManager(household_id=household_id, on_error=st.error)
     except ValueError as e:
         st.error(f"Database connection error: {str(e)}")
-        st.info("Please check your Supabase credentials in the .env file")
+        st.info("Please check your Supabase credentials (or STORAGE_BACKEND=sqlite) in the .env file")
         st.stop()
 
 def main():
     st.markdown('<h1 class="main-header">🏠 Mental Load Manager</h1>', unsafe_allow_html=True)
     st.markdown('<p style="text-align: center; color: #666;">Track whose turn it is for recurring household tasks</p>', unsafe_allow_html=True)
 
+    # Each household has its own link: ?household=<id>
     try:
-        task_manager = init_task_manager()
+        household_id = int(st.query_params.get("household", HOUSEHOLD_ID))
+    except ValueError:
+        st.error("The household in the link is not a number.")
+        return
+    
+    try:
+        task_manager = init_task_manager(household_id)
     except:
         st.error("Failed to initialize task manager. Please check your database connection.")
         return
 
+    household = task_manager.get_household()
+    if not household['members']:
+        st.error(f"Household {household_id} does not exist or has no members.")
+        return
+    
     # Sidebar navigation
-    st.sidebar.title("🎯 Navigation")
+    st.sidebar.title(f"🏠 {household['name']}")
+    st.sidebar.caption("🔄 " + " → ".join(household['members'] + household['members'][:1]))
     page = st.sidebar.selectbox(
         "Choose a page:",
-        ["📋 This Week", "➕ Add Task", "✅ Manage Tasks", "📊 Statistics", "⚙️ Settings"]
+        ["📋 This Week", "➕ Add Task", "✅ Manage Tasks", "📊 Statistics", "⚙️ Settings"],
+        key="page"
     )
+    # Label this run's queries with the page name, without the icon
+    set_page(page.split(" ", 1)[1])
+    
+    show_write_status(task_manager)
+    
+    # Outcome of a button callback from the previous run
+    if "flash" in st.session_state:
+        st.success(st.session_state.pop("flash"))
 
+    # This Week reads the tasks once per rerun and every widget shares that snapshot;
+    # the other task pages ask the database for a page, a count or grouped counts
     if page == "📋 This Week":
-        show_dashboard(task_manager)
+        show_dashboard(task_manager, task_manager.snapshot())
     elif page == "➕ Add Task":
         show_add_task(task_manager)
     elif page == "✅ Manage Tasks":
@@ -83,9 +124,21 @@ def main():
     elif page == "📊 Statistics":
         show_statistics(task_manager)
     elif page == "⚙️ Settings":
-        show_settings()
+        show_settings(task_manager)
 
-def show_dashboard(task_manager):
+def show_write_status(task_manager):
+    """Queued writes (WRITE_JOURNAL) still on their way to the database, and the ones it refused"""
+    pending = task_manager.pending_writes()
+    if pending:
+        st.sidebar.caption(f"⏳ {pending} change(s) waiting to be saved")
+    failed = task_manager.failed_writes()
+    if failed:
+        with st.sidebar.expander(f"⚠️ {len(failed)} change(s) could not be saved", expanded=True):
+            for write in failed:
+                st.markdown(f"**{write['label'] or 'Task'}** ({write['kind']}): {write['error']}")
+            st.button("Dismiss", key="dismiss_failed_writes", on_click=task_manager.dismiss_failed_writes)
+
+def show_dashboard(task_manager, snapshot):
     # Calculate current week info
     today = date.today()
     # Get Monday of current week (ISO week starts on Monday)
@@ -96,33 +149,23 @@ def show_dashboard(task_manager):
     st.header("📋 This Week's Tasks")
     st.subheader(f"🗓️ Week {week_number} ({monday.strftime('%B %d')} - {sunday.strftime('%B %d, %Y')})")
     
-    # Get task data
-    all_tasks = task_manager.get_all_tasks()
-    pending_tasks = [task for task in all_tasks if task['status'] == 'pending']
-    completed_tasks = [task for task in all_tasks if task['status'] == 'completed']
+    pending_tasks = snapshot.pending
     
-    # Statistics cards
-    col1, col2, col3, col4 = st.columns(4)
+    # Statistics cards: one per household member, then the totals
+    members = snapshot.members
+    columns = st.columns(len(members) + 2)
     
-    with col1:
-        fernand_tasks = len([task for task in pending_tasks if task['assigned_to'] == 'Fernand'])
-        st.markdown(f'''
-        <div class="stats-card">
-            <h3>👨</h3>
-            <h2>{fernand_tasks}</h2>
-            <p>Fernand's Tasks</p>
-        </div>
-        ''', unsafe_allow_html=True)
-    
-    with col2:
-        yvonne_tasks = len([task for task in pending_tasks if task['assigned_to'] == 'Yvonne'])
-        st.markdown(f'''
-        <div class="stats-card">
-            <h3>👩</h3>
-            <h2>{yvonne_tasks}</h2>
-            <p>Yvonne's Tasks</p>
-        </div>
-        ''', unsafe_allow_html=True)
+    for column, member in zip(columns, members):
+        with column:
+            member_tasks = snapshot.count(person=member, status=Status.PENDING)
+            st.markdown(f'''
+            <div class="stats-card">
+                <h3>👤</h3>
+                <h2>{member_tasks}</h2>
+                <p>{html.escape(member)}'s Tasks</p>
+            </div>
+            ''', unsafe_allow_html=True)
+    col3, col4 = columns[-2:]
     
     with col3:
         st.markdown(f'''
@@ -134,8 +177,8 @@ def show_dashboard(task_manager):
         ''', unsafe_allow_html=True)
     
     with col4:
-        total_tasks = len(all_tasks)
-        completion_rate = (len(completed_tasks) / total_tasks * 100) if total_tasks > 0 else 0
+        total_tasks = len(snapshot)
+        completion_rate = (snapshot.count(status=Status.COMPLETED) / total_tasks * 100) if total_tasks > 0 else 0
         st.markdown(f'''
         <div class="stats-card">
             <h3>📈</h3>
@@ -144,60 +187,164 @@ def show_dashboard(task_manager):
         </div>
         ''', unsafe_allow_html=True)
 
+    show_fairness(task_manager, snapshot)
+    show_due_banners(snapshot)
+    
     # Current assignments in sheet format
     st.subheader("📋 Current Task Assignments")
     
-    if pending_tasks:
-        # Create a table-like display
-        for task in pending_tasks:
-            col1, col2, col3, col4, col5 = st.columns([3, 2, 1.5, 1.5, 1.5])
-            
-            with col1:
-                st.markdown(f"**{task['task_name']}**")
-                if task['description']:
-                    st.caption(f"💡 {task['description']}")
-            
-            with col2:
-                st.text(f"📍 {task['room']}")
-                st.caption(f"🔄 {task['frequency']}")
-            
-            with col3:
-                current_person = task['assigned_to']
-                st.markdown(f"**👤 {current_person}**")
-                
-            with col4:
-                next_person = "Yvonne" if current_person == "Fernand" else "Fernand"
-                st.caption(f"Next: {next_person}")
-            
-            with col5:
-                if st.button("✅ Done", key=f"done_{task['id']}", type="primary"):
-                    if task_manager.complete_and_rotate_task(task['id']):
-                        st.success(f"Task rotated to {next_person}!")
-                        st.experimental_rerun()
-            
-            st.divider()
-    else:
+    if not pending_tasks:
         st.info("No pending tasks! Add some recurring tasks to get started.")
+        return
+    
+    # Long lists default to the grid: one component instead of a widget row per task
+    view = st.radio("View", ["▦ Grid", "☰ List"], horizontal=True, key="dashboard_view",
+                    index=0 if len(pending_tasks) > LIST_VIEW_MAX_TASKS else 1, label_visibility="collapsed")
+    if view == "▦ Grid":
+        show_task_grid(task_manager, snapshot)
+        return
+    
+    # Create a table-like display; notes are read on their own, task lists carry the list columns only
+    notes = task_manager.get_notes(status=Status.PENDING.value)
+    for task in pending_tasks:
+        col1, col2, col3, col4, col5 = st.columns([3, 2, 1.5, 1.5, 1.5])
+        
+        with col1:
+            st.markdown(f"**{task.task_name}**")
+            if notes.get(task.id):
+                st.caption(f"💡 {notes[task.id]}")
+        
+        with col2:
+            st.text(f"📍 {task.room}")
+            st.caption(f"🔄 {task.frequency}{due_label(task, today)}")
+        
+        with col3:
+            current_person = task.assigned_to
+            st.markdown(f"**👤 {current_person}**")
+            
+        with col4:
+            next_person = snapshot.next_assignee(current_person)
+            st.caption(f"Next: {next_person}")
+        
+        with col5:
+            st.button("✅ Done", key=f"done_{task.id}", type="primary", on_click=complete_task,
+                      args=(task_manager, task, f"Task rotated to {next_person}!"))
+        
+        st.divider()
+    
+    show_rotation_calendar(snapshot)
+
+def complete_task(task_manager, task, message):
+    """Button callback: rotate the task only if it is still at the version the button was rendered with"""
+    # A double click sends the same version twice; the second one is a no-op
+    if task_manager.complete_and_rotate_task(task.id, task.version):
+        st.session_state["flash"] = message
+
+def due_label(task, today):
+    """' · due <date>' for scheduled tasks, in red once overdue"""
+    if not task.due_date:
+        return ""
+    due = date.fromisoformat(task.due_date[:10])
+    if due < today:
+        return f" · :red[📅 {due.strftime('%a %b %d')} overdue]"
+    return f" · 📅 {due.strftime('%a %b %d')}"
+
+def show_fairness(task_manager, snapshot):
+    """One line of who has been doing the work lately, and how evenly"""
+    done = task_manager.get_load_scores().per_week(snapshot.members)
+    if not any(done.values()):
+        return
+    shares = " · ".join(f"{person} {load:.1f}/week" for person, load in done.items())
+    even = balance(done)
+    st.caption(f"⚖️ Done lately: {shares}" + ("" if even is None else f" — balance {even:.0%}"))
+
+
+def show_due_banners(snapshot):
+    # Pending tasks are sorted by due date, so the overdue ones come first, then this week's
+    pending_tasks = snapshot.pending
+    def names(tasks, count):
+        listed = ", ".join(f"{task.task_name} ({task.assigned_to})" for task in tasks[:DUE_BANNER_MAX_TASKS])
+        more = count - DUE_BANNER_MAX_TASKS
+        return listed + (f" and {more} more" if more > 0 else "")
+    
+    overdue, this_week = snapshot.overdue, snapshot.due_this_week
+    if overdue:
+        st.error(f"⚠️ {overdue} overdue: {names(pending_tasks[:overdue], overdue)}")
+    if this_week:
+        st.info(f"⏰ {this_week} due by Sunday: {names(pending_tasks[overdue:overdue + this_week], this_week)}")
+
+def show_rotation_calendar(snapshot):
+    with st.expander("📅 Rotation calendar (next 2 weeks)"):
+        occurrences = snapshot.rotation_calendar(days=14)
+        if not occurrences:
+            st.caption("No scheduled tasks in the next two weeks.")
+            return
+        # One markdown table rather than a dataframe keeps pandas off this page
+        lines = ["| Day | Task | Room | Whose turn |", "|---|---|---|---|"]
+        for occurrence in occurrences[:CALENDAR_MAX_ROWS]:
+            cells = [occurrence['date'].strftime('%a %b %d'), occurrence['task_name'], occurrence['room'],
+                     occurrence['assigned_to']]
+            lines.append("| " + " | ".join(cell.replace("|", "\\|") for cell in cells) + " |")
+        st.markdown("\n".join(lines))
+        if len(occurrences) > CALENDAR_MAX_ROWS:
+            st.caption(f"… and {len(occurrences) - CALENDAR_MAX_ROWS} more")
+
+def show_task_grid(task_manager, snapshot):
+    # Ticking boxes inside a form does not rerun the script; only the submit does
+    pending_tasks, members = snapshot.pending, snapshot.members
+    # Ticked rows refer to the tasks (and versions) of the previous render
+    shown = st.session_state.get("dashboard_grid_shown", [])
+    columns = TaskColumns.from_tasks(pending_tasks, ("id", "version", "task_name", "room", "frequency",
+                                                     "assigned_to", "due_date"))
+    notes = task_manager.get_notes(status=Status.PENDING.value)
+    st.session_state["dashboard_grid_shown"] = list(zip(columns["id"], columns["version"]))
+    with st.form("dashboard_grid", clear_on_submit=True, border=False):
+        edited = st.data_editor(
+            {
+                "Done": [False] * len(columns),
+                "Task": columns["task_name"],
+                "Room": columns["room"],
+                "Frequency": columns["frequency"],
+                "Assigned": columns["assigned_to"],
+                "Next": [next_member(members, person) for person in columns["assigned_to"]],
+                "Due": columns["due_date"],
+                "Notes": [notes.get(task_id, "") for task_id in columns["id"]],
+            },
+            column_config={"Done": st.column_config.CheckboxColumn("✅", width="small")},
+            disabled=["Task", "Room", "Frequency", "Assigned", "Next", "Due", "Notes"],
+            hide_index=True,
+            use_container_width=True,
+            key="dashboard_grid_rows",
+        )
+        submitted = st.form_submit_button("✅ Mark selected done", type="primary")
+    
+    if submitted:
+        selected = [task for task, done in zip(shown, edited["Done"]) if done]
+        if not selected:
+            st.warning("Tick the tasks you finished first.")
+        # One request rotates the whole selection, each task only at the version it was shown with
+        elif task_manager.complete_and_rotate_tasks([task_id for task_id, _ in selected],
+                                                    [version for _, version in selected]):
+            st.success(f"{len(selected)} task(s) done and rotated!")
+            st.rerun()
 
 def show_add_task(task_manager):
     st.header("➕ Add New Recurring Task")
-    st.info("💡 These are recurring mental load tasks that rotate between Fernand and Yvonne each time they're completed.")
+    members = task_manager.get_members()
+    st.info(f"💡 These are recurring mental load tasks that rotate between {', '.join(members)} each time they're completed.")
     
     with st.form("add_task_form"):
         col1, col2 = st.columns(2)
         
         with col1:
             task_name = st.text_input("Task Name*", placeholder="e.g., Clean Aro's litter box")
-            assigned_to = st.selectbox("Currently assigned to*", ["Fernand", "Yvonne"])
-            room = st.selectbox("Location*", [
-                "Living Room", "Kitchen", "Bedroom", "Bathroom", "Dining Room", 
-                "Office", "Laundry Room", "Garage", "Garden", "Other"
-            ])
+            assigned_to = st.selectbox("Currently assigned to*", members)
+            room = st.selectbox("Location*", Room.values())
         
         with col2:
-            frequency = st.selectbox("How often*", [
-                "Daily", "Weekly", "Bi-weekly", "Monthly", "As needed"
-            ])
+            frequency = st.selectbox("How often*", Frequency.values())
+            due_date = st.date_input("First due date", value=None,
+                                     help="Leave empty to make it due one period from today")
             description = st.text_area("Notes (optional)", 
                                      placeholder="Any specific instructions or reminders...")
         
@@ -205,7 +352,7 @@ def show_add_task(task_manager):
         
         if submitted:
             if task_name and assigned_to and room and frequency:
-                if task_manager.create_task(task_name, assigned_to, room, frequency, description, None):
+                if task_manager.create_task(task_name, assigned_to, room, frequency, description, due_date):
                     st.success(f"✅ Recurring task '{task_name}' added! Currently assigned to {assigned_to}.")
                     st.balloons()
                 else:
@@ -220,32 +367,38 @@ def show_manage_tasks(task_manager):
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        filter_person = st.selectbox("Filter by Person", ["All", "Fernand", "Yvonne"])
+        members = task_manager.get_members()
+        filter_person = st.selectbox("Filter by Person", ["All"] + members)
     with col2:
         filter_status = st.selectbox("Filter by Status", ["All", "Pending", "Completed"])
     with col3:
-        filter_room = st.selectbox("Filter by Room", ["All", "Living Room", "Kitchen", "Bedroom", "Bathroom", "Dining Room", "Office", "Laundry Room", "Garage", "Garden", "Other"])
+        filter_room = st.selectbox("Filter by Room", ["All"] + Room.values())
+    
+    page_size = st.selectbox("Tasks per page", [10, 25, 50, 100], index=1)
     
-    # Get and filter tasks
-    all_tasks = task_manager.get_all_tasks()
+    # The database cuts the page by keyset cursor and counts the matches on the filter indexes
+    person = None if filter_person == "All" else filter_person
+    status = None if filter_status == "All" else filter_status.lower()
+    room = None if filter_room == "All" else filter_room
     
-    # Apply filters
-    filtered_tasks = all_tasks
-    if filter_person != "All":
-        filtered_tasks = [task for task in filtered_tasks if task['assigned_to'] == filter_person]
-    if filter_status != "All":
-        status = filter_status.lower()
-        filtered_tasks = [task for task in filtered_tasks if task['status'] == status]
-    if filter_room != "All":
-        filtered_tasks = [task for task in filtered_tasks if task['room'] == filter_room]
+    # Start again from the first page whenever the filters change
+    filter_key = (person, status, room, page_size)
+    if st.session_state.get("manage_filter_key") != filter_key:
+        st.session_state["manage_filter_key"] = filter_key
+        st.session_state["manage_cursors"] = [None]
+    cursors = st.session_state["manage_cursors"]
     
-    st.subheader(f"Tasks ({len(filtered_tasks)} found)")
+    filtered_tasks, next_cursor = task_manager.get_tasks_page(person, status, room, page_size, after=cursors[-1])
+    total_found = task_manager.count_tasks(person, status, room)
+    
+    st.subheader(f"Tasks ({total_found} found)")
     
     if filtered_tasks:
+        notes = task_manager.get_notes(task_ids=[task.id for task in filtered_tasks])
         for task in filtered_tasks:
             # Determine card styling based on task status
             card_class = "task-card"
-            if task['status'] == 'completed':
+            if task.status == Status.COMPLETED:
                 card_class += " completed-task"
             
             # Create task card
@@ -255,116 +408,150 @@ def show_manage_tasks(task_manager):
                 col1, col2, col3, col4 = st.columns([3, 1, 1, 1])
                 
                 with col1:
-                    status_icon = "✅" if task['status'] == 'completed' else "📝"
-                    st.markdown(f"**{status_icon} {task['task_name']}**")
-                    current_assignee = task['assigned_to']
-                    next_assignee = "Yvonne" if current_assignee == "Fernand" else "Fernand"
-                    st.text(f"👤 {task['assigned_to']} | 🏠 {task['room']} | 🔄 {task['frequency']}")
-                    if task['status'] == 'pending':
+                    status_icon = "✅" if task.status == Status.COMPLETED else "📝"
+                    st.markdown(f"**{status_icon} {task.task_name}**")
+                    current_assignee = task.assigned_to
+                    next_assignee = next_member(members, current_assignee)
+                    st.markdown(f"👤 {task.assigned_to} | 🏠 {task.room} | 🔄 {task.frequency}"
+                                f"{due_label(task, date.today())}")
+                    if task.is_pending():
                         st.caption(f"🔄 Next turn: {next_assignee}")
-                    if task['description']:
-                        st.caption(task['description'])
+                    if notes.get(task.id):
+                        st.caption(notes[task.id])
                 
                 with col2:
-                    if task['status'] == 'pending':
-                        if st.button("✅ Mark Done", key=f"complete_{task['id']}", type="primary"):
-                            # For recurring tasks, we mark as done and switch assignment
-                            if task_manager.complete_and_rotate_task(task['id']):
-                                st.success("Task marked done! Assignment rotated for next week.")
-                                st.experimental_rerun()
+                    if task.is_pending():
+                        # For recurring tasks, we mark as done and switch assignment
+                        st.button("✅ Mark Done", key=f"complete_{task.id}", type="primary", on_click=complete_task,
+                                  args=(task_manager, task, "Task marked done! Assignment rotated for next week."))
                     else:
-                        if st.button("🔄 Reset", key=f"reset_{task['id']}", type="secondary"):
-                            if task_manager.reset_task(task['id']):
-                                st.success("Task reset to pending!")
-                                st.experimental_rerun()
+                        st.button("🔄 Reset", key=f"reset_{task.id}", type="secondary", on_click=reset_task,
+                                  args=(task_manager, task))
                 
                 with col3:
-                    if st.button("✏️ Edit", key=f"edit_{task['id']}"):
-                        st.session_state[f"editing_{task['id']}"] = True
+                    if st.button("✏️ Edit", key=f"edit_{task.id}"):
+                        st.session_state[f"editing_{task.id}"] = True
                 
                 with col4:
-                    if st.button("🗑️ Delete", key=f"delete_{task['id']}", type="secondary"):
-                        if task_manager.delete_task(task['id']):
+                    if st.button("🗑️ Delete", key=f"delete_{task.id}", type="secondary"):
+                        if task_manager.delete_task(task.id):
                             st.success("Task deleted!")
-                            st.experimental_rerun()
+                            st.rerun()
                 
                 # Editing form (appears when edit button is clicked)
-                if st.session_state.get(f"editing_{task['id']}", False):
+                if st.session_state.get(f"editing_{task.id}", False):
+                    # The row the edit is based on; saving only overwrites fields nobody else changed since.
+                    # Lists carry the list columns only, so the full row is read when the form opens
+                    if st.session_state[f"editing_{task.id}"] is True:
+                        st.session_state[f"editing_{task.id}"] = task_manager.get_task(task.id) or task
+                    base = st.session_state[f"editing_{task.id}"]
                     st.divider()
-                    with st.form(f"edit_form_{task['id']}"):
+                    with st.form(f"edit_form_{task.id}"):
                         col1, col2 = st.columns(2)
                         with col1:
-                            new_task_name = st.text_input("Task Name", value=task['task_name'])
-                            new_assigned_to = st.selectbox("Currently assigned to", ["Fernand", "Yvonne"], 
-                                                         index=0 if task['assigned_to'] == "Fernand" else 1)
-                            new_room = st.selectbox("Room", [
-                                "Living Room", "Kitchen", "Bedroom", "Bathroom", "Dining Room", 
-                                "Office", "Laundry Room", "Garage", "Garden", "Other"
-                            ], index=["Living Room", "Kitchen", "Bedroom", "Bathroom", "Dining Room", 
-                                     "Office", "Laundry Room", "Garage", "Garden", "Other"].index(task['room']))
+                            new_task_name = st.text_input("Task Name", value=task.task_name)
+                            assignees = members if task.assigned_to in members else members + [task.assigned_to]
+                            new_assigned_to = st.selectbox("Currently assigned to", assignees,
+                                                           index=assignees.index(task.assigned_to))
+                            rooms, room_index = Room.choices(task.room)
+                            new_room = st.selectbox("Room", rooms, index=room_index)
                         
                         with col2:
-                            new_frequency = st.selectbox("Frequency", [
-                                "Daily", "Weekly", "Bi-weekly", "Monthly", "As needed"
-                            ], index=["Daily", "Weekly", "Bi-weekly", "Monthly", "As needed"].index(task['frequency']) if task['frequency'] in ["Daily", "Weekly", "Bi-weekly", "Monthly", "As needed"] else 0)
+                            frequencies, frequency_index = Frequency.choices(task.frequency)
+                            new_frequency = st.selectbox("Frequency", frequencies, index=frequency_index)
+                            new_due_date = st.date_input(
+                                "Next due", value=date.fromisoformat(task.due_date[:10]) if task.due_date else None,
+                                help="Clear it to reschedule one period from today")
                             
-                            new_description = st.text_area("Description", value=task['description'] or "")
+                            new_description = st.text_area("Description", value=base.description or "")
                         
                         col1, col2 = st.columns(2)
                         with col1:
                             if st.form_submit_button("💾 Save Changes", type="primary"):
-                                updates = {
+                                edited = {
                                     "task_name": new_task_name,
                                     "assigned_to": new_assigned_to,
                                     "room": new_room,
                                     "frequency": new_frequency,
-                                    "description": new_description
+                                    "description": new_description,
+                                    "due_date": new_due_date.isoformat() if new_due_date else None
                                 }
-                                if task_manager.update_task(task['id'], updates):
-                                    st.success("Task updated!")
-                                    st.session_state[f"editing_{task['id']}"] = False
-                                    st.experimental_rerun()
+                                # Send only what was changed, so a concurrent rotation does not conflict with a rename
+                                updates = {column: value for column, value in edited.items()
+                                           if value != (getattr(base, column) or ("" if column == "description" else None))}
+                                if "due_date" in updates and not updates["due_date"]:
+                                    # A cleared due date is rescheduled from the frequency
+                                    updates["frequency"] = new_frequency
+                                if not updates or task_manager.update_task(task.id, updates, base=base):
+                                    st.session_state["flash"] = "Task updated!"
+                                    st.session_state[f"editing_{task.id}"] = False
+                                    st.rerun()
+                                else:
+                                    # Edit on top of the fresh row on the next save
+                                    st.session_state[f"editing_{task.id}"] = True
                         
                         with col2:
                             if st.form_submit_button("❌ Cancel"):
-                                st.session_state[f"editing_{task['id']}"] = False
-                                st.experimental_rerun()
+                                st.session_state[f"editing_{task.id}"] = False
+                                st.rerun()
                 
                 st.markdown('</div>', unsafe_allow_html=True)
                 st.divider()
     else:
         st.info("No tasks found matching your filters.")
+    
+    # Pagination controls
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        st.button("⬅️ Previous", disabled=len(cursors) == 1,
+                  on_click=lambda: cursors.pop())
+    with col2:
+        st.caption(f"Page {len(cursors)} of {max(1, -(-total_found // page_size))}")
+    with col3:
+        st.button("Next ➡️", disabled=next_cursor is None,
+                  on_click=lambda: cursors.append(next_cursor))
+
+def reset_task(task_manager, task):
+    """Button callback: reset the task unless someone changed it since it was rendered"""
+    if task_manager.reset_task(task.id, base=task):
+        st.session_state["flash"] = "Task reset to pending!"
 
 def show_statistics(task_manager):
     st.header("📊 Task Statistics")
     
-    all_tasks = task_manager.get_all_tasks()
+    # Grouped by the database: a few dozen numbers however many tasks there are
+    stats = task_manager.get_task_stats()
     
-    if not all_tasks:
+    if not stats['total']:
         st.warning("No tasks available for statistics.")
         return
     
-    df = pd.DataFrame(all_tasks)
-    
-    # Convert date columns
-    df['created_at'] = pd.to_datetime(df['created_at'])
-    df['due_date'] = pd.to_datetime(df['due_date'])
-    df['completed_at'] = pd.to_datetime(df['completed_at'])
+    # Plotly takes a noticeable share of cold start; only this page needs it
+    import plotly.express as px
     
     col1, col2 = st.columns(2)
     
     with col1:
-        # Tasks by person
-        st.subheader("📊 Tasks by Person")
-        person_counts = df['assigned_to'].value_counts()
-        fig_person = px.pie(values=person_counts.values, names=person_counts.index, 
-                           title="Task Distribution by Person")
+        # Load by person: what each member carries (pending tasks, weighted by how often they recur)
+        # next to what they have been doing (completions, the recent ones counting most)
+        st.subheader("⚖️ Mental Load by Person")
+        members = task_manager.get_members()
+        carried = carried_load(stats.get('pending_by_person_frequency', {}), members)
+        done = task_manager.get_load_scores().per_week(members)
+        people = list(done)
+        fig_person = px.bar(x=people * 2, y=[carried.get(person, 0.0) for person in people] + list(done.values()),
+                            color=["Carried"] * len(people) + ["Done lately"] * len(people), barmode="group",
+                            title="Tasks per Week by Person")
+        fig_person.update_layout(xaxis_title="Person", yaxis_title="Tasks per Week", legend_title=None)
         st.plotly_chart(fig_person, use_container_width=True)
+        even = balance(done)
+        if even is not None:
+            st.caption(f"Balance of the work done lately: {even:.0%} (100% when everyone does the same)")
         
         # Tasks by status
         st.subheader("📈 Task Completion Status")
-        status_counts = df['status'].value_counts()
-        fig_status = px.bar(x=status_counts.index, y=status_counts.values, 
+        status_counts = stats['by_status']
+        fig_status = px.bar(x=list(status_counts.keys()), y=list(status_counts.values()), 
                            title="Tasks by Status")
         fig_status.update_layout(xaxis_title="Status", yaxis_title="Number of Tasks")
         st.plotly_chart(fig_status, use_container_width=True)
@@ -372,52 +559,51 @@ def show_statistics(task_manager):
     with col2:
         # Tasks by room
         st.subheader("🏠 Tasks by Room")
-        room_counts = df['room'].value_counts()
-        fig_room = px.bar(x=room_counts.values, y=room_counts.index, 
+        room_counts = stats['by_room']
+        fig_room = px.bar(x=list(room_counts.values()), y=list(room_counts.keys()), 
                          orientation='h', title="Tasks by Room")
         fig_room.update_layout(xaxis_title="Number of Tasks", yaxis_title="Room")
         st.plotly_chart(fig_room, use_container_width=True)
         
         # Tasks by frequency
         st.subheader("🔄 Tasks by Frequency")
-        freq_counts = df['frequency'].value_counts()
-        fig_freq = px.pie(values=freq_counts.values, names=freq_counts.index, 
+        freq_counts = stats['by_frequency']
+        fig_freq = px.pie(values=list(freq_counts.values()), names=list(freq_counts.keys()), 
                          title="Task Distribution by Frequency")
         st.plotly_chart(fig_freq, use_container_width=True)
     
     # Task completion timeline
     st.subheader("📅 Task Completion Timeline")
-    completed_df = df[df['status'] == 'completed'].copy()
-    if not completed_df.empty:
-        completed_df['completed_date'] = completed_df['completed_at'].dt.date
-        daily_completions = completed_df.groupby('completed_date').size().reset_index()
-        daily_completions.columns = ['Date', 'Tasks Completed']
-        
-        fig_timeline = px.line(daily_completions, x='Date', y='Tasks Completed', 
+    daily_completions = stats['daily_completions']
+    if daily_completions:
+        fig_timeline = px.line(x=list(daily_completions.keys()), y=list(daily_completions.values()), 
                               title="Daily Task Completions")
+        fig_timeline.update_layout(xaxis_title="Date", yaxis_title="Tasks Completed")
         st.plotly_chart(fig_timeline, use_container_width=True)
     else:
         st.info("No completed tasks to show timeline.")
     
     # Summary statistics
     st.subheader("📋 Summary Statistics")
-    col1, col2, col3 = st.columns(3)
+    col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        total_tasks = len(df)
-        completed_tasks = len(df[df['status'] == 'completed'])
+        total_tasks = stats['total']
+        completed_tasks = stats['by_status'].get('completed', 0)
         completion_rate = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
         st.metric("Completion Rate", f"{completion_rate:.1f}%")
     
     with col2:
-        avg_tasks_per_person = df.groupby('assigned_to').size().mean()
+        avg_tasks_per_person = total_tasks / len(stats['by_person']) if stats['by_person'] else 0
         st.metric("Avg Tasks per Person", f"{avg_tasks_per_person:.1f}")
     
     with col3:
-        overdue_tasks = len(df[(df['status'] == 'pending') & (df['due_date'] < datetime.now())])
-        st.metric("Overdue Tasks", overdue_tasks)
+        st.metric("Overdue Tasks", stats['overdue'])
+    
+    with col4:
+        st.metric("Due This Week", stats.get('due_this_week', 0))
 
-def show_settings():
+def show_settings(task_manager):
     st.header("⚙️ Settings")
     
     st.subheader("🔧 Application Settings")
@@ -428,38 +614,29 @@ def show_settings():
     **Database Setup Instructions:**
     
     1. **Create a Supabase project** at https://supabase.com
-    2. **Create the following table** in your Supabase database:
-    
-    ```sql
-    CREATE TABLE cleaning_tasks (
-        id SERIAL PRIMARY KEY,
-        task_name VARCHAR(255) NOT NULL,
-        assigned_to VARCHAR(50) NOT NULL,
-        room VARCHAR(100) NOT NULL,
-        frequency VARCHAR(50) NOT NULL,
-        description TEXT,
-        status VARCHAR(20) DEFAULT 'pending',
-        due_date DATE,
-        created_at TIMESTAMP DEFAULT NOW(),
-        completed_at TIMESTAMP
-    );
-    ```
-    
-    3. **Update your .env file** with your Supabase credentials:
+    2. **Create the schema** (tables, indexes and functions) from the migrations in `sql/`:
+       - with `DATABASE_URL` set to your database connection string, run `python migrations.py up`
+       - or paste the output of `python migrations.py sql` into the SQL Editor
+    
+    3. **Run the same command after updating the app** to apply new migrations
+    
+    4. **Update your .env file** with your Supabase credentials:
        - SUPABASE_URL: Your project URL
        - SUPABASE_KEY: Your anon public key
     
-    4. **Restart the application** after updating the .env file
+    5. **Restart the application** after updating the .env file
     """)
     
+    show_household_settings(task_manager)
+    
     # App preferences
     st.subheader("👤 User Preferences")
     
     # You can add user-specific settings here
     st.selectbox("Default View", ["Dashboard", "Add Task", "Manage Tasks"])
     st.selectbox("Theme", ["Light", "Dark"])
-    st.checkbox("Show notifications for overdue tasks")
-    st.checkbox("Send daily summary emails")
+    
+    show_notification_settings(task_manager)
     
     # Data management
     st.subheader("📊 Data Management")
@@ -468,11 +645,51 @@ def show_settings():
     
     with col1:
         if st.button("🗑️ Clear Completed Tasks", type="secondary"):
-            st.warning("This will permanently delete all completed tasks. Are you sure?")
+            st.session_state["confirm_clear"] = True
+        if st.session_state.get("confirm_clear"):
+            st.warning(f"Completed tasks and the completion history older than {RETENTION_DAYS} days will be "
+                       f"moved to archive files in '{ARCHIVE_DIR}' and removed from the database. "
+                       "Monthly totals per person are kept. Are you sure?")
+            confirm, cancel = st.columns(2)
+            if confirm.button("Yes, archive them", type="primary"):
+                st.session_state["confirm_clear"] = False
+                report = task_manager.apply_retention()
+                if report is not None:
+                    st.session_state["flash"] = (f"Archived {report.tasks} completed tasks and {report.completions} "
+                                                 f"old completions into {len(report.files)} files")
+                    st.rerun()
+            if cancel.button("Cancel"):
+                st.session_state["confirm_clear"] = False
+                st.rerun()
     
     with col2:
+        export_format = st.selectbox("Export format", ["csv", "jsonl", "parquet"])
         if st.button("📤 Export All Data", type="secondary"):
-            st.info("Data export functionality coming soon!")
+            # Stream pages into a temporary file so only one page is held in memory at a time
+            export_file = tempfile.TemporaryFile(mode="w+b")
+            out = export_file if export_format == "parquet" else io.TextIOWrapper(export_file, encoding="utf-8", newline="")
+            try:
+                count = task_manager.export_tasks(out, export_format)
+                out.flush()
+                export_file.seek(0)
+                st.download_button(f"⬇️ Download {count} tasks", export_file,
+                                   file_name=f"cleaning_tasks.{export_format}")
+            except Exception as e:
+                st.error(f"Error exporting tasks: {str(e)}")
+    
+    uploaded = st.file_uploader("📥 Import tasks (csv, jsonl or parquet)", type=["csv", "jsonl", "json", "parquet"])
+    if uploaded is not None and st.button("📥 Import", type="primary"):
+        try:
+            fmt = data_io.format_for_path(uploaded.name)
+            source = uploaded if fmt == "parquet" else io.TextIOWrapper(uploaded, encoding="utf-8", newline="")
+            report = task_manager.import_tasks(data_io.read_rows(source, fmt))
+            st.success(f"Imported {report.inserted} tasks.")
+            for line, error in report.rejected[:10]:
+                st.warning(f"Row {line} skipped: {error}")
+        except Exception as e:
+            st.error(f"Error importing tasks: {str(e)}")
+    
+    show_query_metrics(task_manager.metrics)
     
     # About
     st.subheader("ℹ️ About")
@@ -491,5 +708,69 @@ def show_settings():
     **Built with:** Streamlit + Supabase
     """)
 
+def show_household_settings(task_manager):
+    st.subheader("🏠 Household")
+    household = task_manager.get_household()
+    st.caption(f"Household link: `?household={household['id']}`")
+    
+    with st.form("household_form"):
+        name = st.text_input("Household name", value=household['name'])
+        members = st.text_area("Members, one per line, in rotation order", value="\n".join(household['members']),
+                               help="Completing a task hands it to the next member in this list, then back to the first.")
+        if st.form_submit_button("💾 Save Household", type="primary"):
+            if task_manager.save_household(name, members.splitlines()):
+                st.success("Household saved!")
+                st.rerun()
+    
+    with st.expander("➕ Create another household"):
+        with st.form("new_household_form", clear_on_submit=True):
+            new_name = st.text_input("Household name")
+            new_members = st.text_area("Members, one per line, in rotation order")
+            if st.form_submit_button("➕ Create Household"):
+                new_id = task_manager.create_household(new_name, new_members.splitlines())
+                if new_id is not None:
+                    st.success(f"Household created! Open it with `?household={new_id}`.")
+
+def show_notification_settings(task_manager):
+    st.subheader("🔔 Notifications")
+    settings = task_manager.get_notification_settings()
+    st.caption("Sent by the digest worker (`python digest.py run`) to the members with an e-mail address.")
+    
+    with st.form("notification_form"):
+        overdue_alerts = st.checkbox("Send alerts for overdue tasks", value=settings['overdue_alerts'])
+        daily_digest = st.checkbox("Send a daily digest of overdue and due-soon tasks", value=settings['daily_digest'])
+        recipients = {member: st.text_input(f"E-mail of {member}", value=settings['recipients'].get(member, ""))
+                      for member in task_manager.get_members()}
+        if st.form_submit_button("💾 Save Notifications"):
+            if task_manager.save_notification_settings(overdue_alerts, daily_digest, recipients):
+                st.success("Notification settings saved!")
+
+def show_query_metrics(metrics):
+    # Debug panel: per-query latency percentiles for this server process
+    with st.expander("🐞 Query Performance"):
+        series = metrics.snapshot()
+        if not series:
+            st.info("No queries recorded yet.")
+        else:
+            calls = sum(row["calls"] for row in series)
+            errors = sum(row["errors"] for row in series)
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Backend calls", calls)
+            col2.metric("Errors", errors)
+            col3.metric("Slowest p99", f"{max(row['p99_ms'] for row in series):.1f} ms")
+            st.dataframe(sorted(series, key=lambda row: row["p99_ms"], reverse=True), use_container_width=True)
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.download_button("⬇️ Prometheus", metrics.to_prometheus(), file_name="mymental_metrics.prom",
+                               mime="text/plain")
+        with col2:
+            st.download_button("⬇️ JSON", metrics.to_json(), file_name="mymental_metrics.json",
+                               mime="application/json")
+        with col3:
+            if st.button("🔄 Reset metrics"):
+                metrics.reset()
+                st.rerun()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
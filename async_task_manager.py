@@ -0,0 +1,520 @@
+"""
+Asyncio variant of CleaningTaskManager.
+
+AsyncCleaningTaskManager issues its queries on one pooled keep-alive HTTP
+client, so independent queries (dashboard counts and the task list, say) can
+run concurrently with gather(). It imports nothing from Streamlit and raises
+the typed errors of errors.py, which makes it the core of the HTTP API
+(api.py) and the CLI (cli.py) too. SyncTaskManager is the facade Streamlit
+calls: it owns a background event loop and exposes the same blocking
+methods as CleaningTaskManager.
+"""
+
+import asyncio
+import logging
+import threading
+from datetime import datetime, date, timedelta
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, IO, Iterable, List, Optional, Tuple
+
+import data_io
+import retention
+from cache import TaskCache, ALL_TASKS_KEY, HOUSEHOLD_KEY, LOAD_KEY
+from errors import Conflict, InvalidInput, NotFound, TypedErrorBackend
+from fairness import LoadScores
+from database import get_async_storage_backend, CACHE_TTL_SECONDS, CACHE_MAX_ENTRIES, HOUSEHOLD_ID, RETENTION_DAYS
+from metrics import InstrumentedBackend, MetricsRegistry, METRICS, current_page, set_page
+from models import Task, decode_rows
+from snapshot import TaskSnapshot
+from schedule import next_due, rotation_calendar
+from storage import next_member
+from task_manager import (CleaningTaskManager, EMPTY_STATS, NO_NOTIFICATIONS, WRITE_RETRIES, VersionConflict,
+                          period_start, clean_household, clean_recipients, clean_updates, conflicting_fields,
+                          scheduled_updates)
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncCleaningTaskManager:
+    """Coroutine API mirroring CleaningTaskManager; errors propagate to the caller as TaskManagerErrors"""
+
+    def __init__(self, backend, household_id: int = HOUSEHOLD_ID, cache_ttl: float = CACHE_TTL_SECONDS,
+                 cache_size: int = CACHE_MAX_ENTRIES, metrics: MetricsRegistry = METRICS):
+        self.metrics = metrics
+        self.db = InstrumentedBackend(TypedErrorBackend(backend), metrics)
+        self.household_id = household_id
+        self.cache = TaskCache(ttl=cache_ttl, max_entries=cache_size)
+
+    @classmethod
+    async def create(cls, **kwargs) -> "AsyncCleaningTaskManager":
+        """Build a manager on the configured async storage backend"""
+        return cls(await get_async_storage_backend(), **kwargs)
+
+    @staticmethod
+    async def gather(*queries: Awaitable) -> List[Any]:
+        """Run independent queries concurrently and return their results in order"""
+        return list(await asyncio.gather(*queries))
+
+    def cache_stats(self) -> Dict:
+        """Cache hit/miss counters"""
+        return self.cache.stats()
+
+    async def get_household(self) -> Dict:
+        """Get the household's name and rotation ring"""
+        household = await self.cache.get_or_load_async(HOUSEHOLD_KEY, lambda: self.db.get_household(self.household_id))
+        return household or {"id": self.household_id, "name": "", "members": []}
+
+    async def get_members(self) -> List[str]:
+        """Get the household members in rotation order"""
+        return (await self.get_household())['members']
+
+    async def next_assignee(self, current: str) -> str:
+        """Get who a task goes to after ``current`` completes it"""
+        return next_member(await self.get_members(), current)
+
+    async def save_household(self, name: str, members: List[str]) -> bool:
+        """Rename the household and replace its rotation ring"""
+        self.cache.set(HOUSEHOLD_KEY, await self.db.save_household(self.household_id, *clean_household(name, members)))
+        return True
+
+    async def create_household(self, name: str, members: List[str]) -> int:
+        """Create another household and return its id"""
+        return (await self.db.save_household(None, *clean_household(name, members)))['id']
+
+    async def get_notification_settings(self) -> Dict:
+        """Get whether overdue alerts and daily digests are on and who receives them"""
+        return await self.db.get_notification_settings(self.household_id)
+
+    async def save_notification_settings(self, overdue_alerts: bool, daily_digest: bool,
+                                         recipients: Dict[str, str]) -> bool:
+        """Switch overdue alerts and daily digests and set the members' e-mail addresses"""
+        await self.db.save_notification_settings(self.household_id, {
+            "overdue_alerts": overdue_alerts, "daily_digest": daily_digest,
+            "recipients": clean_recipients(recipients, await self.get_members())})
+        return True
+
+    async def create_task(self, task_name: str, assigned_to: str, room: str, frequency: str,
+                          description: str = "", due_date: date = None) -> bool:
+        """Create a new cleaning task, due one step of its frequency from today unless a due date is given"""
+        due_date = due_date or next_due(frequency, date.today())
+        row = await self.db.insert_task(self.household_id, {
+            "task_name": task_name,
+            "assigned_to": assigned_to,
+            "room": room,
+            "frequency": frequency,
+            "description": description,
+            "due_date": due_date.isoformat() if due_date else None,
+            "status": "pending",
+            "created_at": datetime.now().isoformat(),
+            "completed_at": None
+        })
+        self.cache.apply_write(None, row, created=True)
+        return True
+
+    async def get_all_tasks(self) -> List[Task]:
+        """Get all cleaning tasks"""
+        return list(await self.cache.get_or_load_async(ALL_TASKS_KEY, lambda: self._decoded(
+            self.db.select_tasks(self.household_id))))
+
+    async def get_task(self, task_id: int) -> Task:
+        """Get one task; raises NotFound"""
+        row = await self.db.get_task(self.household_id, task_id)
+        if row is None:
+            raise NotFound(f"Task {task_id} does not exist")
+        return Task.from_row(row)
+
+    async def task_pages(self, page_size: int = 1000) -> AsyncIterator[List[Dict]]:
+        """Every task as wire rows, one keyset page at a time (for exports)"""
+        after = None
+        while True:
+            rows = await self.db.select_full_tasks_page(self.household_id, page_size=page_size, after=after)
+            if rows:
+                yield rows
+            if len(rows) < page_size:
+                return
+            after = (rows[-1]['created_at'], rows[-1]['id'])
+
+    @staticmethod
+    async def _decoded(query: Awaitable[List[Dict]]) -> List[Task]:
+        return decode_rows(await query)
+
+    async def get_tasks_page(self, person: Optional[str] = None, status: Optional[str] = None,
+                             room: Optional[str] = None, page_size: int = 25,
+                             after: Optional[Tuple[str, int]] = None) -> Tuple[List[Task], Optional[Tuple[str, int]]]:
+        """Get one page of filtered tasks and the keyset cursor for the next page"""
+        filters = CleaningTaskManager._filters(person, status, room)
+        rows = list(await self.cache.get_or_load_async(
+            ("page", tuple(sorted(filters.items())), page_size, after),
+            lambda: self._decoded(self.db.select_tasks_page(self.household_id, eq=filters,
+                                                            page_size=page_size + 1, after=after))))
+        if len(rows) <= page_size:
+            return rows, None
+        rows = rows[:page_size]
+        return rows, (rows[-1].created_at, rows[-1].id)
+
+    async def count_tasks(self, person: Optional[str] = None, status: Optional[str] = None,
+                          room: Optional[str] = None) -> int:
+        """Count filtered tasks without fetching them"""
+        filters = CleaningTaskManager._filters(person, status, room)
+        return await self.cache.get_or_load_async(("count", tuple(sorted(filters.items()))),
+                                                  lambda: self.db.count_tasks(self.household_id, eq=filters))
+
+    async def get_notes(self, person: Optional[str] = None, status: Optional[str] = None,
+                        room: Optional[str] = None, task_ids: Optional[List[int]] = None) -> Dict[int, str]:
+        """Descriptions of the filtered tasks (only of ``task_ids``, when given) by task id"""
+        filters = CleaningTaskManager._filters(person, status, room)
+        ids = None if task_ids is None else tuple(task_ids)
+        return await self.cache.get_or_load_async(
+            ("notes", tuple(sorted(filters.items())), ids),
+            lambda: self.db.select_notes(self.household_id, eq=filters,
+                                         task_ids=None if ids is None else list(ids)))
+
+    async def get_tasks_by_person(self, person: str) -> List[Task]:
+        """Get tasks assigned to a specific person"""
+        return list(await self.cache.get_or_load_async(
+            ("person", person),
+            lambda: self._decoded(self.db.select_tasks(self.household_id, eq={"assigned_to": person}))))
+
+    async def get_pending_tasks(self) -> List[Task]:
+        """Get all pending tasks"""
+        return list(await self.cache.get_or_load_async(
+            ("pending",),
+            lambda: self._decoded(self.db.select_tasks(self.household_id, eq={"status": "pending"},
+                                                       order_by="due_date", desc=False))))
+
+    async def get_due_tasks(self, until: date) -> List[Task]:
+        """Get pending tasks due on or before ``until`` (overdue ones included), soonest first"""
+        return list(await self.cache.get_or_load_async(
+            ("due", until.isoformat()), lambda: self._decoded(self.db.select_due(self.household_id, until.isoformat()))))
+
+    async def get_overdue_tasks(self) -> List[Task]:
+        """Get pending tasks whose due date has passed"""
+        return await self.get_due_tasks(date.today() - timedelta(days=1))
+
+    async def get_rotation_calendar(self, days: int = 14) -> List[Dict]:
+        """Get who does which scheduled task on which day over the coming ``days`` days"""
+        today = date.today()
+        pending, members = await self.gather(self.get_pending_tasks(), self.get_members())
+        return rotation_calendar(pending, members, today, today + timedelta(days=days - 1))
+
+    async def complete_and_rotate_task(self, task_id: int, version: Optional[int] = None) -> bool:
+        """Mark a task as done and rotate assignment for next week"""
+        return bool(await self.complete_and_rotate_tasks([task_id], None if version is None else [version]))
+
+    async def complete_and_rotate_tasks(self, task_ids: List[int], versions: Optional[List[int]] = None) -> int:
+        """Mark several tasks as done and rotate them in a single atomic request; returns how many rotated
+
+        With ``versions``, tasks that changed since they were shown are left alone.
+        """
+        rows = await self.db.complete_and_rotate(self.household_id, task_ids, versions)
+        if rows:
+            self.cache.apply_rows(rows)
+            self._completed()
+        if len(rows) < len(task_ids):
+            self.cache.invalidate()
+        return len(rows)
+
+    async def rotate_task(self, task_id: int, version: Optional[int] = None) -> Task:
+        """Complete and rotate one task and return it as rotated; raises NotFound, or Conflict when
+        ``version`` is given and the task is no longer at it"""
+        rows = await self.db.complete_and_rotate(self.household_id, [task_id], None if version is None else [version])
+        if not rows:
+            current = await self.get_task(task_id)
+            self.cache.apply_write(task_id, current.to_row())
+            raise Conflict(f"'{current.task_name}' changed since version {version}; it is at {current.version}")
+        self.cache.apply_rows(rows)
+        self._completed()
+        return Task.from_row(rows[0])
+
+    def _completed(self):
+        # The completion trigger moved the load scores; re-reading them costs one row per member
+        self.cache.invalidate(lambda key: key == LOAD_KEY)
+
+    async def edit_task(self, task_id: int, updates: Dict, version: Optional[int] = None) -> Task:
+        """Apply an outside edit (API, CLI) to one task and return it; raises NotFound, or Conflict when
+        ``version`` is given and the task is no longer at it"""
+        row = await self.db.update_task(self.household_id, task_id,
+                                        scheduled_updates(clean_updates(updates), date.today()), version=version)
+        if row is None:
+            current = await self.get_task(task_id)
+            self.cache.apply_write(task_id, current.to_row())
+            raise Conflict(f"'{current.task_name}' changed since version {version}; it is at {current.version}")
+        self.cache.apply_write(task_id, row)
+        return Task.from_row(row)
+
+    async def update_tasks(self, task_ids: List[int], updates: Dict) -> List[Task]:
+        """Apply the same edit to several tasks in one request and return them; unknown ids are skipped"""
+        if not task_ids:
+            raise InvalidInput("No tasks to update")
+        rows = await self.db.update_tasks(self.household_id, task_ids,
+                                          scheduled_updates(clean_updates(updates), date.today()))
+        self.cache.apply_rows(rows)
+        return decode_rows(rows)
+
+    async def _update(self, task_id: int, updates: Dict, base: Optional[Task]) -> Optional[Dict]:
+        """Blind update, or conditional on ``base``'s version and retried while nobody touched the same fields"""
+        if base is None:
+            return await self.db.update_task(self.household_id, task_id, updates)
+        version = base.version
+        for _ in range(WRITE_RETRIES):
+            row = await self.db.update_task(self.household_id, task_id, updates, version=version)
+            if row is not None:
+                return row
+            row = await self.db.get_task(self.household_id, task_id)
+            self.cache.apply_write(task_id, row)
+            if row is None:
+                raise NotFound(f"'{base.task_name}' was deleted meanwhile")
+            current = Task.from_row(row)
+            fields = conflicting_fields(updates, base, current)
+            if fields:
+                raise VersionConflict(current, fields)
+            version = current.version
+        raise VersionConflict(current, list(updates))
+
+    async def reset_task(self, task_id: int, base: Optional[Task] = None) -> bool:
+        """Reset a completed task back to pending (only if unchanged since ``base`` was read, when given)"""
+        row = await self._update(task_id, {"status": "pending", "completed_at": None}, base)
+        self.cache.apply_write(task_id, row)
+        return True
+
+    async def delete_task(self, task_id: int) -> bool:
+        """Delete a task"""
+        await self.db.delete_task(self.household_id, task_id)
+        self.cache.apply_write(task_id, None)
+        return True
+
+    async def update_task(self, task_id: int, updates: Dict, base: Optional[Task] = None) -> bool:
+        """Update a task; with ``base`` (the row the edit started from), concurrent edits are not overwritten"""
+        row = await self._update(task_id, scheduled_updates(updates, date.today()), base)
+        self.cache.apply_write(task_id, row)
+        return True
+
+    async def get_completion_history(self, start: date, end: Optional[date] = None,
+                                     person: Optional[str] = None) -> List[Dict]:
+        """Get completion events between start (inclusive) and end (exclusive), newest first"""
+        since = start.isoformat()
+        until = end.isoformat() if end else None
+        return list(await self.cache.get_or_load_async(
+            ("completions", since, until, person),
+            lambda: self.db.select_completions(self.household_id, since, until, person)))
+
+    async def get_completions_for_period(self, period: str = "week", person: Optional[str] = None) -> List[Dict]:
+        """Get completions for the current week, month or year"""
+        return await self.get_completion_history(period_start(period, datetime.now().date()), person=person)
+
+    async def get_completed_tasks_this_week(self) -> List[Dict]:
+        """Get tasks completed this week"""
+        return await self.get_completions_for_period("week")
+
+    async def get_task_stats(self) -> Dict:
+        """Get grouped task counts for the statistics page"""
+        today = date.today().isoformat()
+        return await self.cache.get_or_load_async(
+            ("stats", today), lambda: self.db.task_stats(self.household_id, today)) or EMPTY_STATS
+
+    async def get_load_scores(self) -> LoadScores:
+        """Get each member's rolling completion score (one row per member, see fairness.py)"""
+        return await self.cache.get_or_load_async(LOAD_KEY, self._load_scores)
+
+    async def _load_scores(self) -> LoadScores:
+        return LoadScores.from_rows(await self.db.get_load_scores(self.household_id))
+
+    async def get_completion_rollups(self) -> List[Dict]:
+        """Get the archived completions per member and month, oldest first"""
+        return await self.db.select_completion_rollups(self.household_id)
+
+    async def snapshot(self) -> TaskSnapshot:
+        """Fetch the task list and the rotation ring concurrently and index them for one rerun"""
+        tasks, members = await self.gather(self.get_all_tasks(), self.get_members())
+        return TaskSnapshot(tasks, members)
+
+
+class SyncTaskManager:
+    """Blocking facade over AsyncCleaningTaskManager for Streamlit scripts
+
+    The event loop (and with it the pooled HTTP client) lives on a daemon
+    thread for the life of the process; each call blocks the script thread
+    until its coroutine finishes. Failures are reported through ``on_error``
+    (st.error in the app, logging otherwise) with the same fallback values
+    CleaningTaskManager returns.
+    """
+
+    def __init__(self, manager: Optional[AsyncCleaningTaskManager] = None,
+                 on_error: Optional[Callable[[str], Any]] = None, household_id: int = HOUSEHOLD_ID):
+        self.report_error = on_error or logger.error
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="task-manager-loop", daemon=True)
+        self.thread.start()
+        self.manager = manager or self.run(AsyncCleaningTaskManager.create(household_id=household_id))
+
+    def run(self, coro: Awaitable) -> Any:
+        """Run a coroutine on the background loop and wait for its result"""
+        return asyncio.run_coroutine_threadsafe(self._on_page(coro, current_page()), self.loop).result()
+
+    @staticmethod
+    async def _on_page(coro: Awaitable, page: str) -> Any:
+        # Context variables do not cross into the loop thread; carry the page label over
+        set_page(page)
+        return await coro
+
+    def gather(self, *queries: Awaitable) -> List[Any]:
+        """Run independent manager coroutines concurrently and wait for all of them"""
+        return self.run(self.manager.gather(*queries))
+
+    def _call(self, coro: Awaitable, fallback: Any, message: str) -> Any:
+        try:
+            return self.run(coro)
+        except Exception as e:
+            self.report_error(f"{message}: {str(e)}")
+            return fallback
+
+    def cache_stats(self) -> Dict:
+        """Cache hit/miss counters"""
+        return self.manager.cache_stats()
+
+    # The async data layer writes through; WRITE_JOURNAL applies to the sync one only
+    def pending_writes(self) -> int:
+        return 0
+
+    def failed_writes(self) -> List[Dict]:
+        return []
+
+    def dismiss_failed_writes(self):
+        pass
+
+    @property
+    def metrics(self) -> MetricsRegistry:
+        return self.manager.metrics
+
+    @property
+    def household_id(self) -> int:
+        return self.manager.household_id
+
+    def get_household(self) -> Dict:
+        return self._call(self.manager.get_household(), {"id": self.household_id, "name": "", "members": []},
+                          "Error fetching household")
+
+    def get_members(self) -> List[str]:
+        return self.get_household()['members']
+
+    def next_assignee(self, current: str) -> str:
+        return next_member(self.get_members(), current)
+
+    def save_household(self, name: str, members: List[str]) -> bool:
+        return self._call(self.manager.save_household(name, members), False, "Error saving household")
+
+    def create_household(self, name: str, members: List[str]) -> Optional[int]:
+        return self._call(self.manager.create_household(name, members), None, "Error creating household")
+
+    def get_notification_settings(self) -> Dict:
+        return self._call(self.manager.get_notification_settings(), dict(NO_NOTIFICATIONS),
+                          "Error fetching notification settings")
+
+    def save_notification_settings(self, overdue_alerts: bool, daily_digest: bool, recipients: Dict[str, str]) -> bool:
+        return self._call(self.manager.save_notification_settings(overdue_alerts, daily_digest, recipients), False,
+                          "Error saving notification settings")
+
+    def create_task(self, *args, **kwargs) -> bool:
+        return self._call(self.manager.create_task(*args, **kwargs), False, "Error creating task")
+
+    def get_all_tasks(self) -> List[Task]:
+        return self._call(self.manager.get_all_tasks(), [], "Error fetching tasks")
+
+    def get_tasks_page(self, *args, **kwargs) -> Tuple[List[Task], Optional[Tuple[str, int]]]:
+        return self._call(self.manager.get_tasks_page(*args, **kwargs), ([], None), "Error fetching tasks")
+
+    def count_tasks(self, *args, **kwargs) -> int:
+        return self._call(self.manager.count_tasks(*args, **kwargs), 0, "Error counting tasks")
+
+    def get_task(self, task_id: int) -> Optional[Task]:
+        return self._call(self.manager.get_task(task_id), None, "Error fetching task")
+
+    def get_notes(self, *args, **kwargs) -> Dict[int, str]:
+        return self._call(self.manager.get_notes(*args, **kwargs), {}, "Error fetching notes")
+
+    def get_tasks_by_person(self, person: str) -> List[Task]:
+        return self._call(self.manager.get_tasks_by_person(person), [], f"Error fetching tasks for {person}")
+
+    def get_pending_tasks(self) -> List[Task]:
+        return self._call(self.manager.get_pending_tasks(), [], "Error fetching pending tasks")
+
+    def get_due_tasks(self, until: date) -> List[Task]:
+        return self._call(self.manager.get_due_tasks(until), [], "Error fetching due tasks")
+
+    def get_overdue_tasks(self) -> List[Task]:
+        return self._call(self.manager.get_overdue_tasks(), [], "Error fetching due tasks")
+
+    def get_rotation_calendar(self, days: int = 14) -> List[Dict]:
+        return self._call(self.manager.get_rotation_calendar(days), [], "Error building the rotation calendar")
+
+    def complete_and_rotate_task(self, task_id: int, version: Optional[int] = None) -> bool:
+        return self.complete_and_rotate_tasks([task_id], None if version is None else [version])
+
+    def complete_and_rotate_tasks(self, task_ids: List[int], versions: Optional[List[int]] = None) -> bool:
+        try:
+            rotated = self.run(self.manager.complete_and_rotate_tasks(task_ids, versions))
+        except Exception as e:
+            self.report_error(f"Error rotating task: {str(e)}")
+            return False
+        if versions is not None and rotated < len(task_ids):
+            self.report_error(f"{len(task_ids) - rotated} task(s) were already done or changed since this page "
+                              "loaded; they were left as they are")
+        return bool(rotated)
+
+    def reset_task(self, task_id: int, base: Optional[Task] = None) -> bool:
+        return self._call(self.manager.reset_task(task_id, base), False, "Error resetting task")
+
+    def delete_task(self, task_id: int) -> bool:
+        return self._call(self.manager.delete_task(task_id), False, "Error deleting task")
+
+    def update_task(self, task_id: int, updates: Dict, base: Optional[Task] = None) -> bool:
+        return self._call(self.manager.update_task(task_id, updates, base), False, "Error updating task")
+
+    def get_completion_history(self, *args, **kwargs) -> List[Dict]:
+        return self._call(self.manager.get_completion_history(*args, **kwargs), [],
+                          "Error fetching completion history")
+
+    def get_completions_for_period(self, *args, **kwargs) -> List[Dict]:
+        return self._call(self.manager.get_completions_for_period(*args, **kwargs), [],
+                          "Error fetching completion history")
+
+    def get_completed_tasks_this_week(self) -> List[Dict]:
+        return self._call(self.manager.get_completed_tasks_this_week(), [], "Error fetching completed tasks")
+
+    def get_task_stats(self) -> Dict:
+        return self._call(self.manager.get_task_stats(), EMPTY_STATS, "Error fetching statistics")
+
+    def get_load_scores(self) -> LoadScores:
+        return self._call(self.manager.get_load_scores(), LoadScores(), "Error fetching load scores")
+
+    def snapshot(self) -> TaskSnapshot:
+        return self._call(self.manager.snapshot(), TaskSnapshot([], []), "Error fetching tasks")
+
+    def export_tasks(self, out: IO, fmt: str = "csv", page_size: int = 1000) -> int:
+        return data_io.export_tasks(
+            lambda size, after: self.run(self.manager.db.select_full_tasks_page(
+                self.manager.household_id, page_size=size, after=after)),
+            out, fmt, page_size)
+
+    def import_tasks(self, rows: Iterable[Dict], batch_size: int = 500) -> data_io.ImportReport:
+        try:
+            report = data_io.import_tasks(
+                lambda batch: self.run(self.manager.db.insert_tasks(self.manager.household_id, batch)), rows, batch_size)
+            if report.inserted:
+                self.run(self.manager.db.schedule_tasks(self.manager.household_id))
+            return report
+        finally:
+            self.manager.cache.invalidate()
+
+    def apply_retention(self, days: int = RETENTION_DAYS,
+                        clear_completed: bool = True) -> Optional[retention.RetentionReport]:
+        try:
+            return retention.apply_retention(self.manager.db, self.manager.household_id, days, clear_completed,
+                                             call=self.run)
+        except Exception as e:
+            self.report_error(f"Error archiving old data: {str(e)}")
+            return None
+        finally:
+            self.manager.cache.invalidate()
+
+    def get_completion_rollups(self) -> List[Dict]:
+        return self._call(self.manager.get_completion_rollups(), [], "Error fetching archived history")
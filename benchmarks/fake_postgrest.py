@@ -0,0 +1,270 @@
+"""
+In-process stand-in for Supabase's PostgREST API, backed by SQLiteBackend.
+
+It understands the subset of PostgREST the app uses (column filters, `or`
+logic trees, order/limit, exact counts, insert/update/delete with
+return=representation|minimal and the RPC functions in sql/), adds an
+injectable per-request latency, and counts requests and bytes so the
+benchmarks can report round trips and payload size per operation.
+"""
+
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from storage import SQLiteBackend
+
+OPERATORS = {"eq": "=", "neq": "!=", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "or", "and", "columns", "on_conflict"}
+IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _identifier(name: str) -> str:
+    if not IDENTIFIER.match(name):
+        raise ValueError(f"Bad identifier: {name}")
+    return name
+
+
+def _split_top_level(text: str) -> List[str]:
+    """Split on commas that are not inside parentheses or double quotes"""
+    parts, depth, quoted, current = [], 0, False, ""
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        if char == "," and depth == 0 and not quoted:
+            parts.append(current)
+            current = ""
+        else:
+            current += char
+    if current:
+        parts.append(current)
+    return parts
+
+
+def _unquote(value: str) -> str:
+    return value[1:-1] if len(value) >= 2 and value[0] == value[-1] == '"' else value
+
+
+def _condition(column: str, expression: str) -> Tuple[str, List]:
+    """Translate one PostgREST filter (`col=op.value`) into SQL"""
+    column = _identifier(column)
+    negate = expression.startswith("not.")
+    if negate:
+        expression = expression[4:]
+    operator, _, value = expression.partition(".")
+    if operator in OPERATORS:
+        sql, params = f"{column} {OPERATORS[operator]} ?", [_unquote(value)]
+    elif operator == "is":
+        sql, params = f"{column} IS {'NULL' if value == 'null' else value.upper()}", []
+    elif operator == "in":
+        values = [_unquote(item) for item in _split_top_level(value.strip("()"))]
+        sql, params = f"{column} IN ({', '.join('?' for _ in values)})", values
+    else:
+        raise ValueError(f"Unsupported operator: {operator}")
+    return (f"NOT ({sql})" if negate else sql), params
+
+
+def _logic_tree(joiner: str, body: str) -> Tuple[str, List]:
+    """Translate `(a.eq.1,and(b.lt.2,c.gt.3))` into SQL joined by OR/AND"""
+    clauses, params = [], []
+    for item in _split_top_level(body[1:-1]):
+        if item.startswith(("and(", "or(")):
+            nested_joiner, _, nested = item.partition("(")
+            sql, nested_params = _logic_tree(nested_joiner, "(" + nested)
+        else:
+            column, _, expression = item.partition(".")
+            sql, nested_params = _condition(column, expression)
+        clauses.append(f"({sql})")
+        params += nested_params
+    return f" {joiner.upper()} ".join(clauses), params
+
+
+def _order(spec: str) -> str:
+    terms = []
+    for term in spec.split(","):
+        column, *modifiers = term.split(".")
+        desc = "desc" in modifiers
+        nulls_first = "nullsfirst" in modifiers or ("nullslast" not in modifiers and desc)
+        column = _identifier(column)
+        # Postgres default: NULLS LAST ascending, NULLS FIRST descending
+        terms.append(f"{column} IS NULL {'DESC' if nulls_first else 'ASC'}, {column} {'DESC' if desc else 'ASC'}")
+    return ", ".join(terms)
+
+
+class FakePostgREST:
+    """Threaded HTTP server speaking enough PostgREST for CleaningTaskManager"""
+
+    def __init__(self, backend: SQLiteBackend, latency: float = 0.0):
+        self.backend = backend
+        self.latency = latency
+        self.requests = 0
+        self.bytes = 0
+        self._counter_lock = threading.Lock()
+        self.rpc: Dict[str, Callable[[Dict], object]] = {
+            "complete_and_rotate_tasks": lambda args: backend.complete_and_rotate(args["household"], args["task_ids"],
+                                                                                   args.get("versions")),
+            "insert_task_once": lambda args: [backend.insert_task_once(args["household"], args["task"], args["key"])],
+            "task_stats": lambda args: backend.task_stats(args["household"], args["today"]),
+            "task_changes": lambda args: backend.select_changes(args["household"], args["since"]),
+            "schedule_tasks": lambda args: backend.schedule_tasks(args["household"]),
+            "get_household": lambda args: backend.get_household(args["household"]),
+            "save_household": lambda args: backend.save_household(args["household"], args["name"], args["members"]),
+            "get_notification_settings": lambda args: backend.get_notification_settings(args["household"]),
+            "save_notification_settings": lambda args: backend.save_notification_settings(args["household"],
+                                                                                          args["settings"]),
+            "enabled_notification_settings": lambda args: backend.enabled_notification_settings(),
+            "archive_completions": lambda args: backend.archive_completions(args["household"],
+                                                                            args["completion_ids"]),
+        }
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, name="fake-postgrest", daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakePostgREST":
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def reset_counters(self):
+        with self._counter_lock:
+            self.requests = 0
+            self.bytes = 0
+
+    def _count(self, size: int):
+        with self._counter_lock:
+            self.requests += 1
+            self.bytes += size
+
+    # -- request handling ------------------------------------------------------
+
+    def _where(self, params: List[Tuple[str, str]]) -> Tuple[str, List]:
+        clauses, values = [], []
+        for key, value in params:
+            if key in ("or", "and"):
+                sql, nested = _logic_tree(key, value)
+            elif key in RESERVED_PARAMS:
+                continue
+            else:
+                sql, nested = _condition(key, value)
+            clauses.append(f"({sql})")
+            values += nested
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", values
+
+    def handle(self, method: str, path: str, query: List[Tuple[str, str]], headers, body: bytes):
+        """Return (status, response headers, response body) for one request"""
+        prefer = headers.get("Prefer", "")
+        parts = [part for part in path.split("/") if part]
+        if parts[:2] != ["rest", "v1"] or len(parts) < 3:
+            return 404, {}, b'{"message": "not found"}'
+
+        if parts[2] == "rpc":
+            args = json.loads(body or b"{}")
+            if parts[3] not in self.rpc:
+                return 404, {}, json.dumps({"message": f"function {parts[3]} not found"}).encode()
+            result = self.rpc[parts[3]](args)
+            select = dict(query).get("select", "*")
+            if select != "*" and isinstance(result, list):
+                # Set-returning functions are projected like tables
+                columns = [column.strip() for column in select.split(",")]
+                result = [{column: row[column] for column in columns} for row in result]
+            return 200, {}, json.dumps(result).encode()
+
+        table = _identifier(parts[2])
+        where, values = self._where(query)
+        params = dict(query)
+        conn, lock = self.backend.conn, self.backend.lock
+        returning = "return=minimal" not in prefer
+
+        with lock:
+            if method in ("GET", "HEAD"):
+                select = params.get("select", "*")
+                columns = "*" if select == "*" else ", ".join(_identifier(c.strip()) for c in select.split(","))
+                sql = f"SELECT {columns} FROM {table}{where}"
+                if "order" in params:
+                    sql += " ORDER BY " + _order(params["order"])
+                sql += f" LIMIT {int(params.get('limit', -1))} OFFSET {int(params.get('offset', 0))}"
+                rows = [dict(row) for row in conn.execute(sql, values)]
+                response_headers = {}
+                if "count=exact" in prefer:
+                    total = conn.execute(f"SELECT COUNT(*) FROM {table}{where}", values).fetchone()[0]
+                    response_headers["Content-Range"] = f"{'0-' + str(len(rows) - 1) if rows else '*'}/{total}"
+                return 200, response_headers, (b"" if method == "HEAD" else json.dumps(rows).encode())
+
+            if method == "POST":
+                payload = json.loads(body)
+                rows = payload if isinstance(payload, list) else [payload]
+                inserted = []
+                for row in rows:
+                    columns = [_identifier(column) for column in row]
+                    cursor = conn.execute(
+                        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)}) "
+                        "RETURNING *", list(row.values()))
+                    inserted += [dict(r) for r in cursor.fetchall()]
+                return 201, {}, (json.dumps(inserted).encode() if returning else b"")
+
+            if method == "PATCH":
+                updates = json.loads(body)
+                assignments = ", ".join(f"{_identifier(column)} = ?" for column in updates)
+                # RETURNING would miss what AFTER UPDATE triggers change, so re-read by rowid
+                rowids = [row[0] for row in conn.execute(f"UPDATE {table} SET {assignments}{where} RETURNING rowid",
+                                                         list(updates.values()) + values).fetchall()]
+                rows = [dict(row) for row in conn.execute(
+                    f"SELECT * FROM {table} WHERE rowid IN ({', '.join('?' for _ in rowids)})", rowids)]
+                return 200, {}, (json.dumps(rows).encode() if returning else b"")
+
+            if method == "DELETE":
+                cursor = conn.execute(f"DELETE FROM {table}{where} RETURNING *", values)
+                rows = [dict(row) for row in cursor.fetchall()]
+                response_headers = {"Content-Range": f"*/{len(rows)}"} if "count=exact" in prefer else {}
+                return 200, response_headers, (json.dumps(rows).encode() if returning else b"")
+
+        return 405, {}, b'{"message": "method not allowed"}'
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _serve(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if fake.latency:
+                    time.sleep(fake.latency)
+                url = urlsplit(self.path)
+                try:
+                    status, headers, payload = fake.handle(
+                        self.command, url.path, parse_qsl(url.query, keep_blank_values=True), self.headers, body)
+                except Exception as e:
+                    status, headers, payload = 400, {}, json.dumps({"message": str(e)}).encode()
+                fake._count(len(body) + len(payload))
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(0 if self.command == "HEAD" else len(payload)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(payload)
+
+            do_GET = do_HEAD = do_POST = do_PATCH = do_DELETE = _serve
+
+        return Handler
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Query-plan checks for the SQLite schema.
+
+Runs every StorageBackend query of the app against a seeded SQLite file (two
+households), records the SQL each one issues and asks SQLite for its plan
+with EXPLAIN QUERY PLAN. A plan fails the check when it
+
+* scans a whole task, completion or tombstone table instead of searching
+  an index,
+* reads a page (a query ending in LIMIT) through an index that serves none
+  of its filters besides household_id, checking them row by row, or
+* sorts with a temporary B-tree for a query ending in LIMIT, i.e. a page
+  that should come straight off an index in order.
+
+The run exits 1 when a plan fails. test_query_plans.py runs the same checks
+under pytest, one test per query. The Postgres indexes in sql/ mirror the
+SQLite ones, so a missing index usually shows up here first.
+
+Usage:
+    python benchmarks/query_plans.py [--size 5000] [--verbose]
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import sys
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from run_benchmarks import seed  # noqa: E402
+from storage import DEFAULT_HOUSEHOLD_ID, SQLiteBackend  # noqa: E402
+
+CHECKED_TABLES = ("cleaning_tasks", "task_completions", "task_tombstones")
+FULL_SCAN = re.compile(r"^SCAN (\w+)")
+STATEMENT = re.compile(r"^\s*(SELECT|UPDATE|DELETE|INSERT|WITH)\b", re.IGNORECASE)
+# A statement ending in LIMIT n is a page (subqueries such as the next ring member are not)
+PAGED = re.compile(r"\bLIMIT\s+\d+\s*$", re.IGNORECASE)
+EQUALS = re.compile(r"\b(\w+) = ")
+SEARCH = re.compile(r"^SEARCH (\w+) USING .*\((.*)\)$")
+
+
+def queries() -> Dict[str, Callable[[SQLiteBackend], object]]:
+    """Query name -> call issuing it, covering every filter the app uses"""
+    household = DEFAULT_HOUSEHOLD_ID
+    today = date.today()
+    return {
+        "select_tasks": lambda db: db.select_tasks(household),
+        "select_tasks_page": lambda db: db.select_tasks_page(household, page_size=25),
+        "select_tasks_page after": lambda db: db.select_tasks_page(household, page_size=25,
+                                                                   after=("2026-01-01T01:00:00", 100)),
+        "select_tasks_page person": lambda db: db.select_tasks_page(household, {"assigned_to": "Fernand"}),
+        "select_tasks_page status": lambda db: db.select_tasks_page(household, {"status": "pending"}),
+        "select_tasks_page room": lambda db: db.select_tasks_page(household, {"room": "Kitchen"}),
+        "select_tasks_page person+status": lambda db: db.select_tasks_page(
+            household, {"assigned_to": "Fernand", "status": "pending"}),
+        "select_full_tasks_page completed": lambda db: db.select_full_tasks_page(household, {"status": "completed"}),
+        "count_tasks": lambda db: db.count_tasks(household),
+        "count_tasks person": lambda db: db.count_tasks(household, {"assigned_to": "Fernand"}),
+        "count_tasks status": lambda db: db.count_tasks(household, {"status": "pending"}),
+        "count_tasks room": lambda db: db.count_tasks(household, {"room": "Kitchen"}),
+        "get_task": lambda db: db.get_task(household, 1),
+        "select_notes status": lambda db: db.select_notes(household, {"status": "pending"}),
+        "select_notes ids": lambda db: db.select_notes(household, task_ids=list(range(1, 26))),
+        "select_due": lambda db: db.select_due(household, (today + timedelta(days=7)).isoformat()),
+        "select_completions": lambda db: db.select_completions(household, (today - timedelta(days=7)).isoformat()),
+        "select_completions person": lambda db: db.select_completions(
+            household, (today - timedelta(days=30)).isoformat(), today.isoformat(), "Fernand"),
+        "select_changes": lambda db: db.select_changes(household, "2026-06-01T00:00:00"),
+        "task_stats": lambda db: db.task_stats(household, today.isoformat()),
+        "schedule_tasks": lambda db: db.schedule_tasks(household),
+        "update_task": lambda db: db.update_task(household, 1, {"description": "checked"}, version=1),
+        "update_tasks": lambda db: db.update_tasks(household, [5, 6, 7], {"room": "Office"}),
+        "complete_and_rotate": lambda db: db.complete_and_rotate(household, [2, 3], [1, 1]),
+        "delete_task": lambda db: db.delete_task(household, 4),
+        "enabled_notification_settings": lambda db: db.enabled_notification_settings(),
+        "get_load_scores": lambda db: db.get_load_scores(household),
+        "select_old_completions": lambda db: db.select_old_completions(household, "2025-01-01", 500),
+        "select_old_completions after": lambda db: db.select_old_completions(household, "2025-01-01", 500,
+                                                                             after=("2024-06-01T10:00:00", 40)),
+        "archive_completions": lambda db: db.archive_completions(household, [1, 2, 3]),
+        "select_completion_rollups": lambda db: db.select_completion_rollups(household),
+        "delete_tasks": lambda db: db.delete_tasks(household, [8, 9]),
+        "prune_tombstones": lambda db: db.prune_tombstones(household, "2025-01-01"),
+    }
+
+
+def traced(backend: SQLiteBackend, call: Callable) -> List[str]:
+    """The statements (with their parameters inlined) that ``call`` runs"""
+    statements = []
+    backend.conn.set_trace_callback(statements.append)
+    try:
+        call(backend)
+    finally:
+        backend.conn.set_trace_callback(None)
+    # Trigger programs report their statement again; each statement is checked once
+    return list(dict.fromkeys(statement for statement in statements if STATEMENT.match(statement)))
+
+
+def problems(conn: sqlite3.Connection, sql: str) -> Tuple[List[str], List[str]]:
+    """(plan lines, problems found in them) for one statement"""
+    plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+    found = []
+    for line in plan:
+        scan = FULL_SCAN.match(line)
+        if scan and scan.group(1) in CHECKED_TABLES and " USING " not in line:
+            found.append(f"full scan: {line}")
+        if "USE TEMP B-TREE FOR" in line and "ORDER BY" in line and PAGED.search(sql):
+            found.append(f"sorts a page: {line}")
+        search = SEARCH.match(line)
+        if search and search.group(1) in CHECKED_TABLES and PAGED.search(sql):
+            where, _, order = sql.partition(" ORDER BY ")
+            # Equalities on the sort columns are the keyset cursor, not filters
+            filters = set(EQUALS.findall(where)) - {"household_id"} - set(re.findall(r"\w+", order))
+            if filters and not any(f"{column}=?" in search.group(2) for column in filters):
+                found.append(f"filters a page row by row ({', '.join(sorted(filters))}): {line}")
+    return plan, found
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", type=int, default=5000, help="tasks per household")
+    parser.add_argument("--verbose", action="store_true", help="print every plan")
+    args = parser.parse_args(argv)
+
+    backend = SQLiteBackend(":memory:")
+    seed(backend, args.size)
+    seed(backend, args.size, backend.save_household(None, "Other household", ["Fernand", "Yvonne"])["id"])
+    with backend.lock:
+        backend.conn.execute("ANALYZE")
+
+    failures = []
+    print(f"\n🔎 Query plans ({args.size} tasks per household)")
+    for name, call in queries().items():
+        found_any = False
+        for sql in traced(backend, call):
+            plan, found = problems(backend.conn, sql)
+            found_any = found_any or bool(found)
+            failures += [f"{name}: {problem}" for problem in found]
+            if args.verbose or found:
+                print(f"  {name}: {' '.join(sql.split())[:120]}")
+                for line in plan:
+                    print(f"      {line}")
+        print(f"  {'❌' if found_any else '✅'} {name}")
+
+    if failures:
+        print("\n❌ QUERY PLAN CHECKS FAILED")
+        for failure in failures:
+            print(f"  • {failure}")
+        return 1
+    print("\n✅ Every query is served by an index")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Latency / round-trip benchmarks for CleaningTaskManager and the app pages.
+
+Every operation runs against the in-process fake PostgREST (with injectable
+latency) seeded with 10, 1k and 100k tasks, and reports wall time, request
+count and bytes transferred. Results are compared with baselines.json:
+more requests than the baseline, 25% more bytes, or more than twice the
+wall time (plus 50 ms of slack) is a regression and the run exits 1.
+Baselines are recorded with the default 5 ms latency; compare like with like.
+
+Usage:
+    python benchmarks/run_benchmarks.py                  # compare with baselines
+    python benchmarks/run_benchmarks.py --update         # record new baselines
+    python benchmarks/run_benchmarks.py --sizes 10 1000 --latency-ms 20
+    python benchmarks/run_benchmarks.py --sizes 1000 --households 100   # other tenants must not slow household 1
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_postgrest import FakePostgREST  # noqa: E402
+from storage import DEFAULT_HOUSEHOLD_ID, SQLiteBackend, SupabaseBackend  # noqa: E402
+
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+DEFAULT_SIZES = [10, 1000, 100000]
+# Rendering every pending task as widgets makes bigger page runs take minutes
+PAGE_BENCH_MAX_TASKS = 1000
+
+PEOPLE = ["Fernand", "Yvonne"]
+ROOMS = ["Living Room", "Kitchen", "Bedroom", "Bathroom", "Dining Room",
+         "Office", "Laundry Room", "Garage", "Garden", "Other"]
+FREQUENCIES = ["Daily", "Weekly", "Bi-weekly", "Monthly", "As needed"]
+PAGES = ["📋 This Week", "✅ Manage Tasks", "📊 Statistics", "⚙️ Settings"]
+
+BYTES_TOLERANCE = 1.25
+WALL_TOLERANCE = 2.0
+WALL_SLACK_MS = 50
+
+
+def seed(backend: SQLiteBackend, size: int, household_id: int = DEFAULT_HOUSEHOLD_ID):
+    """Give a household ``size`` tasks and one completion per task"""
+    with backend.lock:
+        first_id = backend.conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM cleaning_tasks").fetchone()[0]
+    start = datetime(2026, 1, 1)
+    # Completions run backwards from now so recent-history queries find some
+    now = datetime.now()
+    rows = [{
+        "task_name": f"Task {i}",
+        "assigned_to": PEOPLE[i % len(PEOPLE)],
+        "room": ROOMS[i % len(ROOMS)],
+        "frequency": FREQUENCIES[i % len(FREQUENCIES)],
+        "description": "Benchmark task with a realistic sentence of notes attached to it",
+        "status": "pending",
+        "due_date": (start + timedelta(days=i % 365)).date().isoformat(),
+        "created_at": (start + timedelta(seconds=i)).isoformat(),
+    } for i in range(size)]
+    for offset in range(0, size, 10000):
+        backend.insert_tasks(household_id, rows[offset:offset + 10000])
+    with backend.lock:
+        backend.conn.executemany(
+            "INSERT INTO task_completions (household_id, task_id, completed_by, completed_at) VALUES (?, ?, ?, ?)",
+            [(household_id, first_id + i, PEOPLE[i % len(PEOPLE)], (now - timedelta(minutes=7 * i)).isoformat())
+             for i in range(size)])
+
+
+def manager_operations() -> Dict[str, Callable]:
+    """Operation name -> function(manager); each runs on a fresh (cold) manager"""
+    def warm(method):
+        def run(manager):
+            method(manager)
+            return lambda: method(manager)
+        return run
+
+    return {
+        "get_all_tasks": lambda m: m.get_all_tasks,
+        "get_all_tasks_warm": warm(lambda m: m.get_all_tasks()),
+        "get_pending_tasks": lambda m: m.get_pending_tasks,
+        "get_tasks_page": lambda m: lambda: m.get_tasks_page(person="Fernand", page_size=25),
+        "count_tasks": lambda m: lambda: m.count_tasks(status="pending"),
+        "get_task_stats": lambda m: m.get_task_stats,
+        "get_completions_7_days": lambda m: lambda: m.get_completion_history(date.today() - timedelta(days=7)),
+        "create_task": lambda m: lambda: m.create_task("Benchmark", "Fernand", "Kitchen", "Weekly"),
+        "complete_and_rotate_task": lambda m: lambda: m.complete_and_rotate_task(1),
+        "complete_and_rotate_tasks_10": lambda m: lambda: m.complete_and_rotate_tasks(list(range(1, 11))),
+    }
+
+
+def measure(fake: FakePostgREST, run: Callable) -> Dict:
+    fake.reset_counters()
+    started = time.perf_counter()
+    run()
+    wall_ms = (time.perf_counter() - started) * 1000
+    return {"wall_ms": round(wall_ms, 2), "requests": fake.requests, "bytes": fake.bytes}
+
+
+def run_size(size: int, latency: float, pages: bool, households: int = 1) -> Dict[str, Dict]:
+    from supabase import create_client
+    from task_manager import CleaningTaskManager
+
+    backend = SQLiteBackend(":memory:")
+    seed(backend, size)
+    # Other households of the same size; the measured household's cost must not depend on them
+    for _ in range(households - 1):
+        seed(backend, size, backend.save_household(None, "Other household", PEOPLE)["id"])
+    fake = FakePostgREST(backend, latency=latency).start()
+    results = {}
+    try:
+        for name, prepare in manager_operations().items():
+            manager = CleaningTaskManager(SupabaseBackend(create_client(fake.url, "benchmark-key")))
+            results[name] = measure(fake, prepare(manager))
+
+        if pages:
+            results.update(run_pages(fake))
+    finally:
+        fake.stop()
+    return results
+
+
+def run_pages(fake: FakePostgREST) -> Dict[str, Dict]:
+    """Render each app page once with a cold task manager"""
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    os.environ.update({"STORAGE_BACKEND": "supabase", "SUPABASE_URL": fake.url,
+                       "SUPABASE_KEY": "benchmark-key", "DATA_LAYER": "sync"})
+    results = {}
+    for page in PAGES:
+        st.cache_resource.clear()
+        app = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=600)
+        app.session_state["page"] = page
+        result = measure(fake, app.run)
+        if app.exception:
+            raise RuntimeError(f"{page} raised: {app.exception[0].value}")
+        results["page " + page.split(" ", 1)[1]] = result
+    return results
+
+
+def compare(results: Dict[str, Dict[str, Dict]], baselines: Dict) -> List[str]:
+    regressions = []
+    for size, operations in results.items():
+        for name, result in operations.items():
+            baseline = baselines.get(size, {}).get(name)
+            if not baseline:
+                continue
+            if result["requests"] > baseline["requests"]:
+                regressions.append(f"{size} tasks / {name}: {result['requests']} requests "
+                                   f"(baseline {baseline['requests']})")
+            if result["bytes"] > baseline["bytes"] * BYTES_TOLERANCE + 1024:
+                regressions.append(f"{size} tasks / {name}: {result['bytes']} bytes "
+                                   f"(baseline {baseline['bytes']})")
+            if result["wall_ms"] > baseline["wall_ms"] * WALL_TOLERANCE + WALL_SLACK_MS:
+                regressions.append(f"{size} tasks / {name}: {result['wall_ms']:.1f} ms "
+                                   f"(baseline {baseline['wall_ms']:.1f} ms)")
+    return regressions
+
+
+def print_table(size: str, operations: Dict[str, Dict]):
+    print(f"\n📊 {size} tasks")
+    print(f"  {'operation':<32}{'wall ms':>12}{'requests':>10}{'bytes':>14}")
+    for name, result in operations.items():
+        print(f"  {name:<32}{result['wall_ms']:>12.1f}{result['requests']:>10}{result['bytes']:>14,}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="added to every fake PostgREST request")
+    parser.add_argument("--no-pages", action="store_true", help="skip the Streamlit AppTest page renders")
+    parser.add_argument("--households", type=int, default=1,
+                        help="seed this many households of each size; household 1 is measured")
+    parser.add_argument("--update", action="store_true", help="write the results to baselines.json")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for size in args.sizes:
+        results[str(size)] = run_size(size, args.latency_ms / 1000,
+                                      pages=not args.no_pages and size <= PAGE_BENCH_MAX_TASKS,
+                                      households=args.households)
+        print_table(str(size), results[str(size)])
+
+    baselines = {}
+    if os.path.exists(BASELINES):
+        with open(BASELINES) as f:
+            baselines = json.load(f)
+
+    if args.update:
+        for size, operations in results.items():
+            baselines.setdefault(size, {}).update(operations)
+        with open(BASELINES, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\n💾 Baselines written to {BASELINES}")
+        return 0
+
+    regressions = compare(results, baselines)
+    if regressions:
+        print("\n❌ PERFORMANCE REGRESSIONS")
+        for regression in regressions:
+            print(f"  • {regression}")
+        return 1
+    print("\n✅ No regressions against baselines")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the data layer and app.py.
+
+Each measurement runs in a fresh interpreter:
+
+* import time of the data layer modules, from ``python -X importtime``,
+  plus a check that importing them loads none of the UI/heavy packages;
+* time to first render of the default page ("This Week") through
+  Streamlit's AppTest, on a local SQLite database, plus a check that the
+  page did not pull in plotly.express or pandas. The database is seeded
+  below the grid-view threshold, since st.data_editor needs pandas.
+
+The median of ``--runs`` runs is compared with a budget and the run exits 1
+when a budget is exceeded or a forbidden module was loaded.
+
+Usage:
+    python benchmarks/startup_benchmark.py [--runs 5] [--import-budget-ms 150] [--render-budget-ms 800]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Modules the data layer must import without, and how long it may take
+DATA_LAYER_MODULES = ["task_manager", "async_task_manager", "data_io"]
+DATA_LAYER_FORBIDDEN = ["streamlit", "pandas", "plotly", "pyarrow"]
+IMPORT_BUDGET_MS = 150
+# The default page renders without plotly.express or pandas (streamlit itself loads bare plotly)
+FIRST_PAGE_FORBIDDEN = ["plotly.express", "pandas"]
+RENDER_BUDGET_MS = 800
+
+RENDER_SCRIPT = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+started = time.perf_counter()
+app = AppTest.from_file(sys.argv[1], default_timeout=120).run()
+elapsed = time.perf_counter() - started
+print(json.dumps({"ms": elapsed * 1000, "exception": [str(e.value) for e in app.exception],
+                  "loaded": sorted(m for m in sys.argv[2:] if m in sys.modules)}))
+"""
+
+
+def import_time(module: str, env: Dict[str, str]) -> Tuple[float, List[str]]:
+    """Cumulative import time of ``module`` in ms and the forbidden modules it loaded"""
+    code = (f"import sys, json, {module}; "
+            f"print(json.dumps(sorted(m for m in {DATA_LAYER_FORBIDDEN!r} if m in sys.modules)))")
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    cumulative_us = 0
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        parts = [part.strip() for part in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            cumulative_us = int(parts[1])
+    return cumulative_us / 1000, json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def first_render(env: Dict[str, str]) -> Dict:
+    """Wall time of the first AppTest run of app.py in a fresh interpreter"""
+    result = subprocess.run([sys.executable, "-c", RENDER_SCRIPT, os.path.join(ROOT, "app.py")]
+                            + FIRST_PAGE_FORBIDDEN, cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def seed_database(path: str, size: int = 20):
+    from storage import DEFAULT_HOUSEHOLD_ID, SQLiteBackend
+
+    people, rooms = ["Fernand", "Yvonne"], ["Kitchen", "Bathroom", "Living Room", "Bedroom"]
+    SQLiteBackend(path).insert_tasks(DEFAULT_HOUSEHOLD_ID, [{
+        "task_name": f"Task {i}", "assigned_to": people[i % 2], "room": rooms[i % len(rooms)],
+        "frequency": "Weekly", "description": "", "status": "pending", "due_date": None,
+        "created_at": f"2026-01-01T00:00:{i % 60:02d}",
+    } for i in range(size)])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--import-budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--render-budget-ms", type=float, default=RENDER_BUDGET_MS)
+    args = parser.parse_args(argv)
+
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        database = os.path.join(directory, "startup.db")
+        seed_database(database)
+        env = dict(os.environ, STORAGE_BACKEND="sqlite", SQLITE_PATH=database, DATA_LAYER="sync",
+                   PYTHONDONTWRITEBYTECODE="1")
+
+        print(f"\n🚀 Data layer imports (median of {args.runs}, budget {args.import_budget_ms:.0f} ms)")
+        for module in DATA_LAYER_MODULES:
+            runs = [import_time(module, env) for _ in range(args.runs)]
+            median = statistics.median(ms for ms, _ in runs)
+            loaded = runs[-1][1]
+            print(f"  {module:<24}{median:>10.1f} ms   {'loads ' + ', '.join(loaded) if loaded else ''}")
+            if median > args.import_budget_ms:
+                failures.append(f"import {module}: {median:.1f} ms > {args.import_budget_ms:.0f} ms")
+            if loaded:
+                failures.append(f"import {module} loads {', '.join(loaded)}")
+
+        print(f"\n🖥️  Time to first render of app.py (median of {args.runs}, budget {args.render_budget_ms:.0f} ms)")
+        renders = [first_render(env) for _ in range(args.runs)]
+        median = statistics.median(render["ms"] for render in renders)
+        loaded = renders[-1]["loaded"]
+        print(f"  {'📋 This Week':<24}{median:>10.1f} ms   {'loads ' + ', '.join(loaded) if loaded else ''}")
+        if renders[-1]["exception"]:
+            failures.append(f"first render raised: {renders[-1]['exception'][0]}")
+        if median > args.render_budget_ms:
+            failures.append(f"first render: {median:.1f} ms > {args.render_budget_ms:.0f} ms")
+        if loaded:
+            failures.append(f"first render loads {', '.join(loaded)}")
+
+    if failures:
+        print("\n❌ STARTUP BUDGET EXCEEDED")
+        for failure in failures:
+            print(f"  • {failure}")
+        return 1
+    print("\n✅ Startup within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
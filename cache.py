@@ -0,0 +1,127 @@
+"""
+Small in-process TTL cache used by CleaningTaskManager for read queries.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from models import Task
+from storage import list_row
+
+# Key of the full task list, the one entry writes patch instead of dropping
+ALL_TASKS_KEY = ("all",)
+# Key of the household and its rotation ring, which task writes leave alone
+HOUSEHOLD_KEY = ("household",)
+# Key of the members' load scores, which only completions change (and patch)
+LOAD_KEY = ("load",)
+
+
+class TTLCache:
+    """Size-bounded LRU cache whose entries expire after ``ttl`` seconds"""
+
+    def __init__(self, ttl: float = 30.0, max_entries: int = 64, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value or None, counting the hit or miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self.clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entry when full"""
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Return the cached value, calling ``loader`` on a miss"""
+        value = self.get(key)
+        if value is None:
+            value = loader()
+            self.set(key, value)
+        return value
+
+    async def get_or_load_async(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Return the cached value, awaiting ``loader()`` on a miss"""
+        value = self.get(key)
+        if value is None:
+            value = await loader()
+            self.set(key, value)
+        return value
+
+    def patch(self, key: Hashable, update: Callable[[Any], Any]) -> bool:
+        """Rewrite a live entry in place without touching its expiry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= self.clock():
+                return False
+            self._entries[key] = (entry[0], update(entry[1]))
+            return True
+
+    def invalidate(self, predicate: Optional[Callable[[Hashable], bool]] = None) -> None:
+        """Drop every entry, or only the entries whose key matches ``predicate``"""
+        with self._lock:
+            if predicate is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if predicate(key)]:
+                del self._entries[key]
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters for the settings page"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+            }
+
+
+class TaskCache(TTLCache):
+    """TTLCache that knows how to patch the cached full task list (of Tasks) after written rows"""
+
+    @staticmethod
+    def _is_view(key: Hashable) -> bool:
+        return key not in (ALL_TASKS_KEY, HOUSEHOLD_KEY, LOAD_KEY)
+
+    def apply_write(self, task_id: Optional[int], row: Optional[Dict], created: bool = False) -> None:
+        """Patch the cached full task list after a write and drop the filtered views"""
+        self.invalidate(self._is_view)
+        if created and row and "id" in row:
+            # Newest task goes first, matching the created_at DESC ordering
+            self.patch(ALL_TASKS_KEY, lambda tasks: [Task.from_row(list_row(row))] + tasks)
+        elif not created and row:
+            written = Task.from_row(list_row(row))
+            self.patch(ALL_TASKS_KEY, lambda tasks: [written if task.id == task_id else task for task in tasks])
+        elif not created and row is None:
+            self.patch(ALL_TASKS_KEY, lambda tasks: [task for task in tasks if task.id != task_id])
+        else:
+            self.invalidate()
+
+    def apply_rows(self, rows: List[Dict]) -> None:
+        """Patch several updated rows into the cached full task list"""
+        self.invalidate(self._is_view)
+        updated = {row['id']: Task.from_row(list_row(row)) for row in rows}
+        self.patch(ALL_TASKS_KEY, lambda tasks: [updated.get(task.id, task) for task in tasks])
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Command line access to the tasks, without Streamlit.
+
+Runs on AsyncCleaningTaskManager like the HTTP API (api.py), straight
+against the configured database, so cron jobs and scripts can list, rotate,
+edit and export tasks. Errors go to stderr with exit status 1.
+
+Usage:
+    python cli.py list [--person P] [--status S] [--room R] [--limit 25] [--after CURSOR] [--json]
+    python cli.py rotate ID [ID ...] [--version N]
+    python cli.py edit ID [ID ...] --set field=value [--set field=value ...] [--version N]
+    python cli.py edit --person P [--status S] [--room R] --set field=value    # every matching task
+    python cli.py export [--format csv|jsonl] [--output PATH]
+Every command takes --household ID (default: HOUSEHOLD_ID).
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from typing import Dict, List, Optional
+
+import data_io
+from api import decode_cursor, encode_cursor
+from async_task_manager import AsyncCleaningTaskManager
+from database import HOUSEHOLD_ID
+from errors import InvalidInput, TaskManagerError
+from models import Task
+
+
+def parse_assignments(assignments: List[str]) -> Dict[str, Optional[str]]:
+    """["room=Kitchen", "description="] -> {"room": "Kitchen", "description": None}"""
+    updates = {}
+    for assignment in assignments:
+        field, equals, value = assignment.partition("=")
+        if not equals:
+            raise InvalidInput(f"Expected field=value, not {assignment!r}")
+        updates[field.strip()] = value or None
+    return updates
+
+
+def describe(task: Task) -> str:
+    return (f"{task.id:>6}  {task.due_date or '-':<10}  {task.status:<9}  {task.assigned_to:<12}  "
+            f"{task.task_name} ({task.room}, {task.frequency})")
+
+
+async def list_tasks(manager: AsyncCleaningTaskManager, args) -> int:
+    tasks, cursor = await manager.get_tasks_page(args.person, args.status, args.room, page_size=args.limit,
+                                                 after=decode_cursor(args.after))
+    for task in tasks:
+        print(json.dumps(task.to_row()) if args.json else describe(task))
+    if cursor and not args.json:
+        print(f"More: --after '{encode_cursor(cursor)}'")
+    return 0
+
+
+async def rotate(manager: AsyncCleaningTaskManager, args) -> int:
+    if len(args.ids) == 1:
+        task = await manager.rotate_task(args.ids[0], args.version)
+        print(f"🔄 {task.task_name} is now {task.assigned_to}'s, due {task.due_date or 'whenever needed'}")
+        return 0
+    if args.version is not None:
+        raise InvalidInput("--version applies to a single task")
+    # Several tasks rotate in one atomic request
+    rotated = await manager.complete_and_rotate_tasks(args.ids)
+    print(f"🔄 Rotated {rotated} of {len(args.ids)} tasks")
+    return 0 if rotated == len(args.ids) else 1
+
+
+async def matching_ids(manager: AsyncCleaningTaskManager, person: Optional[str], status: Optional[str],
+                       room: Optional[str]) -> List[int]:
+    """Ids of every task matching the filters, read page by page"""
+    task_ids, after = [], None
+    while True:
+        tasks, after = await manager.get_tasks_page(person, status, room, page_size=500, after=after)
+        task_ids += [task.id for task in tasks]
+        if after is None:
+            return task_ids
+
+
+async def edit(manager: AsyncCleaningTaskManager, args) -> int:
+    updates = parse_assignments(args.set)
+    task_ids = args.ids
+    if args.version is not None:
+        if len(task_ids) != 1:
+            raise InvalidInput("--version applies to a single task")
+        print(describe(await manager.edit_task(task_ids[0], updates, args.version)))
+        print("✏️ Updated 1 task(s)")
+        return 0
+    if not task_ids:
+        if not (args.person or args.status or args.room):
+            raise InvalidInput("Name the tasks to edit by id or with --person/--status/--room")
+        task_ids = await matching_ids(manager, args.person, args.status, args.room)
+    tasks = await manager.update_tasks(task_ids, updates) if task_ids else []
+    for task in tasks:
+        print(describe(task))
+    print(f"✏️ Updated {len(tasks)} task(s)")
+    return 0 if len(tasks) == len(task_ids) else 1
+
+
+async def export(manager: AsyncCleaningTaskManager, args) -> int:
+    out = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+    count = 0
+    try:
+        out.write(data_io.format_rows([], args.format, header=True))
+        async for rows in manager.task_pages(args.page_size):
+            out.write(data_io.format_rows(rows, args.format))
+            count += len(rows)
+    finally:
+        if args.output:
+            out.close()
+    print(f"📤 Exported {count} tasks", file=sys.stderr)
+    return 0
+
+
+COMMANDS = {"list": list_tasks, "rotate": rotate, "edit": edit, "export": export}
+
+
+async def run(args) -> int:
+    # One-shot process: nothing to gain from caching
+    manager = await AsyncCleaningTaskManager.create(household_id=args.household or HOUSEHOLD_ID, cache_ttl=0)
+    return await COMMANDS[args.command](manager, args)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="List, rotate, edit and export cleaning tasks")
+    commands = parser.add_subparsers(dest="command", required=True)
+    list_parser = commands.add_parser("list", help="one page of tasks, newest first")
+    list_parser.add_argument("--limit", type=int, default=25)
+    list_parser.add_argument("--after", help="cursor printed by the previous page")
+    list_parser.add_argument("--json", action="store_true", help="one JSON row per line")
+    rotate_parser = commands.add_parser("rotate", help="mark tasks done and hand them to the next member")
+    rotate_parser.add_argument("ids", type=int, nargs="+")
+    rotate_parser.add_argument("--version", type=int, help="only rotate while the task is at this version")
+    edit_parser = commands.add_parser("edit", help="apply the same change to several tasks")
+    edit_parser.add_argument("ids", type=int, nargs="*")
+    edit_parser.add_argument("--set", action="append", required=True, metavar="FIELD=VALUE")
+    edit_parser.add_argument("--version", type=int, help="only edit while the task is at this version")
+    export_parser = commands.add_parser("export", help="stream every task as csv or jsonl")
+    export_parser.add_argument("--format", choices=("csv", "jsonl"), default="csv")
+    export_parser.add_argument("--output", help="file to write (default: stdout)")
+    export_parser.add_argument("--page-size", type=int, default=1000)
+    for command_parser in (list_parser, edit_parser):
+        command_parser.add_argument("--person")
+        command_parser.add_argument("--status")
+        command_parser.add_argument("--room")
+    for command_parser in commands.choices.values():
+        command_parser.add_argument("--household", type=int, help="household id (default: HOUSEHOLD_ID)")
+    args = parser.parse_args(argv)
+
+    try:
+        return asyncio.run(run(args))
+    except TaskManagerError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
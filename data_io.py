@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Streaming export and bulk import of cleaning tasks.
+
+Exports page through the table with the same keyset cursor as Manage Tasks,
+so memory stays bounded by the page size whatever the table size. Imports
+validate every row and insert them in batches of one request each.
+
+Usage:
+    python data_io.py export tasks.csv [--format csv|jsonl|parquet] [--page-size 1000] [--household ID]
+    python data_io.py import tasks.jsonl [--format ...] [--batch-size 500] [--household ID]
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+from datetime import date, datetime
+from typing import Callable, Dict, IO, Iterable, Iterator, List, Optional, Tuple
+
+from models import Status
+
+EXPORT_COLUMNS = ["id", "task_name", "assigned_to", "room", "frequency", "description",
+                  "status", "due_date", "created_at", "completed_at"]
+FORMATS = ("csv", "jsonl", "parquet")
+VALID_STATUSES = tuple(Status.values())
+
+# Column name -> max length, mirroring the VARCHAR sizes of cleaning_tasks
+REQUIRED_FIELDS = {"task_name": 255, "assigned_to": 50, "room": 100, "frequency": 50}
+
+# fetch_page(page_size, after) -> rows ordered by (created_at, id) DESC
+FetchPage = Callable[[int, Optional[Tuple[str, int]]], List[Dict]]
+# insert_batch(rows) -> number of rows inserted
+InsertBatch = Callable[[List[Dict]], int]
+
+
+class MalformedRow(ValueError):
+    """A source row that could not be parsed; read_rows yields it in place of the row"""
+
+
+class ImportReport:
+    """Outcome of a bulk import"""
+
+    def __init__(self):
+        self.inserted = 0
+        self.rejected: List[Tuple[int, str]] = []
+
+    def __repr__(self):
+        return f"ImportReport(inserted={self.inserted}, rejected={len(self.rejected)})"
+
+
+def format_for_path(path: str) -> str:
+    """Guess the file format from its extension"""
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    if extension == "json" or extension == "ndjson":
+        return "jsonl"
+    if extension in FORMATS:
+        return extension
+    raise ValueError(f"Cannot infer format from '{path}', pass one of {', '.join(FORMATS)}")
+
+
+def iter_task_pages(fetch_page: FetchPage, page_size: int = 1000) -> Iterator[List[Dict]]:
+    """Yield every task one keyset page at a time"""
+    after = None
+    while True:
+        rows = fetch_page(page_size, after)
+        if not rows:
+            return
+        yield rows
+        if len(rows) < page_size:
+            return
+        after = (rows[-1]['created_at'], rows[-1]['id'])
+
+
+def _parquet_schema():
+    import pyarrow as pa
+    return pa.schema([("id", pa.int64())] + [(column, pa.string()) for column in EXPORT_COLUMNS[1:]])
+
+
+def export_tasks(fetch_page: FetchPage, out: IO, fmt: str = "csv", page_size: int = 1000) -> int:
+    """Stream every task to ``out`` (text file for csv/jsonl, binary for parquet)"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+    count = 0
+    if fmt == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = _parquet_schema()
+        # One row group per page keeps memory bounded by page_size
+        with pq.ParquetWriter(out, schema) as writer:
+            for rows in iter_task_pages(fetch_page, page_size):
+                writer.write_table(pa.Table.from_pylist(
+                    [{column: row.get(column) for column in EXPORT_COLUMNS} for row in rows], schema=schema))
+                count += len(rows)
+        return count
+
+    out.write(format_rows([], fmt, header=True))
+    for rows in iter_task_pages(fetch_page, page_size):
+        out.write(format_rows(rows, fmt))
+        count += len(rows)
+    return count
+
+
+def format_rows(rows: List[Dict], fmt: str, header: bool = False) -> str:
+    """Rows as csv or jsonl text; with ``header``, csv starts with the column names"""
+    if fmt == "jsonl":
+        return "".join(json.dumps({column: row.get(column) for column in EXPORT_COLUMNS}) + "\n" for row in rows)
+    text = io.StringIO(newline="")
+    writer = csv.DictWriter(text, fieldnames=EXPORT_COLUMNS, extrasaction="ignore")
+    if header:
+        writer.writeheader()
+    writer.writerows(rows)
+    return text.getvalue()
+
+
+def read_rows(source, fmt: str, batch_size: int = 1000) -> Iterator[Dict]:
+    """Yield raw rows from a csv/jsonl text stream or a parquet file path/binary stream
+
+    A row that cannot be parsed comes out as a MalformedRow, so one bad
+    line is rejected on its own instead of ending the import half-way.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(source)
+        while True:
+            try:
+                yield next(reader)
+            except StopIteration:
+                return
+            except csv.Error as e:
+                yield MalformedRow(f"not valid CSV: {e}")
+    elif fmt == "jsonl":
+        for line in source:
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError as e:
+                    yield MalformedRow(f"not valid JSON: {e}")
+    elif fmt == "parquet":
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=batch_size):
+            yield from batch.to_pylist()
+    else:
+        raise ValueError(f"Unknown import format: {fmt}")
+
+
+def _optional(value) -> Optional[str]:
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def validate_row(row: Dict) -> Dict:
+    """Return a cleaned task row ready for insertion, or raise ValueError"""
+    if isinstance(row, MalformedRow):
+        raise row
+    if not isinstance(row, dict):
+        raise ValueError(f"expected an object with the task's fields, not {type(row).__name__}")
+    task = {}
+    for column, max_length in REQUIRED_FIELDS.items():
+        value = _optional(row.get(column))
+        if not value:
+            raise ValueError(f"{column} is required")
+        if len(value) > max_length:
+            raise ValueError(f"{column} is longer than {max_length} characters")
+        task[column] = value
+
+    task["description"] = _optional(row.get("description")) or ""
+    task["status"] = _optional(row.get("status")) or "pending"
+    if task["status"] not in VALID_STATUSES:
+        raise ValueError(f"status must be one of {', '.join(VALID_STATUSES)}")
+
+    due_date = _optional(row.get("due_date"))
+    task["due_date"] = date.fromisoformat(due_date[:10]).isoformat() if due_date else None
+    for column in ("created_at", "completed_at"):
+        value = _optional(row.get(column))
+        task[column] = datetime.fromisoformat(value).isoformat() if value else None
+    if not task["created_at"]:
+        task["created_at"] = datetime.now().isoformat()
+    return task
+
+
+def import_tasks(insert_batch: InsertBatch, rows: Iterable[Dict], batch_size: int = 500) -> ImportReport:
+    """Validate rows and insert the valid ones in batches; ids in the source are ignored"""
+    report = ImportReport()
+    batch: List[Dict] = []
+    for line, row in enumerate(rows, start=1):
+        try:
+            batch.append(validate_row(row))
+        except ValueError as e:
+            report.rejected.append((line, str(e)))
+            continue
+        if len(batch) >= batch_size:
+            report.inserted += insert_batch(batch)
+            batch = []
+    if batch:
+        report.inserted += insert_batch(batch)
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Export or import cleaning tasks")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="stream every task to a file")
+    export_parser.add_argument("path")
+    export_parser.add_argument("--format", choices=FORMATS)
+    export_parser.add_argument("--page-size", type=int, default=1000)
+    import_parser = commands.add_parser("import", help="validate and bulk insert tasks from a file")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--format", choices=FORMATS)
+    import_parser.add_argument("--batch-size", type=int, default=500)
+    for command_parser in (export_parser, import_parser):
+        command_parser.add_argument("--household", type=int, help="household id (default: HOUSEHOLD_ID)")
+    args = parser.parse_args(argv)
+
+    from database import HOUSEHOLD_ID
+    from task_manager import CleaningTaskManager
+
+    # Writes go straight to the backend: a one-shot command must not leave them queued in the journal
+    manager = CleaningTaskManager(household_id=args.household or HOUSEHOLD_ID, journal_path=None)
+    fmt = args.format or format_for_path(args.path)
+    mode = "b" if fmt == "parquet" else ""
+
+    if args.command == "export":
+        with open(args.path, "w" + mode, **({} if mode else {"newline": "", "encoding": "utf-8"})) as out:
+            count = manager.export_tasks(out, fmt, args.page_size)
+        print(f"📤 Exported {count} tasks to {args.path}")
+        return 0
+
+    with open(args.path, "r" + mode, **({} if mode else {"newline": "", "encoding": "utf-8"})) as source:
+        report = manager.import_tasks(read_rows(source, fmt), args.batch_size)
+    print(f"📥 Imported {report.inserted} tasks from {args.path}")
+    for line, error in report.rejected[:20]:
+        print(f"  ❌ row {line}: {error}")
+    if len(report.rejected) > 20:
+        print(f"  ... and {len(report.rejected) - 20} more rejected rows")
+    return 1 if report.rejected else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,56 @@
-from supabase import create_client, Client
 import os
 from dotenv import load_dotenv
+from storage import StorageBackend, SupabaseBackend, SQLiteBackend, AsyncSupabaseBackend, ThreadedBackend, DEFAULT_HOUSEHOLD_ID
+from metrics import METRICS
 
 # Load environment variables
 load_dotenv()
 
+# Household served when the app URL does not name one (?household=<id>)
+HOUSEHOLD_ID = int(os.getenv("HOUSEHOLD_ID", str(DEFAULT_HOUSEHOLD_ID)))
+
+# Read-through cache for task queries (seconds / number of cached queries)
+CACHE_TTL_SECONDS = float(os.getenv("TASK_CACHE_TTL", "30"))
+CACHE_MAX_ENTRIES = int(os.getenv("TASK_CACHE_SIZE", "64"))
+# Minimum seconds between incremental syncs of the local task replica
+SYNC_INTERVAL_SECONDS = float(os.getenv("SYNC_INTERVAL", "2"))
+# Optional local file that writes are queued in and flushed from in the background (off by default)
+JOURNAL_PATH = os.getenv("WRITE_JOURNAL") or None
+# Seconds the flusher waits after a write so that a burst of clicks goes out as one batch
+JOURNAL_FLUSH_INTERVAL_SECONDS = float(os.getenv("JOURNAL_FLUSH_INTERVAL", "0.5"))
+
+# "sync" (default) or "async": the async layer issues independent queries concurrently
+DATA_LAYER = os.getenv("DATA_LAYER", "sync").strip().lower()
+# Keep-alive connections shared by all async requests
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+
+# Digests of overdue and due-soon tasks (digest.py): sent through SMTP_HOST, or logged when it is unset
+SMTP_HOST = os.getenv("SMTP_HOST") or None
+SMTP_PORT = int(os.getenv("SMTP_PORT", "25"))
+SMTP_USERNAME = os.getenv("SMTP_USERNAME") or None
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD") or None
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "").strip().lower() in ("1", "true", "yes")
+DIGEST_SENDER = os.getenv("DIGEST_SENDER", "mymental@localhost")
+# Hour of the day (local time) from which the day's digests go out
+DIGEST_HOUR = int(os.getenv("DIGEST_HOUR", "8"))
+# Tasks due within this many days (today included) are listed as due soon
+DIGEST_DUE_SOON_DAYS = int(os.getenv("DIGEST_DUE_SOON_DAYS", "2"))
+# Seconds between two checks of the digest worker
+DIGEST_INTERVAL_SECONDS = float(os.getenv("DIGEST_INTERVAL", "300"))
+
+# Retention (retention.py): completions older than this many days move to archive files under
+# ARCHIVE_DIR ("parquet", or "jsonl" when pyarrow is not installed), ARCHIVE_BATCH_SIZE rows per request
+RETENTION_DAYS = int(os.getenv("RETENTION_DAYS", "400"))
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "archive")
+ARCHIVE_FORMAT = os.getenv("ARCHIVE_FORMAT") or None
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+
+# Bearer token the HTTP API (api.py) requires when set
+API_TOKEN = os.getenv("API_TOKEN") or None
+
+# Optional path that query metrics are periodically written to in Prometheus text format
+METRICS.textfile = os.getenv("METRICS_TEXTFILE") or None
+
 class SupabaseClient:
     def __init__(self):
         self.url = os.getenv("SUPABASE_URL")
@@ -13,8 +59,41 @@ class SupabaseClient:
         if not self.url or not self.key:
             raise ValueError("Supabase URL and KEY must be set in environment variables")
         
-        # Create client with latest version
-        self.supabase: Client = create_client(self.url, self.key)
+        # The Supabase SDK is only loaded when it is the configured backend
+        from supabase import create_client
+        self.supabase = create_client(self.url, self.key)
     
     def get_client(self):
-        return self.supabase
\ No newline at end of file
+        return self.supabase
+
+def get_storage_backend() -> StorageBackend:
+    """Build the storage backend selected by STORAGE_BACKEND (supabase or sqlite)"""
+    backend = os.getenv("STORAGE_BACKEND", "supabase").strip().lower()
+    
+    if backend == "supabase":
+        return SupabaseBackend(SupabaseClient().get_client())
+    if backend == "sqlite":
+        return SQLiteBackend(os.getenv("SQLITE_PATH", "mymental.db"))
+    
+    raise ValueError(f"Unknown STORAGE_BACKEND '{backend}' (expected 'supabase' or 'sqlite')")
+
+async def get_async_storage_backend():
+    """Async counterpart of get_storage_backend, on one pooled keep-alive HTTP client"""
+    backend = os.getenv("STORAGE_BACKEND", "supabase").strip().lower()
+    
+    if backend == "supabase":
+        url = os.getenv("SUPABASE_URL")
+        key = os.getenv("SUPABASE_KEY")
+        if not url or not key:
+            raise ValueError("Supabase URL and KEY must be set in environment variables")
+        import httpx
+        from supabase import acreate_client, AsyncClientOptions
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=HTTP_POOL_SIZE, max_keepalive_connections=HTTP_POOL_SIZE),
+            timeout=30,
+        )
+        client = await acreate_client(url, key, options=AsyncClientOptions(httpx_client=http_client))
+        return AsyncSupabaseBackend(client)
+    
+    # Local engines are fast and synchronous; run their calls off the event loop
+    return ThreadedBackend(get_storage_backend())
@@ -0,0 +1,286 @@
+"""
+Overdue alerts and daily digests of due tasks, sent in the background.
+
+A DigestWorker wakes up every DIGEST_INTERVAL seconds, from DIGEST_HOUR on.
+Each cycle reads the households that have alerts or digests switched on
+(one query) and, for each one with something left to send today, its
+pending tasks due by the end of the due-soon window (one query on the
+due-date index, so the cost follows the number of tasks due, not the size
+of the table). The tasks are indexed per person by due date and every
+recipient gets one message: the daily digest (overdue and due soon) or,
+with alerts only, the tasks that became overdue since the last alert. A
+household's messages go out through the transport as one batch. Each
+recipient is recorded in the settings as soon as their message went out,
+and the household once the whole batch did, so neither a restart nor a
+batch that failed half way skips or repeats a message.
+
+Transports: SMTPTransport, for any SMTP server (a local stand-in such as
+``python -m aiosmtpd -n -l localhost:8025`` works for trying it out), and
+LogTransport, used when SMTP_HOST is unset.
+
+Usage:
+    python digest.py run [--once] [--interval SECONDS]
+    python digest.py preview     # print today's digests without sending or recording them
+"""
+
+import argparse
+import logging
+import sys
+import threading
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from database import (get_storage_backend, SMTP_HOST, SMTP_PORT, SMTP_USERNAME, SMTP_PASSWORD, SMTP_STARTTLS,
+                      DIGEST_SENDER, DIGEST_HOUR, DIGEST_DUE_SOON_DAYS, DIGEST_INTERVAL_SECONDS)
+from models import Task, decode_rows
+from storage import StorageBackend
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Message:
+    to: str
+    subject: str
+    body: str
+    # Member the message is for, whose mark is set once it went out
+    person: str = ""
+
+
+def _ignore(message: Message) -> None:
+    pass
+
+
+class Transport:
+    """Delivers a batch of messages"""
+
+    def send(self, messages: List[Message], delivered: Callable[[Message], None] = _ignore) -> None:
+        """Send the messages in order, calling ``delivered`` after each one that went out"""
+        raise NotImplementedError
+
+
+class LogTransport(Transport):
+    """Writes messages to the log instead of sending them"""
+
+    def send(self, messages: List[Message], delivered: Callable[[Message], None] = _ignore) -> None:
+        for message in messages:
+            logger.info("Digest for %s: %s\n%s", message.to, message.subject, message.body)
+            delivered(message)
+
+
+class SMTPTransport(Transport):
+    """Sends each batch over one SMTP connection"""
+
+    def __init__(self, host: str, port: int = 25, sender: str = DIGEST_SENDER, username: Optional[str] = None,
+                 password: Optional[str] = None, starttls: bool = False, timeout: float = 30):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+
+    def send(self, messages: List[Message], delivered: Callable[[Message], None] = _ignore) -> None:
+        import smtplib
+        from email.message import EmailMessage
+
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            if self.starttls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password or "")
+            for message in messages:
+                email = EmailMessage()
+                email["From"] = self.sender
+                email["To"] = message.to
+                email["Subject"] = message.subject
+                email.set_content(message.body)
+                smtp.send_message(email)
+                delivered(message)
+
+
+def transport_from_env() -> Transport:
+    """SMTP when SMTP_HOST is set, the log otherwise"""
+    if SMTP_HOST:
+        return SMTPTransport(SMTP_HOST, SMTP_PORT, DIGEST_SENDER, SMTP_USERNAME, SMTP_PASSWORD, SMTP_STARTTLS)
+    return LogTransport()
+
+
+class DueIndex:
+    """Pending tasks due by a cutoff, per person, soonest first"""
+
+    def __init__(self, tasks: List[Task], today: date):
+        self.today = today.isoformat()
+        self.by_person: Dict[str, List[Task]] = {}
+        for task in tasks:
+            if task.due_date:
+                self.by_person.setdefault(task.assigned_to, []).append(task)
+        # Due days per person, for cutting the lists by date with bisect
+        self._days = {person: [task.due_date[:10] for task in tasks] for person, tasks in self.by_person.items()}
+
+    def overdue(self, person: str, since: Optional[str] = None) -> List[Task]:
+        """Tasks due before today (and on or after ``since``, when given)"""
+        days = self._days.get(person, [])
+        start = bisect_left(days, since) if since else 0
+        return self.by_person.get(person, [])[start:bisect_left(days, self.today)]
+
+    def due_soon(self, person: str) -> List[Task]:
+        """Tasks due today or later"""
+        days = self._days.get(person, [])
+        return self.by_person.get(person, [])[bisect_left(days, self.today):]
+
+
+def _lines(tasks: List[Task]) -> List[str]:
+    return [f"  • {task.task_name} ({task.room}), due {date.fromisoformat(task.due_date[:10]).strftime('%a %b %d')}"
+            for task in tasks]
+
+
+def compose(household: str, person: str, email: str, overdue: List[Task], due_soon: List[Task],
+            alert: bool = False) -> Message:
+    """One person's digest (or overdue alert)"""
+    if alert:
+        subject = f"{household}: {len(overdue)} task(s) now overdue"
+    else:
+        subject = f"{household}: {len(overdue)} overdue, {len(due_soon)} due soon"
+    body = [f"Hi {person},", ""]
+    if overdue:
+        body += ["Overdue:"] + _lines(overdue) + [""]
+    if due_soon:
+        body += ["Due soon:"] + _lines(due_soon) + [""]
+    body.append(f"— Mental Load Manager, {household}")
+    return Message(email, subject, "\n".join(body), person)
+
+
+class DigestWorker:
+    """Background thread that sends the overdue alerts and daily digests of every household"""
+
+    def __init__(self, backend: StorageBackend, transport: Transport, interval: float = DIGEST_INTERVAL_SECONDS,
+                 digest_hour: int = DIGEST_HOUR, due_soon_days: int = DIGEST_DUE_SOON_DAYS,
+                 clock: Callable[[], datetime] = datetime.now):
+        self.db = backend
+        self.transport = transport
+        self.interval = interval
+        self.digest_hour = digest_hour
+        self.due_soon_days = due_soon_days
+        self.clock = clock
+        self._stop = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="digest-worker", daemon=True)
+
+    def start(self) -> "DigestWorker":
+        self.thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        self.thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_cycle()
+            except Exception as e:
+                logger.warning("Digest cycle failed (%s); retrying in %.0f s", e, self.interval)
+            self._stop.wait(self.interval)
+
+    def run_cycle(self, now: Optional[datetime] = None) -> int:
+        """Send what is due at ``now``; returns the number of messages sent"""
+        now = now or self.clock()
+        if now.hour < self.digest_hour:
+            return 0
+        sent = 0
+        for settings in self.db.enabled_notification_settings():
+            # One household's failure (a bad address, say) does not hold up the others
+            household_id = settings['household_id']
+            delivered: List[Message] = []
+            try:
+                messages, marks = self.messages(settings, now.date())
+                recipient_marks = dict(settings.get('recipient_marks') or {})
+
+                def mark(message: Message):
+                    # Recorded at once, so a failure further down the batch does not send this one again
+                    delivered.append(message)
+                    recipient_marks[message.person] = dict(recipient_marks.get(message.person) or {}, **marks)
+                    self.db.save_notification_settings(household_id, {"recipient_marks": recipient_marks})
+
+                if messages:
+                    self.transport.send(messages, mark)
+                if marks:
+                    self.db.save_notification_settings(household_id, marks)
+            except Exception as e:
+                logger.warning("Sending digests of household %s failed: %s", household_id, e)
+            sent += len(delivered)
+        return sent
+
+    def messages(self, settings: Dict, today: date) -> Tuple[List[Message], Dict]:
+        """Messages a household has left to get today, and the settings recording them as sent
+
+        Recipients whose own marks show they already got today's message
+        (from a batch that failed after reaching them) are left out.
+        """
+        day = today.isoformat()
+        digest = settings['daily_digest'] and (settings['digest_sent_on'] or "") < day
+        alerts = settings['overdue_alerts'] and (settings['alerted_through'] or "") < day
+        if not (digest or alerts):
+            return [], {}
+        until = today + timedelta(days=self.due_soon_days - 1)
+        index = DueIndex(decode_rows(self.db.select_due(settings['household_id'], until.isoformat())), today)
+        household = settings.get('household_name') or "Household"
+        messages = []
+        recipient_marks = settings.get('recipient_marks') or {}
+        for person, email in settings['recipients'].items():
+            done = recipient_marks.get(person) or {}
+            if (done.get('digest_sent_on' if digest else 'alerted_through') or "") >= day:
+                continue
+            if digest:
+                overdue, due_soon = index.overdue(person), index.due_soon(person)
+            else:
+                since = max(settings['alerted_through'] or "", done.get('alerted_through') or "")
+                overdue, due_soon = index.overdue(person, since=since or None), []
+            if overdue or due_soon:
+                messages.append(compose(household, person, email, overdue, due_soon, alert=not digest))
+        # The digest lists the newly overdue tasks too, so it settles the day's alerts
+        marks = {}
+        if digest:
+            marks['digest_sent_on'] = day
+        if alerts:
+            marks['alerted_through'] = day
+        return messages, marks
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Send overdue alerts and daily digests")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="send digests every --interval seconds")
+    run_parser.add_argument("--once", action="store_true", help="run one cycle and exit")
+    run_parser.add_argument("--interval", type=float, default=DIGEST_INTERVAL_SECONDS)
+    commands.add_parser("preview", help="print today's digests without sending or recording them")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    backend = get_storage_backend()
+    if args.command == "preview":
+        worker = DigestWorker(backend, LogTransport())
+        for settings in backend.enabled_notification_settings():
+            messages, _ = worker.messages(dict(settings, daily_digest=True, digest_sent_on=None, recipient_marks={}),
+                                          date.today())
+            for message in messages:
+                print(f"To: {message.to}\nSubject: {message.subject}\n\n{message.body}\n")
+        return 0
+
+    worker = DigestWorker(backend, transport_from_env(), interval=args.interval)
+    if args.once:
+        print(f"📧 {worker.run_cycle()} message(s) sent")
+        return 0
+    worker.start()
+    try:
+        worker.thread.join()
+    except KeyboardInterrupt:
+        worker.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
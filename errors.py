@@ -0,0 +1,71 @@
+"""
+Errors raised by the task data layer.
+
+AsyncCleaningTaskManager (the core under the HTTP API and the CLI) lets
+these propagate. The managers behind the Streamlit app catch them, report
+them through ``on_error`` and return a fallback instead. Storage engines
+raise whatever their driver raises; TypedErrorBackend turns that into
+StorageError, so callers only need to handle the classes below.
+"""
+
+import inspect
+from typing import Any
+
+
+class TaskManagerError(Exception):
+    """Base of every error the data layer raises on purpose"""
+
+
+class InvalidInput(TaskManagerError, ValueError):
+    """The request itself is wrong: an unknown field, a bad value, an empty name"""
+
+
+class NotFound(TaskManagerError, LookupError):
+    """The task or household does not exist (any more)"""
+
+
+class Conflict(TaskManagerError):
+    """Someone else changed the task first; reload it and retry"""
+
+
+class StorageError(TaskManagerError):
+    """The database failed or could not be reached"""
+
+
+def typed_error(error: Exception) -> TaskManagerError:
+    """``error`` as one of the classes above"""
+    if isinstance(error, TaskManagerError):
+        return error
+    if isinstance(error, ValueError):
+        # Backends reject unknown columns with ValueError
+        return InvalidInput(str(error))
+    return StorageError(f"{type(error).__name__}: {error}")
+
+
+class TypedErrorBackend:
+    """Wraps a storage backend (sync or async) so that every failure surfaces as a TaskManagerError"""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def __getattr__(self, name):
+        attribute = getattr(self.backend, name)
+        if name.startswith("_") or not callable(attribute):
+            return attribute
+
+        def call(*args, **kwargs):
+            try:
+                result = attribute(*args, **kwargs)
+            except Exception as e:
+                raise typed_error(e) from e
+            if inspect.isawaitable(result):
+                return self._typed_async(result)
+            return result
+        return call
+
+    @staticmethod
+    async def _typed_async(pending) -> Any:
+        try:
+            return await pending
+        except Exception as e:
+            raise typed_error(e) from e
@@ -0,0 +1,97 @@
+"""
+Mental-load scores: how much each member has been doing, and how evenly.
+
+Every completion adds 1 to its member's score, and a score halves every
+HALF_LIFE_DAYS days, so recent work counts most and a Daily task, done
+about 30 times as often as a Monthly one, weighs about 30 times as much.
+The database keeps the scores current with a trigger on the completion
+log (sql/012_load_scores.sql): recording a completion updates one row, and
+reading the scores costs one row per member however long the history is.
+LoadScores holds those rows, decays them to the present on read and
+applies this process's own completions the same way (O(1) each), so the
+pages show them before the next read.
+
+Scores are reported as completions per week: a member who steadily does
+r tasks a week converges to r, which makes them comparable with the load
+they carry (``carried_load``, the same unit for the pending tasks assigned to
+them).
+"""
+
+import math
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from schedule import occurrences_per_week
+
+# Must match the 14 in sql/012_load_scores.sql and SQLiteBackend.LOAD_SCORES
+HALF_LIFE_DAYS = 14.0
+
+
+def _parse(stamp) -> datetime:
+    if isinstance(stamp, datetime):
+        return stamp
+    # Postgres timestamps may carry a zone or more than six fraction digits
+    return datetime.fromisoformat(str(stamp)[:26].replace("Z", "")).replace(tzinfo=None)
+
+
+class LoadScores:
+    """Each member's decaying completion score, as of its latest completion"""
+
+    def __init__(self, scores: Optional[Dict[str, Tuple[float, datetime]]] = None,
+                 half_life_days: float = HALF_LIFE_DAYS):
+        self.scores: Dict[str, Tuple[float, datetime]] = dict(scores or {})
+        # Decay per day
+        self.rate = math.log(2) / half_life_days
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict]) -> "LoadScores":
+        """Build from StorageBackend.get_load_scores rows"""
+        return cls({row['person']: (float(row['score']), _parse(row['scored_at'])) for row in rows})
+
+    def _decayed(self, score: float, since: datetime, until: datetime) -> float:
+        return score * math.exp(-self.rate * (until - since).total_seconds() / 86400)
+
+    def record(self, person: str, when: Optional[datetime] = None, weight: float = 1.0) -> "LoadScores":
+        """Count one completion by ``person``, like the database trigger does"""
+        when = when or datetime.now()
+        score, scored_at = self.scores.get(person, (0.0, when))
+        if when >= scored_at:
+            self.scores[person] = (self._decayed(score, scored_at, when) + weight, when)
+        else:
+            self.scores[person] = (score + self._decayed(weight, when, scored_at), scored_at)
+        return self
+
+    def score(self, person: str, now: Optional[datetime] = None) -> float:
+        """The member's score decayed to ``now``"""
+        if person not in self.scores:
+            return 0.0
+        score, scored_at = self.scores[person]
+        # Clock skew between the database and this process must not inflate a score
+        return self._decayed(score, scored_at, max(now or datetime.now(), scored_at))
+
+    def per_week(self, members: List[str], now: Optional[datetime] = None) -> Dict[str, float]:
+        """Recent completions per week of every member (and of anyone else who completed tasks)"""
+        now = now or datetime.now()
+        people = list(members) + [person for person in self.scores if person not in members]
+        return {person: self.score(person, now) * 7 * self.rate for person in people}
+
+
+def carried_load(pending: Dict[str, Dict[str, int]], members: Iterable[str]) -> Dict[str, float]:
+    """Pending occurrences per week of each member's tasks, from pending task counts by member and frequency
+
+    ``pending`` is task_stats' pending_by_person_frequency; members without
+    pending tasks carry 0.
+    """
+    loads = {member: 0.0 for member in members}
+    for person, counts in pending.items():
+        loads[person] = loads.get(person, 0.0) + sum(count * occurrences_per_week(frequency)
+                                                     for frequency, count in counts.items())
+    return loads
+
+
+def balance(loads: Dict[str, float]) -> Optional[float]:
+    """Lightest load over heaviest: 1.0 when everyone does the same, 0.0 when someone does nothing"""
+    values = list(loads.values())
+    if len(values) < 2 or max(values) <= 0:
+        return None
+    return min(values) / max(values)
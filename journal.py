@@ -0,0 +1,526 @@
+"""
+Write-ahead journal of task writes, flushed to the backend in the background.
+
+With WRITE_JOURNAL set, CleaningTaskManager appends every task write to a
+local SQLite file and returns at once; pages show the predicted result
+(``replay``) until the write reaches the backend. A JournalFlusher thread
+sends the journal in order, coalesced: consecutive edits of a task are
+merged, a new task's edits are folded into its insert (or dropped with it),
+edits followed by a delete become the delete, and the completions of a
+round go out as one complete_and_rotate call. Errors are retried with
+exponential backoff; writes the backend refuses (version conflicts, deleted
+tasks) or that keep failing are kept as failed entries for the app to show.
+
+New tasks get a temporary negative id (minus their journal sequence number)
+until their insert is flushed; later writes to them are remapped. A write
+queued on top of another queued write of the same task is "chained": it is
+checked against the version the earlier write produced, not the predicted
+version the page showed.
+
+Several flushers may share a journal file (managers of other households,
+of an evicted Streamlit cache entry, or of another process). A flusher
+claims a household's entries under a write lock before sending them and
+holds the claim for LEASE_SECONDS, renewed every round; while the claim
+is live, other flushers leave that household alone. A flusher that dies
+mid-batch leaves its entries to whoever claims them after the lease runs
+out, and every queued insert carries a key of its own, so an insert that
+reached the backend before the crash is not made a second time.
+"""
+
+import inspect
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+import weakref
+from datetime import date
+from itertools import zip_longest
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from schedule import next_due
+from storage import StorageBackend, next_member
+
+logger = logging.getLogger(__name__)
+
+# Journal entries read per flush; coalescing turns them into far fewer requests
+BATCH_SIZE = 100
+# Flushes of an entry that may fail before it is given up and shown as failed
+MAX_ATTEMPTS = 8
+BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 60.0
+# The flusher also wakes up this often, for entries left by an earlier process
+IDLE_SECONDS = 30.0
+# How long a flusher's claim on a household's entries lasts without being renewed
+LEASE_SECONDS = 60.0
+
+DEPENDENT_ERROR = "an earlier change to this task could not be saved"
+
+
+class WriteRefused(Exception):
+    """The backend rejected a write for good; retrying would not help"""
+
+
+class MutationJournal:
+    """Durable, ordered queue of task writes, in one SQLite file shared by all households"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS mutations (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        household_id INTEGER NOT NULL,
+        kind TEXT NOT NULL CHECK (kind IN ('create', 'update', 'complete', 'delete')),
+        task_id INTEGER NOT NULL,
+        -- Version of the task the write is based on (NULL: not checked, or chained)
+        version INTEGER,
+        chained INTEGER NOT NULL DEFAULT 0,
+        payload TEXT NOT NULL DEFAULT '{}',
+        label TEXT NOT NULL DEFAULT '',
+        created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime')),
+        attempts INTEGER NOT NULL DEFAULT 0,
+        failed INTEGER NOT NULL DEFAULT 0,
+        error TEXT,
+        -- Key of a create, sent with its insert so that a replay does not insert it twice
+        insert_key TEXT,
+        -- Flusher sending the entry, and until when (epoch seconds) its claim holds
+        claimed_by TEXT,
+        claimed_until REAL
+    );
+    CREATE INDEX IF NOT EXISTS mutations_household_failed_seq_idx ON mutations (household_id, failed, seq);
+    CREATE TABLE IF NOT EXISTS task_ids (
+        temp_id INTEGER PRIMARY KEY,
+        task_id INTEGER NOT NULL
+    );
+    """
+    # Columns added since the first journal files were written
+    ADDED_COLUMNS = {"insert_key": "TEXT", "claimed_by": "TEXT", "claimed_until": "REAL"}
+
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.lock = threading.RLock()
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            # A queued write must survive a power cut, not just a crash
+            self.conn.execute("PRAGMA synchronous=FULL")
+            self.conn.executescript(self.SCHEMA)
+            existing = {row["name"] for row in self.conn.execute("PRAGMA table_info(mutations)")}
+            for column, column_type in self.ADDED_COLUMNS.items():
+                if column not in existing:
+                    self.conn.execute(f"ALTER TABLE mutations ADD COLUMN {column} {column_type}")
+
+    @staticmethod
+    def _decode(row: sqlite3.Row) -> Dict:
+        mutation = dict(row)
+        mutation['payload'] = json.loads(mutation['payload'])
+        return mutation
+
+    def append(self, household_id: int, mutations: List[Dict]) -> List[int]:
+        """Queue writes atomically and return their task ids (the temporary id for creates)
+
+        Each mutation has a kind, a task_id (ignored for creates) and
+        optionally a version, chained flag, JSON-able payload and label.
+        """
+        task_ids = []
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                for mutation in mutations:
+                    seq = self.conn.execute(
+                        "INSERT INTO mutations (household_id, kind, task_id, version, chained, payload, label, "
+                        "insert_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?) RETURNING seq",
+                        (household_id, mutation['kind'], mutation.get('task_id') or 0, mutation.get('version'),
+                         int(mutation.get('chained', False)), json.dumps(mutation.get('payload') or {}),
+                         mutation.get('label', ""),
+                         uuid.uuid4().hex if mutation['kind'] == "create" else None)).fetchone()[0]
+                    if mutation['kind'] == "create":
+                        self.conn.execute("UPDATE mutations SET task_id = ? WHERE seq = ?", (-seq, seq))
+                        task_ids.append(-seq)
+                    else:
+                        task_ids.append(mutation['task_id'])
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return task_ids
+
+    def pending(self, household_id: int, limit: Optional[int] = None) -> List[Dict]:
+        """Writes not yet flushed (and not failed), oldest first"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT * FROM mutations WHERE household_id = ? AND failed = 0 ORDER BY seq LIMIT ?",
+                (household_id, -1 if limit is None else limit)).fetchall()
+        return [self._decode(row) for row in rows]
+
+    def claim(self, household_id: int, owner: str, limit: int, lease: float = LEASE_SECONDS) -> List[Dict]:
+        """Claim the oldest writes of a household for ``owner`` to send, oldest first
+
+        Returns nothing while another flusher holds a live claim on any of
+        the household's writes: they must reach the backend in order, so
+        only one flusher sends them at a time.
+        """
+        now = time.time()
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                if self._claimed_elsewhere(household_id, owner, now):
+                    rows = []
+                else:
+                    rows = self.conn.execute(
+                        "UPDATE mutations SET claimed_by = ?, claimed_until = ? WHERE seq IN "
+                        "(SELECT seq FROM mutations WHERE household_id = ? AND failed = 0 ORDER BY seq LIMIT ?) "
+                        "RETURNING *", (owner, now + lease, household_id, limit)).fetchall()
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return sorted((self._decode(row) for row in rows), key=lambda mutation: mutation['seq'])
+
+    def _claimed_elsewhere(self, household_id: int, owner: str, now: float) -> bool:
+        return self.conn.execute(
+            "SELECT 1 FROM mutations WHERE household_id = ? AND failed = 0 AND claimed_by <> ? "
+            "AND claimed_until > ? LIMIT 1", (household_id, owner, now)).fetchone() is not None
+
+    def renew(self, household_id: int, owner: str, lease: float = LEASE_SECONDS) -> bool:
+        """Extend ``owner``'s claim; False when it ran out and another flusher claimed the writes"""
+        now = time.time()
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.execute("UPDATE mutations SET claimed_until = ? WHERE claimed_by = ?", (now + lease, owner))
+                held = not self._claimed_elsewhere(household_id, owner, now)
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return held
+
+    def release(self, owner: str):
+        """Drop ``owner``'s claim on the writes it did not settle"""
+        with self.lock:
+            self.conn.execute("UPDATE mutations SET claimed_by = NULL, claimed_until = NULL WHERE claimed_by = ?",
+                              (owner,))
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def count(self, household_id: int) -> int:
+        """Number of writes waiting to be flushed"""
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM mutations WHERE household_id = ? AND failed = 0",
+                                     (household_id,)).fetchone()[0]
+
+    def failed(self, household_id: int) -> List[Dict]:
+        """Writes that were given up, oldest first"""
+        with self.lock:
+            rows = self.conn.execute("SELECT * FROM mutations WHERE household_id = ? AND failed = 1 ORDER BY seq",
+                                     (household_id,)).fetchall()
+        return [self._decode(row) for row in rows]
+
+    def ack(self, seqs: Iterable[int]):
+        """Forget writes that reached the backend (or cancelled each other out)"""
+        seqs = list(seqs)
+        with self.lock:
+            self.conn.execute(f"DELETE FROM mutations WHERE seq IN ({', '.join('?' for _ in seqs)})", seqs)
+
+    def retry(self, seqs: Iterable[int], error: str) -> List[int]:
+        """Count a failed attempt of each write; returns the ones out of attempts"""
+        seqs = list(seqs)
+        with self.lock:
+            self.conn.executemany("UPDATE mutations SET attempts = attempts + 1, error = ? WHERE seq = ?",
+                                  [(error, seq) for seq in seqs])
+            return [row[0] for row in self.conn.execute(
+                f"SELECT seq FROM mutations WHERE attempts >= ? AND seq IN ({', '.join('?' for _ in seqs)})",
+                [MAX_ATTEMPTS] + seqs)]
+
+    def fail(self, household_id: int, seqs: Iterable[int], error: str):
+        """Give up on writes, and on the later writes of the same tasks that build on them"""
+        seqs = list(seqs)
+        marks = ', '.join('?' for _ in seqs)
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.execute(f"UPDATE mutations SET failed = 1, error = ? WHERE seq IN ({marks})",
+                                  [error] + seqs)
+                self.conn.execute(
+                    "UPDATE mutations SET failed = 1, error = ? WHERE household_id = ? AND failed = 0 "
+                    f"AND task_id IN (SELECT task_id FROM mutations WHERE seq IN ({marks}))",
+                    [DEPENDENT_ERROR, household_id] + seqs)
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def discard(self, household_id: int):
+        """Drop the failed writes once the user has seen them"""
+        with self.lock:
+            self.conn.execute("DELETE FROM mutations WHERE household_id = ? AND failed = 1", (household_id,))
+
+    def remap(self, temp_id: int, task_id: int):
+        """Point queued writes of a new task at the id its insert got"""
+        with self.lock:
+            self.conn.execute("UPDATE mutations SET task_id = ? WHERE task_id = ?", (task_id, temp_id))
+            self.conn.execute("INSERT OR REPLACE INTO task_ids (temp_id, task_id) VALUES (?, ?)", (temp_id, task_id))
+
+    def resolve_id(self, task_id: int) -> int:
+        """Real id of a task, for ids that were handed out as temporary ones"""
+        if task_id >= 0:
+            return task_id
+        with self.lock:
+            row = self.conn.execute("SELECT task_id FROM task_ids WHERE temp_id = ?", (task_id,)).fetchone()
+        return row[0] if row else task_id
+
+    def resolve_version(self, household_id: int, task_id: int, version: int):
+        """Base the task's next queued write, if chained, on the version the flushed one produced"""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE mutations SET version = ?, chained = 0 WHERE chained = 1 AND seq = "
+                "(SELECT MIN(seq) FROM mutations WHERE household_id = ? AND task_id = ? AND failed = 0)",
+                (version, household_id, task_id))
+
+
+def coalesce(mutations: List[Dict]) -> Tuple[List[List[Dict]], List[int]]:
+    """Merge queued writes into per-task queues of operations; returns the queues and the cancelled seqs
+
+    Operations keep their task's order, and carry the seqs of every journal
+    entry they stand for.
+    """
+    queues: Dict[int, List[Dict]] = {}
+    cancelled = []
+    for mutation in mutations:
+        op = dict(mutation, seqs=[mutation['seq']])
+        queue = queues.setdefault(op['task_id'], [])
+        last = queue[-1] if queue else None
+        if op['kind'] == "update" and last and last['kind'] == "create":
+            last['payload'] = dict(last['payload'], **op['payload']['updates'])
+            last['seqs'] += op['seqs']
+        elif op['kind'] == "update" and last and last['kind'] == "update":
+            last['payload'] = dict(last['payload'], updates=dict(last['payload']['updates'],
+                                                                 **op['payload']['updates']))
+            last['seqs'] += op['seqs']
+        elif op['kind'] == "delete":
+            while queue and queue[-1]['kind'] in ("update", "delete"):
+                op['seqs'] = queue.pop()['seqs'] + op['seqs']
+            if len(queue) == 1 and queue[0]['kind'] == "create":
+                # Created and deleted before the backend heard of it
+                cancelled += queue.pop()['seqs'] + op['seqs']
+            else:
+                queue.append(op)
+        else:
+            queue.append(op)
+    return [queue for queue in queues.values() if queue], cancelled
+
+
+def replay(rows: Dict[int, Dict], mutations: List[Dict], members: List[str],
+           today: date) -> Dict[int, Optional[Dict]]:
+    """Predicted rows of the tasks queued writes touch (None for deleted ones), given the current rows
+
+    The writes are coalesced first, as the flusher will send them, so the
+    predicted versions are the ones the backend will give out.
+    """
+    queues, _ = coalesce(mutations)
+    predicted: Dict[int, Optional[Dict]] = {}
+    for mutation in (op for queue in queues for op in queue):
+        task_id = mutation['task_id']
+        current = predicted[task_id] if task_id in predicted else rows.get(task_id)
+        if mutation['kind'] == "create":
+            predicted[task_id] = dict(mutation['payload'], id=task_id, household_id=mutation['household_id'],
+                                      version=1, updated_at=mutation['created_at'])
+        elif current is None:
+            continue
+        elif mutation['kind'] == "update":
+            predicted[task_id] = dict(current, **mutation['payload']['updates'], version=current['version'] + 1)
+        elif mutation['kind'] == "complete":
+            due = next_due(current['frequency'], today)
+            predicted[task_id] = dict(current, assigned_to=next_member(members, current['assigned_to']),
+                                      status="pending", completed_at=None,
+                                      due_date=due.isoformat() if due else None, version=current['version'] + 1)
+        elif mutation['kind'] == "delete":
+            predicted[task_id] = None
+    return predicted
+
+
+def _weak(callback: Callable) -> Callable:
+    """``callback`` called through a weak reference when it is a bound method
+
+    A flusher must not keep its manager alive: once the manager is dropped
+    (an evicted Streamlit cache entry, say), its finalizer stops the flusher.
+    """
+    if not inspect.ismethod(callback):
+        return callback
+    method = weakref.WeakMethod(callback)
+
+    def call(*args):
+        bound = method()
+        if bound is None:
+            raise RuntimeError("the task manager of this flusher was discarded")
+        return bound(*args)
+    return call
+
+
+class JournalFlusher:
+    """Background thread that sends one household's queued writes to the backend"""
+
+    def __init__(self, journal: MutationJournal, backend: StorageBackend, household_id: int,
+                 update: Callable[[int, Dict, Optional[Dict]], Optional[Dict]],
+                 on_write: Callable[[List[Dict], List[int]], None], interval: float = 0.5,
+                 batch_size: int = BATCH_SIZE):
+        self.journal = journal
+        self.db = backend
+        self.household_id = household_id
+        # update(task_id, updates, base) -> row, raising WriteRefused when the write cannot apply
+        self.update = _weak(update)
+        # on_write(rows, deleted_ids) folds each flushed write into the caches
+        self.on_write = _weak(on_write)
+        self.interval = interval
+        self.batch_size = batch_size
+        self.failures = 0
+        # Name of this flusher's claims in the journal, unique across threads and processes
+        self.owner = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self.thread = threading.Thread(target=self._run, name=f"journal-flusher-{household_id}", daemon=True)
+
+    def start(self) -> "JournalFlusher":
+        self.thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None):
+        self.close()
+        if self.thread.is_alive() and self.thread is not threading.current_thread():
+            self.thread.join(timeout)
+
+    def close(self):
+        """Ask the thread to stop after the batch it is sending, without waiting for it"""
+        self._stop.set()
+        self._wake.set()
+
+    def notify(self):
+        """A write was queued"""
+        self._wake.set()
+
+    def _run(self):
+        # Entries left by an earlier process go out right away
+        self._wake.set()
+        while not self._stop.is_set():
+            self._wake.wait(IDLE_SECONDS)
+            self._wake.clear()
+            # Let a burst of clicks land in the same batch
+            if self._stop.wait(self.interval):
+                break
+            try:
+                self.flush_all()
+                self.failures = 0
+            except Exception as e:
+                self.failures += 1
+                delay = min(BACKOFF_SECONDS * 2 ** (self.failures - 1), MAX_BACKOFF_SECONDS)
+                logger.warning("Flushing queued writes failed (%s); retrying in %.0f s", e, delay)
+                self._stop.wait(delay)
+                self._wake.set()
+
+    def flush_all(self) -> int:
+        """Flush batches until the journal is empty; returns the number of entries settled"""
+        settled = 0
+        while True:
+            count = self.flush()
+            if not count:
+                return settled
+            settled += count
+
+    def flush(self) -> int:
+        """Send the oldest batch of queued writes; returns the number of entries settled
+
+        Raises on the first error that may go away, leaving the rest of the
+        batch queued (in order) for the next attempt.
+        """
+        with self._lock:
+            # Nothing comes back while another flusher is sending this household's writes
+            mutations = self.journal.claim(self.household_id, self.owner, self.batch_size)
+            if not mutations:
+                return 0
+            try:
+                queues, cancelled = coalesce(mutations)
+                self.journal.ack(cancelled)
+                state = {"ids": {}, "versions": {}, "refused": set()}
+                for ops in zip_longest(*queues):
+                    if not self.journal.renew(self.household_id, self.owner):
+                        logger.warning("The claim on queued writes ran out and another flusher took them over")
+                        return 0
+                    ops = [op for op in ops if op is not None]
+                    try:
+                        self._send(ops, state)
+                    except Exception as e:
+                        unsent = [seq for queue in queues for op in queue if not op.get('settled')
+                                  for seq in op['seqs']]
+                        exhausted = self.journal.retry(unsent, str(e))
+                        if exhausted:
+                            self.journal.fail(self.household_id, exhausted,
+                                              f"gave up after {MAX_ATTEMPTS} attempts: {e}")
+                        raise
+                return len(mutations)
+            finally:
+                self.journal.release(self.owner)
+
+    def _settle(self, op: Dict, state: Dict, row: Optional[Dict] = None, deleted: bool = False):
+        """Fold a flushed operation into the caches, then drop it from the journal"""
+        task_id = op['task_id']
+        self.on_write([row] if row else [], [task_id] if deleted else [])
+        self.journal.ack(op['seqs'])
+        op['settled'] = True
+        if row:
+            state['versions'][row['id']] = row['version']
+            self.journal.resolve_version(self.household_id, row['id'], row['version'])
+
+    def _refuse(self, op: Dict, state: Dict, error: str):
+        self.journal.fail(self.household_id, op['seqs'], error)
+        state['refused'].add(op['task_id'])
+        op['settled'] = True
+
+    def _send(self, ops: List[Dict], state: Dict):
+        """Send one round: at most one operation per task"""
+        completes = []
+        for op in ops:
+            op['task_id'] = state['ids'].get(op['task_id'], op['task_id'])
+            if op['task_id'] in state['refused']:
+                op['settled'] = True
+                continue
+            if op['chained'] and op['task_id'] in state['versions']:
+                op['version'] = state['versions'][op['task_id']]
+            if op['kind'] == "complete":
+                completes.append(op)
+            elif op['kind'] == "create":
+                # Keyed, so a replay after a crash before the ack finds the task instead of adding it again
+                row = self.db.insert_task_once(self.household_id, op['payload'], op['insert_key'])
+                self.journal.remap(op['task_id'], row['id'])
+                state['ids'][op['task_id']] = row['id']
+                op['task_id'] = row['id']
+                self._settle(op, state, row)
+            elif op['kind'] == "update":
+                base = op['payload'].get('base')
+                if base is not None and op['version'] is not None:
+                    base = dict(base, version=op['version'])
+                try:
+                    row = self.update(op['task_id'], op['payload']['updates'], base)
+                except WriteRefused as e:
+                    self._refuse(op, state, str(e))
+                    continue
+                if row is None:
+                    self._refuse(op, state, "the task no longer exists")
+                else:
+                    self._settle(op, state, row)
+            elif op['kind'] == "delete":
+                self.db.delete_task(self.household_id, op['task_id'])
+                self._settle(op, state, deleted=True)
+
+        if completes:
+            versions = [op['version'] for op in completes]
+            rows = self.db.complete_and_rotate(self.household_id, [op['task_id'] for op in completes],
+                                               None if all(version is None for version in versions) else versions)
+            rotated = {row['id']: row for row in rows}
+            for op in completes:
+                if op['task_id'] in rotated:
+                    self._settle(op, state, rotated[op['task_id']])
+                else:
+                    self._refuse(op, state, "it was already done or changed by someone else")
@@ -0,0 +1,226 @@
+"""
+Per-query instrumentation for the storage backends.
+
+InstrumentedBackend wraps any StorageBackend (sync or async) and records the
+latency, row count, payload size and errors of every call in a
+MetricsRegistry, labeled by backend method and by the app page that made
+the call. The registry keeps a bounded window of recent latencies per label
+pair for p50/p99 and exports everything as Prometheus text or JSON.
+"""
+
+import contextvars
+import inspect
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Page label for calls made outside any page (CLI, workers, startup)
+NO_PAGE = "-"
+# Latency samples kept per (method, page) for the percentiles
+WINDOW_SIZE = 1000
+QUANTILES = (0.5, 0.9, 0.99)
+
+_current_page: contextvars.ContextVar[str] = contextvars.ContextVar("current_page", default=NO_PAGE)
+
+
+def set_page(page: str) -> None:
+    """Label the backend calls made from now on in this context with ``page``"""
+    _current_page.set(page)
+
+
+def current_page() -> str:
+    """Page label of the running context"""
+    return _current_page.get()
+
+
+def row_count(result: Any) -> int:
+    """Rows carried by a backend result (list of rows, change set or single row)"""
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, dict):
+        if "rows" in result:
+            return len(result["rows"]) + len(result.get("deleted", []))
+        return 1
+    return 0
+
+
+def payload_size(result: Any) -> int:
+    """Size in bytes of the result encoded as JSON, i.e. roughly what crossed the wire"""
+    if result is None or isinstance(result, (int, float)):
+        return 0
+    return len(json.dumps(result, default=str, separators=(",", ":")))
+
+
+def percentile(sorted_samples: List[float], quantile: float) -> float:
+    """Nearest-rank percentile of already sorted samples"""
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, max(0, round(quantile * len(sorted_samples) + 0.5) - 1))
+    return sorted_samples[index]
+
+
+class _Series:
+    __slots__ = ("calls", "errors", "rows", "bytes", "seconds", "window")
+
+    def __init__(self, window_size: int):
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self.window = deque(maxlen=window_size)
+
+
+class MetricsRegistry:
+    """Thread-safe counters and latency windows keyed by (method, page)
+
+    With ``textfile`` set, the Prometheus text is also written to that path
+    at most every ``textfile_interval`` seconds, for node_exporter's textfile
+    collector or any other scraper that reads files.
+    """
+
+    def __init__(self, window_size: int = WINDOW_SIZE, textfile: Optional[str] = None,
+                 textfile_interval: float = 15.0, clock: Callable[[], float] = time.monotonic):
+        self.window_size = window_size
+        self.textfile = textfile
+        self.textfile_interval = textfile_interval
+        self.clock = clock
+        self._series: Dict[Tuple[str, str], _Series] = {}
+        self._lock = threading.Lock()
+        self._last_write = None
+
+    def observe(self, method: str, page: str, seconds: float, rows: int = 0, size: int = 0,
+                error: bool = False) -> None:
+        """Record one backend call"""
+        with self._lock:
+            series = self._series.get((method, page))
+            if series is None:
+                series = self._series[(method, page)] = _Series(self.window_size)
+            series.calls += 1
+            series.errors += error
+            series.rows += rows
+            series.bytes += size
+            series.seconds += seconds
+            series.window.append(seconds)
+            write_due = bool(self.textfile) and (
+                self._last_write is None or self.clock() - self._last_write >= self.textfile_interval)
+            if write_due:
+                self._last_write = self.clock()
+        if write_due:
+            self.write_textfile(self.textfile)
+
+    def reset(self) -> None:
+        """Forget every recorded call"""
+        with self._lock:
+            self._series.clear()
+
+    def snapshot(self) -> List[Dict]:
+        """One dict per (method, page) with totals and latency percentiles in milliseconds"""
+        with self._lock:
+            series = [(key, s.calls, s.errors, s.rows, s.bytes, s.seconds, sorted(s.window))
+                      for key, s in self._series.items()]
+        rows = []
+        for (method, page), calls, errors, total_rows, total_bytes, seconds, window in sorted(series):
+            row = {"method": method, "page": page, "calls": calls, "errors": errors,
+                   "rows": total_rows, "bytes": total_bytes,
+                   "mean_ms": round(seconds / calls * 1000, 3) if calls else 0.0}
+            for quantile in QUANTILES:
+                row[f"p{round(quantile * 100)}_ms"] = round(percentile(window, quantile) * 1000, 3)
+            rows.append(row)
+        return rows
+
+    def to_json(self) -> str:
+        """Snapshot as a JSON document"""
+        return json.dumps({"generated_at": time.time(), "series": self.snapshot()}, indent=2)
+
+    def to_prometheus(self) -> str:
+        """Snapshot in the Prometheus text exposition format"""
+        with self._lock:
+            series = sorted((key, s.calls, s.errors, s.rows, s.bytes, s.seconds, sorted(s.window))
+                            for key, s in self._series.items())
+        lines = [
+            "# HELP mymental_backend_call_seconds Storage backend call latency (recent window quantiles).",
+            "# TYPE mymental_backend_call_seconds summary",
+        ]
+        for (method, page), calls, _, _, _, seconds, window in series:
+            labels = _labels(method=method, page=page)
+            for quantile in QUANTILES:
+                lines.append(f'mymental_backend_call_seconds{{{labels},quantile="{quantile}"}} '
+                             f"{percentile(window, quantile):.6f}")
+            lines.append(f"mymental_backend_call_seconds_sum{{{labels}}} {seconds:.6f}")
+            lines.append(f"mymental_backend_call_seconds_count{{{labels}}} {calls}")
+        for name, index, help_text in (
+                ("errors", 2, "Storage backend calls that raised."),
+                ("rows", 3, "Rows returned by storage backend calls."),
+                ("payload_bytes", 4, "JSON size of storage backend results.")):
+            lines.append(f"# HELP mymental_backend_{name}_total {help_text}")
+            lines.append(f"# TYPE mymental_backend_{name}_total counter")
+            for entry in series:
+                method, page = entry[0]
+                lines.append(f"mymental_backend_{name}_total{{{_labels(method=method, page=page)}}} {entry[index]}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str) -> None:
+        """Atomically replace ``path`` with the Prometheus text"""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(self.to_prometheus())
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+def _labels(**labels: str) -> str:
+    def escape(value: str) -> str:
+        return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return ",".join(f'{name}="{escape(value)}"' for name, value in labels.items())
+
+
+# Process-wide registry shared by every task manager
+METRICS = MetricsRegistry()
+
+
+class InstrumentedBackend:
+    """Wraps a storage backend and records every public method call in a registry"""
+
+    def __init__(self, backend, registry: MetricsRegistry = METRICS):
+        self.backend = backend
+        self.registry = registry
+
+    def __getattr__(self, name):
+        attribute = getattr(self.backend, name)
+        if name.startswith("_") or not callable(attribute):
+            return attribute
+
+        def call(*args, **kwargs):
+            page, started = current_page(), time.perf_counter()
+            try:
+                result = attribute(*args, **kwargs)
+            except Exception:
+                self.registry.observe(name, page, time.perf_counter() - started, error=True)
+                raise
+            if inspect.isawaitable(result):
+                # Async backends hand back a coroutine; time it until it settles
+                return self._observe_async(name, page, started, result)
+            self._record(name, page, started, result)
+            return result
+        return call
+
+    async def _observe_async(self, name: str, page: str, started: float, pending) -> Any:
+        try:
+            result = await pending
+        except Exception:
+            self.registry.observe(name, page, time.perf_counter() - started, error=True)
+            raise
+        self._record(name, page, started, result)
+        return result
+
+    def _record(self, name: str, page: str, started: float, result: Any) -> None:
+        self.registry.observe(name, page, time.perf_counter() - started, row_count(result), payload_size(result))
@@ -0,0 +1,220 @@
+"""
+Versioned schema migrations for Postgres (Supabase) and the local SQLite file.
+
+Postgres migrations are the numbered files in sql/ (``NNN_name.sql``). They
+are applied in order, each in its own transaction, and recorded in the
+schema_migrations table. SQLite migrations are SQLiteBackend.migrations;
+they are recorded in ``PRAGMA user_version`` and applied when the file is
+opened. A released migration is never edited: a schema change is a new
+migration. The migrations up to 010 are idempotent, so a database set up
+before there were versions can be migrated from scratch.
+
+Supabase's API cannot run DDL, so Postgres migrations are applied over a
+direct connection (DATABASE_URL, from the project's database settings;
+needs ``pip install "psycopg[binary]"``), or printed as one script for the
+SQL Editor.
+
+Usage:
+    python migrations.py status                 # Postgres version and pending migrations
+    python migrations.py up                     # apply them over DATABASE_URL
+    python migrations.py sql [--after N]        # print them for the Supabase SQL Editor
+    python migrations.py up --sqlite mymental.db
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import sys
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple, Union
+
+SQL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sql")
+MIGRATION_FILE = re.compile(r"^(\d{3})_(\w+)\.sql$")
+
+# A migration step is SQL, or a function of the connection for steps SQL cannot express
+Migration = Tuple[int, str, Union[str, Callable[[sqlite3.Connection], None]]]
+
+SCHEMA_MIGRATIONS = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    applied_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+"""
+# Serializes concurrent "up" runs against the same database
+ADVISORY_LOCK_KEY = 5_181_042
+
+
+def postgres_migrations() -> List[Migration]:
+    """(version, name, sql) of the numbered files in sql/, oldest first"""
+    migrations = []
+    for filename in sorted(os.listdir(SQL_DIR)):
+        match = MIGRATION_FILE.match(filename)
+        if match:
+            with open(os.path.join(SQL_DIR, filename), encoding="utf-8") as f:
+                migrations.append((int(match.group(1)), match.group(2), f.read()))
+    return migrations
+
+
+def postgres_script(after: int = 0) -> str:
+    """Migrations newer than ``after`` as one script for the SQL Editor, each in its own transaction"""
+    parts = [SCHEMA_MIGRATIONS.strip()]
+    for version, name, sql in postgres_migrations():
+        if version > after:
+            parts.append(f"-- {version:03d}_{name}.sql\nBEGIN;\n{sql.strip()}\n"
+                         f"INSERT INTO schema_migrations (version, name) VALUES ({version}, '{name}') "
+                         "ON CONFLICT (version) DO NOTHING;\nCOMMIT;")
+    return "\n\n".join(parts) + "\n"
+
+
+def postgres_version(database_url: Optional[str] = None) -> int:
+    """Latest applied Postgres migration: over DATABASE_URL if given, else through the Supabase API"""
+    if database_url:
+        import psycopg
+
+        with psycopg.connect(database_url) as conn:
+            conn.execute(SCHEMA_MIGRATIONS)
+            return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations").fetchone()[0]
+
+    from database import SupabaseClient
+
+    try:
+        result = (SupabaseClient().get_client().table("schema_migrations").select("version")
+                  .order("version", desc=True).limit(1).execute())
+    except Exception as e:
+        # Databases set up before migrations have no schema_migrations table
+        if "schema_migrations" not in str(e):
+            raise
+        return 0
+    return result.data[0]["version"] if result.data else 0
+
+
+def migrate_postgres(database_url: str, target: Optional[int] = None) -> List[int]:
+    """Apply the pending Postgres migrations (up to ``target``), each in its own transaction"""
+    import psycopg
+
+    applied = []
+    with psycopg.connect(database_url) as conn:
+        conn.execute(SCHEMA_MIGRATIONS)
+        conn.commit()
+        for version, name, sql in postgres_migrations():
+            if target is not None and version > target:
+                break
+            with conn.transaction():
+                # Re-checked under the lock: another run may have applied it meanwhile
+                conn.execute("SELECT pg_advisory_xact_lock(%s)", (ADVISORY_LOCK_KEY,))
+                if conn.execute("SELECT 1 FROM schema_migrations WHERE version = %s", (version,)).fetchone():
+                    continue
+                conn.execute(sql)
+                conn.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (version, name))
+            applied.append(version)
+    return applied
+
+
+def sqlite_statements(script: str) -> Iterator[str]:
+    """Split an SQL script into statements (trigger bodies stay whole)"""
+    statement = ""
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            if statement.strip().strip(";").strip():
+                yield statement.strip()
+            statement = ""
+    if statement.strip():
+        yield statement.strip()
+
+
+def sqlite_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate_sqlite(conn: sqlite3.Connection, migrations: Sequence[Migration]) -> List[int]:
+    """Apply the migrations newer than the file's user_version, each in its own transaction
+
+    ``conn`` must be in autocommit mode (isolation_level=None).
+    """
+    if not migrations or sqlite_version(conn) >= migrations[-1][0]:
+        return []
+    applied = []
+    for version, _, step in migrations:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Re-read under the write lock: another process may have migrated the file meanwhile
+            if sqlite_version(conn) >= version:
+                conn.execute("ROLLBACK")
+                continue
+            if callable(step):
+                step(conn)
+            else:
+                for statement in sqlite_statements(step):
+                    conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        applied.append(version)
+    return applied
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Apply versioned schema migrations")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status", help="show the applied version and the pending migrations")
+    up_parser = commands.add_parser("up", help="apply the pending migrations")
+    up_parser.add_argument("--target", type=int, help="stop after this version")
+    up_parser.add_argument("--sqlite", metavar="PATH", help="migrate a local SQLite file instead")
+    sql_parser = commands.add_parser("sql", help="print the pending Postgres migrations as one script")
+    sql_parser.add_argument("--after", type=int, help="print the migrations after this version "
+                                                      "(default: the applied version, or all of them)")
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    database_url = os.getenv("DATABASE_URL")
+
+    if args.command == "up" and args.sqlite:
+        from storage import SQLiteBackend
+
+        # Opening the file applies its migrations
+        backend = SQLiteBackend(args.sqlite)
+        print(f"✅ {args.sqlite} is at version {sqlite_version(backend.conn)}")
+        return 0
+
+    if args.command == "sql":
+        after = args.after
+        if after is None:
+            try:
+                after = postgres_version(database_url)
+            except Exception:
+                after = 0
+        sys.stdout.write(postgres_script(after))
+        return 0
+
+    migrations = postgres_migrations()
+    if args.command == "status":
+        version = postgres_version(database_url)
+        print(f"🗄️ Postgres is at version {version} of {migrations[-1][0]}")
+        for number, name, _ in migrations:
+            if number > version:
+                print(f"  ⏳ {number:03d}_{name}.sql")
+        return 0
+
+    if not database_url:
+        print("❌ DATABASE_URL is not set. Set it to the connection string from the Supabase database "
+              "settings, or paste the output of `python migrations.py sql` into the SQL Editor.")
+        return 1
+    try:
+        applied = migrate_postgres(database_url, args.target)
+    except ImportError:
+        print('❌ Applying migrations needs psycopg: pip install "psycopg[binary]"')
+        return 1
+    for number in applied:
+        print(f"  ✅ applied {number:03d}")
+    print("🗄️ Postgres is up to date" if args.target is None else f"🗄️ Postgres is at version {args.target}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
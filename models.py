@@ -0,0 +1,158 @@
+"""
+Typed task rows.
+
+The storage backends and the write journal speak the wire format: one dict
+per row, as PostgREST and sqlite3 return it. Everything the app reads goes
+through Task instead: a slotted object with one field per column, whose
+status, frequency and room are shared enum members and whose names, people
+and due dates are interned, so a snapshot of a household holds each repeated
+value once. TaskColumns is the column-wise form of a task list, for grids
+and DataFrames.
+"""
+
+import sys
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+
+class Choice(str, Enum):
+    """Enum whose members are their own string values: equal to, hashed and printed like them"""
+
+    __hash__ = str.__hash__
+
+    def __str__(self) -> str:
+        return self.value
+
+    @classmethod
+    def decode(cls, value: Optional[str]) -> Union["Choice", str, None]:
+        """The member for ``value``; values outside the enum (free-text imports) stay plain strings"""
+        if value is None:
+            return None
+        return cls._value2member_map_.get(value) or sys.intern(value)
+
+    @classmethod
+    def values(cls) -> List[str]:
+        return [member.value for member in cls]
+
+    @classmethod
+    def choices(cls, current: Optional[str]) -> Tuple[List[str], int]:
+        """Options of a select box preset to ``current`` and the index of ``current`` in them
+
+        A value from outside the enum is offered after the members, so
+        saving a form does not silently replace it.
+        """
+        values = cls.values()
+        if current is None:
+            return values, 0
+        if current not in cls._value2member_map_:
+            values.append(str(current))
+        return values, values.index(current)
+
+
+class Status(Choice):
+    PENDING = "pending"
+    COMPLETED = "completed"
+
+
+class Frequency(Choice):
+    DAILY = "Daily"
+    WEEKLY = "Weekly"
+    BI_WEEKLY = "Bi-weekly"
+    MONTHLY = "Monthly"
+    AS_NEEDED = "As needed"
+
+
+class Room(Choice):
+    LIVING_ROOM = "Living Room"
+    KITCHEN = "Kitchen"
+    BEDROOM = "Bedroom"
+    BATHROOM = "Bathroom"
+    DINING_ROOM = "Dining Room"
+    OFFICE = "Office"
+    LAUNDRY_ROOM = "Laundry Room"
+    GARAGE = "Garage"
+    GARDEN = "Garden"
+    OTHER = "Other"
+
+
+FIELDS = ("id", "household_id", "task_name", "assigned_to", "room", "frequency", "description",
+          "status", "due_date", "created_at", "completed_at", "updated_at", "version")
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return None if value is None else sys.intern(value)
+
+
+@dataclass
+class Task:
+    """One cleaning task, decoded from a wire row"""
+
+    __slots__ = FIELDS
+
+    id: int
+    household_id: Optional[int]
+    task_name: str
+    assigned_to: str
+    room: Union[Room, str]
+    frequency: Union[Frequency, str]
+    description: Optional[str]
+    status: Status
+    due_date: Optional[str]
+    created_at: Optional[str]
+    completed_at: Optional[str]
+    updated_at: Optional[str]
+    version: int
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "Task":
+        """Decode a row as returned by a storage backend"""
+        return cls(
+            id=row['id'],
+            household_id=row.get('household_id'),
+            task_name=_intern(row['task_name']),
+            assigned_to=_intern(row['assigned_to']),
+            room=Room.decode(row['room']),
+            frequency=Frequency.decode(row['frequency']),
+            description=row.get('description'),
+            status=Status.decode(row['status']),
+            due_date=_intern(row.get('due_date')),
+            created_at=row.get('created_at'),
+            completed_at=row.get('completed_at'),
+            updated_at=row.get('updated_at'),
+            version=row.get('version') or 1,
+        )
+
+    def to_row(self) -> Dict[str, Any]:
+        """The wire row again, with plain string values"""
+        row = {field: getattr(self, field) for field in FIELDS}
+        for field in ("room", "frequency", "status"):
+            row[field] = None if row[field] is None else str(row[field])
+        return row
+
+    def is_pending(self) -> bool:
+        return self.status == Status.PENDING
+
+
+def decode_rows(rows: Iterable[Dict[str, Any]]) -> List[Task]:
+    """Decode wire rows into tasks"""
+    return [Task.from_row(row) for row in rows]
+
+
+class TaskColumns:
+    """A task list stored column by column: one list per field"""
+
+    def __init__(self, columns: Dict[str, List[Any]]):
+        self.columns = columns
+
+    @classmethod
+    def from_tasks(cls, tasks: Iterable[Task], fields: Iterable[str] = FIELDS) -> "TaskColumns":
+        """Transpose tasks into columns (``fields`` only)"""
+        tasks = list(tasks)
+        return cls({field: [getattr(task, field) for task in tasks] for field in fields})
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values()), []))
+
+    def __getitem__(self, field: str) -> List[Any]:
+        return self.columns[field]
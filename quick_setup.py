@@ -31,22 +31,9 @@ def setup_database():
             return True
         except Exception as e:
             if 'does not exist' in str(e):
-                print("❌ Table doesn't exist. Please create it manually.")
-                print("\n📋 Go to your Supabase Dashboard > SQL Editor and run this:")
-                print("""
-CREATE TABLE cleaning_tasks (
-    id SERIAL PRIMARY KEY,
-    task_name VARCHAR(255) NOT NULL,
-    assigned_to VARCHAR(50) NOT NULL,
-    room VARCHAR(100) NOT NULL,
-    frequency VARCHAR(50) NOT NULL,
-    description TEXT,
-    status VARCHAR(20) DEFAULT 'pending',
-    due_date DATE,
-    created_at TIMESTAMP DEFAULT NOW(),
-    completed_at TIMESTAMP
-);
-                """)
+                print("❌ Table doesn't exist. Please create the schema first:")
+                print("\n📋 Either set DATABASE_URL in .env and run:  python migrations.py up")
+                print("   or paste the output of  python migrations.py sql  into Supabase Dashboard > SQL Editor")
                 return False
             else:
                 raise e
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Retention: keeps the hot tables small after years of use.
+
+Completions older than RETENTION_DAYS are written to archive files, one
+per month (<ARCHIVE_DIR>/household=<id>/completions/month=YYYY-MM/YYYY-MM.<fmt>),
+then folded into monthly per-member counts (completion_rollups) and deleted,
+ARCHIVE_BATCH_SIZE rows per request. Rows are read a page at a time, oldest
+first, and each month's file is written once, when the pages have moved past
+the month, before its rows are deleted. A file left by an earlier run is
+merged with by id, so a run that stops half-way, even one followed by a run
+with a later cutoff, archives the same rows again into the same file instead
+of losing or doubling them. Tasks marked completed, which are out of the
+rotation, are archived by the month they were created and deleted the same
+way (restore them with ``data_io.py import``), and deletion tombstones older
+than the retention window are pruned.
+
+Usage:
+    python retention.py run [--days 400] [--keep-completed] [--household ID]
+    python retention.py rollups [--household ID]
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import re
+import sys
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from data_io import EXPORT_COLUMNS
+from database import ARCHIVE_BATCH_SIZE, ARCHIVE_DIR, ARCHIVE_FORMAT, RETENTION_DAYS
+from errors import InvalidInput
+from models import Status
+
+# The Statistics page and the digests read up to a year of completions from the log
+MIN_RETENTION_DAYS = 366
+COMPLETION_COLUMNS = ["id", "household_id", "task_id", "completed_by", "completed_at"]
+INTEGER_COLUMNS = {"id", "household_id", "task_id"}
+# Files named after their id range, as earlier versions wrote them; merged into the month's file
+ID_RANGE_FILE = re.compile(r"^\d+-\d+\.(parquet|jsonl)$")
+
+
+class RetentionReport:
+    """Outcome of a retention run"""
+
+    def __init__(self):
+        self.completions = 0
+        self.tasks = 0
+        self.tombstones = 0
+        self.files: List[str] = []
+
+    def add_file(self, path: str):
+        if path not in self.files:
+            self.files.append(path)
+
+    def __repr__(self):
+        return (f"RetentionReport(completions={self.completions}, tasks={self.tasks}, "
+                f"tombstones={self.tombstones}, files={len(self.files)})")
+
+
+class Archive:
+    """Archive files: <root>/household=<id>/<table>/<key>=<value>/<value>.<parquet|jsonl>, one per partition"""
+
+    def __init__(self, root: str = ARCHIVE_DIR, fmt: Optional[str] = ARCHIVE_FORMAT):
+        self.root = root
+        # pyarrow is optional; without it archives are plain JSON lines
+        self.fmt = fmt or ("parquet" if importlib.util.find_spec("pyarrow") else "jsonl")
+        if self.fmt not in ("parquet", "jsonl"):
+            raise InvalidInput(f"Unknown archive format: {self.fmt} (expected parquet or jsonl)")
+
+    def write(self, household_id: int, table: str, partition: str, rows: List[Dict], columns: List[str]) -> str:
+        """Write a partition's rows to its file and return the file's path
+
+        A file already there (from an earlier run) is merged with by id, rows
+        in it being replaced, so archiving a row twice keeps one copy.
+        """
+        directory = os.path.join(self.root, f"household={household_id}", table, partition)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{partition.partition('=')[2]}.{self.fmt}")
+        legacy = [os.path.join(directory, name) for name in sorted(os.listdir(directory))
+                  if ID_RANGE_FILE.match(name) and name.endswith(f".{self.fmt}")
+                  and name != os.path.basename(path)]
+        merged: Dict[int, Dict] = {}
+        for existing in ([path] if os.path.exists(path) else []) + legacy:
+            merged.update((record['id'], record) for record in self._read(existing))
+        merged.update((row['id'], {column: row.get(column) for column in columns}) for row in rows)
+        records = [merged[record_id] for record_id in sorted(merged)]
+        # Written next to the final name and renamed, so a crash never leaves half a file behind
+        temporary = path + ".tmp"
+        if self.fmt == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            schema = pa.schema([(column, pa.int64() if column in INTEGER_COLUMNS else pa.string())
+                                for column in columns])
+            pq.write_table(pa.Table.from_pylist(
+                [{column: value if column in INTEGER_COLUMNS or value is None else str(value)
+                  for column, value in record.items()} for record in records], schema=schema), temporary)
+        else:
+            with open(temporary, "w", encoding="utf-8") as out:
+                out.writelines(json.dumps(record, default=str) + "\n" for record in records)
+        os.replace(temporary, path)
+        for existing in legacy:
+            os.remove(existing)
+        return path
+
+    def _read(self, path: str) -> List[Dict]:
+        if self.fmt == "parquet":
+            import pyarrow.parquet as pq
+
+            return pq.read_table(path).to_pylist()
+        with open(path, encoding="utf-8") as source:
+            return [json.loads(line) for line in source if line.strip()]
+
+
+def _resolved(result: Any) -> Any:
+    return result
+
+
+def _archive_months(pages: Iterable[List[Dict]], month_of: Callable[[Dict], str], delete: Callable[[List[int]], Any],
+                    household_id: int, table: str, columns: List[str], archive: Archive, batch_size: int,
+                    report: RetentionReport, call: Callable[[Any], Any]) -> int:
+    """Write each month's file once the pages have moved past the month, then delete its rows
+
+    ``pages`` yields the rows ordered by the column their month comes from, so
+    a month is complete when a row of another month shows up; each month's
+    file is written once per run. Returns the number of rows deleted.
+    """
+    removed = 0
+
+    def settle(month: str, rows: List[Dict]) -> int:
+        report.add_file(archive.write(household_id, table, f"month={month}", rows, columns))
+        ids = [row['id'] for row in rows]
+        return sum(call(delete(ids[i:i + batch_size])) for i in range(0, len(ids), batch_size))
+
+    month, rows = None, []
+    for page in pages:
+        for row in page:
+            if month_of(row) != month and rows:
+                removed += settle(month, rows)
+                rows = []
+            month = month_of(row)
+            rows.append(row)
+    if rows:
+        removed += settle(month, rows)
+    return removed
+
+
+def _pages(fetch: Callable[[Optional[Tuple[str, int]]], Any], cursor_column: str, batch_size: int,
+           call: Callable[[Any], Any]) -> Iterator[List[Dict]]:
+    """Pages of ``batch_size`` rows, each fetched after the (cursor_column, id) of the last row"""
+    after = None
+    while True:
+        rows = call(fetch(after))
+        if rows:
+            yield rows
+        if len(rows) < batch_size:
+            return
+        after = (rows[-1][cursor_column], rows[-1]['id'])
+
+
+def archive_completions(db, household_id: int, before: str, archive: Archive, batch_size: int,
+                        report: RetentionReport, call: Callable[[Any], Any] = _resolved):
+    """Move completions older than ``before`` to monthly archive files and rollups, oldest first"""
+    pages = _pages(lambda after: db.select_old_completions(household_id, before, batch_size, after=after),
+                   "completed_at", batch_size, call)
+    report.completions += _archive_months(
+        pages, lambda row: str(row['completed_at'])[:7],
+        lambda ids: db.archive_completions(household_id, ids),
+        household_id, "completions", COMPLETION_COLUMNS, archive, batch_size, report, call)
+
+
+def clear_completed_tasks(db, household_id: int, archive: Archive, batch_size: int, report: RetentionReport,
+                          call: Callable[[Any], Any] = _resolved):
+    """Move tasks marked completed to archive files (importable with data_io.py) and delete them
+
+    Tasks are filed by the month they were created, the order they are paged in.
+    """
+    pages = _pages(lambda after: db.select_full_tasks_page(household_id, {"status": Status.COMPLETED.value},
+                                                           page_size=batch_size, after=after),
+                   "created_at", batch_size, call)
+    report.tasks += _archive_months(
+        pages, lambda row: str(row.get('created_at') or "unknown")[:7],
+        lambda ids: db.delete_tasks(household_id, ids),
+        household_id, "tasks", EXPORT_COLUMNS, archive, batch_size, report, call)
+
+
+def apply_retention(db, household_id: int, days: int = RETENTION_DAYS, clear_completed: bool = True,
+                    archive: Optional[Archive] = None, batch_size: int = ARCHIVE_BATCH_SIZE,
+                    call: Callable[[Any], Any] = _resolved, today: Optional[date] = None) -> RetentionReport:
+    """Archive and roll up everything older than ``days`` (and the completed tasks) of one household
+
+    ``call`` resolves each backend result; the sync facade over the async
+    layer passes its event-loop runner.
+    """
+    if days < MIN_RETENTION_DAYS:
+        raise InvalidInput(f"Keep at least {MIN_RETENTION_DAYS} days of history (got {days})")
+    if batch_size < 1:
+        raise InvalidInput("The archive batch size must be positive")
+    archive = archive or Archive()
+    before = ((today or date.today()) - timedelta(days=days)).isoformat()
+    report = RetentionReport()
+    archive_completions(db, household_id, before, archive, batch_size, report, call)
+    if clear_completed:
+        clear_completed_tasks(db, household_id, archive, batch_size, report, call)
+    # Replicas sync every few seconds; a deletion this old has reached all of them
+    report.tombstones = call(db.prune_tombstones(household_id, before))
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Archive old completions and completed tasks")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="archive, roll up and delete old data")
+    run_parser.add_argument("--days", type=int, default=RETENTION_DAYS, help="days of history to keep")
+    run_parser.add_argument("--keep-completed", action="store_true", help="leave completed tasks in place")
+    rollups_parser = commands.add_parser("rollups", help="print the archived completions per month and member")
+    for command_parser in (run_parser, rollups_parser):
+        command_parser.add_argument("--household", type=int, help="household id (default: HOUSEHOLD_ID)")
+    args = parser.parse_args(argv)
+
+    from database import HOUSEHOLD_ID
+    from task_manager import CleaningTaskManager
+
+    # Writes go straight to the backend: a one-shot command must not leave them queued in the journal
+    manager = CleaningTaskManager(household_id=args.household or HOUSEHOLD_ID, journal_path=None)
+    if args.command == "rollups":
+        for rollup in manager.get_completion_rollups():
+            print(f"{str(rollup['month'])[:7]}  {rollup['person']:<12} {rollup['completions']:>6}")
+        return 0
+    report = manager.apply_retention(args.days, clear_completed=not args.keep_completed)
+    if report is None:
+        return 1
+    print(f"🗄️ Archived {report.completions} completions and {report.tasks} completed tasks "
+          f"into {len(report.files)} files; pruned {report.tombstones} tombstones")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
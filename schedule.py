@@ -0,0 +1,88 @@
+"""
+Recurrence rules for the task frequencies.
+
+Each frequency label is a rule: a step of days or calendar months. A task
+is due one step after it was last completed (or created), and completing
+it moves the due date to one step after the completion. "As needed" tasks
+have no rule and no due date.
+
+The same rules exist as SQL in SQLiteBackend and sql/004_task_schedule.sql, so
+the database can stamp due dates on every task of a household in one
+statement and answer "overdue" and "due this week" from an index.
+"""
+
+import calendar
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from models import Frequency, Task
+from storage import next_member
+
+FREQUENCIES = Frequency.values()
+
+# frequency -> (days, months) added per occurrence; missing means unscheduled
+RULES: Dict[str, Tuple[int, int]] = {
+    Frequency.DAILY: (1, 0),
+    Frequency.WEEKLY: (7, 0),
+    Frequency.BI_WEEKLY: (14, 0),
+    Frequency.MONTHLY: (0, 1),
+}
+
+
+# "As needed" (and free-text) frequencies have no rule; they count as about once a month
+UNSCHEDULED_PER_WEEK = 12 / 52
+
+
+def occurrences_per_week(frequency: str) -> float:
+    """Average recurrences per week: 7 for Daily, about 0.23 for Monthly (so ~30 times less load)"""
+    rule = RULES.get(frequency)
+    if rule is None:
+        return UNSCHEDULED_PER_WEEK
+    days, months = rule
+    return 7 / (days + months * 365.25 / 12)
+
+
+def add_months(day: date, months: int) -> date:
+    """Same day ``months`` later, clamped to the end of shorter months (Jan 31 -> Feb 28)"""
+    month_index = day.month - 1 + months
+    year, month = day.year + month_index // 12, month_index % 12 + 1
+    return day.replace(year=year, month=month, day=min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def step(frequency: str, day: date, occurrences: int = 1) -> Optional[date]:
+    """Date ``occurrences`` steps of the frequency's rule after ``day``; None for unscheduled frequencies"""
+    rule = RULES.get(frequency)
+    if rule is None:
+        return None
+    days, months = rule
+    if months:
+        return add_months(day, months * occurrences)
+    return day + timedelta(days=days * occurrences)
+
+
+def next_due(frequency: str, last_done: date) -> Optional[date]:
+    """Due date of a task last completed (or created) on ``last_done``"""
+    return step(frequency, last_done)
+
+
+def rotation_calendar(tasks: Iterable[Task], members: List[str], start: date, end: date) -> List[Dict]:
+    """Every occurrence of the scheduled tasks between start and end (inclusive), with whose turn it is
+
+    Occurrences assume each task is done on its due date, so it returns one
+    step later to the next member of the ring; overdue tasks are placed on
+    ``start``. Sorted by date, then task name.
+    """
+    occurrences = []
+    for task in tasks:
+        if task.frequency not in RULES or not task.due_date:
+            continue
+        first = max(date.fromisoformat(task.due_date[:10]), start)
+        assignee, day, count = task.assigned_to, first, 0
+        while day <= end:
+            occurrences.append({"date": day, "task_id": task.id, "task_name": task.task_name,
+                                "room": task.room, "assigned_to": assignee})
+            assignee = next_member(members, assignee)
+            count += 1
+            # Step from the first occurrence so month-end days do not drift (Jan 31, Feb 28, Mar 31)
+            day = step(task.frequency, first, count)
+    return sorted(occurrences, key=lambda occurrence: (occurrence['date'], occurrence['task_name']))
@@ -1,39 +1,29 @@
 """
 Database setup script for Cleaning Task Manager
-Run this script to create the required table in your Supabase database.
+Run this script to create the schema in your Supabase database (migrations in sql/).
 """
 
+import os
 from database import SupabaseClient
-import streamlit as st
+from migrations import migrate_postgres
 
 def create_table():
-    """Create the cleaning_tasks table in Supabase"""
+    """Apply the schema migrations and add sample tasks"""
     
-    # SQL to create the table
-    create_table_sql = """
-    CREATE TABLE IF NOT EXISTS cleaning_tasks (
-        id SERIAL PRIMARY KEY,
-        task_name VARCHAR(255) NOT NULL,
-        assigned_to VARCHAR(50) NOT NULL,
-        room VARCHAR(100) NOT NULL,
-        frequency VARCHAR(50) NOT NULL,
-        description TEXT,
-        status VARCHAR(20) DEFAULT 'pending',
-        due_date DATE,
-        created_at TIMESTAMP DEFAULT NOW(),
-        completed_at TIMESTAMP
-    );
-    """
+    # Supabase's API cannot run DDL; migrations need a direct database connection
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        print("❌ DATABASE_URL is not set (Supabase > Project Settings > Database > Connection string)")
+        print("\nPlease set it, or paste the output of `python migrations.py sql` into the SQL Editor.")
+        return False
     
     try:
+        applied = migrate_postgres(database_url)
+        print(f"✅ Schema up to date ({len(applied)} migration(s) applied)")
+        
         # Initialize Supabase client
         db = SupabaseClient().get_client()
         
-        # Execute the SQL
-        result = db.rpc('exec_sql', {'sql': create_table_sql}).execute()
-        
-        print("✅ Table 'cleaning_tasks' created successfully!")
-        
         # Add some sample data
         sample_tasks = [
             {
@@ -73,8 +63,8 @@ def create_table():
         
     except Exception as e:
         print(f"❌ Error creating table: {str(e)}")
-        print("\nPlease create the table manually using the SQL Editor in Supabase:")
-        print(create_table_sql)
+        print("\nPlease create the schema manually: paste the output of `python migrations.py sql` "
+              "into the SQL Editor in Supabase")
         return False
 
 def verify_setup():
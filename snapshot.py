@@ -0,0 +1,131 @@
+"""
+One read of a household's tasks, shared by every page and widget of a rerun.
+
+TaskSnapshot takes the task list once and indexes it by status, person and
+room in a single pass, counting every combination of those filters as it
+goes, so the dashboard cards, the banners, the manage-page filters and the
+statistics charts all read the same rows and every count is a dict lookup.
+The same pass counts each member's pending tasks per frequency, from which
+``carried_load`` weighs the load they carry by how often each task recurs.
+"""
+
+from bisect import bisect_left
+from collections import Counter
+from datetime import date, timedelta
+from itertools import product
+from typing import Dict, List, Optional, Tuple
+
+from fairness import carried_load
+from models import Status, Task
+from schedule import rotation_calendar
+from storage import next_member
+
+Filters = Tuple[Optional[str], Optional[str], Optional[str]]
+
+
+class TaskSnapshot:
+    """A household's tasks (newest first) and its members, indexed for one rerun"""
+
+    def __init__(self, tasks: List[Task], members: List[str], today: Optional[date] = None):
+        self.tasks = tasks
+        self.members = members
+        self.today = today or date.today()
+        self.by_status: Dict[str, List[Task]] = {}
+        self.by_person: Dict[str, List[Task]] = {}
+        self.by_room: Dict[str, List[Task]] = {}
+        self.by_frequency: Counter = Counter()
+        combinations: Counter = Counter()
+        self._selected: Dict[Filters, Tuple[List[Task], List[Tuple[str, int]]]] = {}
+        today_iso = self.today.isoformat()
+        week_end = (self.today + timedelta(days=6 - self.today.weekday())).isoformat()
+        self.overdue = 0
+        self.due_this_week = 0
+        # (member, frequency) -> pending tasks
+        pending_load: Counter = Counter()
+        for task in tasks:
+            self.by_status.setdefault(task.status, []).append(task)
+            self.by_person.setdefault(task.assigned_to, []).append(task)
+            self.by_room.setdefault(task.room, []).append(task)
+            self.by_frequency[task.frequency] += 1
+            combinations[task.assigned_to, task.status, task.room] += 1
+            if task.status != Status.PENDING:
+                continue
+            pending_load[task.assigned_to, task.frequency] += 1
+            if task.due_date:
+                due = task.due_date[:10]
+                if due < today_iso:
+                    self.overdue += 1
+                elif due <= week_end:
+                    self.due_this_week += 1
+        self.pending_by_person_frequency: Dict[str, Dict[str, int]] = {}
+        for (person, frequency), count in pending_load.items():
+            self.pending_by_person_frequency.setdefault(str(person), {})[str(frequency)] = count
+        # Member -> pending occurrences per week of the tasks assigned to them
+        self.carried = carried_load(self.pending_by_person_frequency, members)
+        # (person, status, room) -> count, with None standing for "any"; rolled up from the few
+        # distinct combinations rather than counted per task
+        self._counts: Counter = Counter()
+        for (person, status, room), count in combinations.items():
+            for key in product((person, None), (status, None), (room, None)):
+                self._counts[key] += count
+        # Same order as the database query: due_date ascending, undated last
+        self.pending = sorted(self.by_status.get(Status.PENDING, []),
+                              key=lambda task: (task.due_date is None, task.due_date or ""))
+
+    def __len__(self) -> int:
+        return len(self.tasks)
+
+    def count(self, person: Optional[str] = None, status: Optional[str] = None, room: Optional[str] = None) -> int:
+        """Number of tasks matching the set filters"""
+        return self._counts[(person, status, room)]
+
+    def select(self, person: Optional[str] = None, status: Optional[str] = None,
+               room: Optional[str] = None) -> List[Task]:
+        """Tasks matching the set filters, newest first"""
+        return self._select((person, status, room))[0]
+
+    def _select(self, filters: Filters) -> Tuple[List[Task], List[Tuple[str, int]]]:
+        """Matching tasks and their (created_at, id) keys in ascending order, built once per filter"""
+        if filters not in self._selected:
+            person, status, room = filters
+            # Scan the narrowest index that applies and check the other filters on it
+            candidates = min((index[value] if value in index else [] for index, value in
+                              ((self.by_person, person), (self.by_status, status), (self.by_room, room))
+                              if value is not None), key=len, default=self.tasks)
+            tasks = [task for task in candidates
+                     if (person is None or task.assigned_to == person) and (status is None or task.status == status)
+                     and (room is None or task.room == room)]
+            self._selected[filters] = tasks, [(task.created_at or "", task.id) for task in reversed(tasks)]
+        return self._selected[filters]
+
+    def page(self, person: Optional[str] = None, status: Optional[str] = None, room: Optional[str] = None,
+             page_size: int = 25, after: Optional[Tuple[str, int]] = None) -> Tuple[List[Task], Optional[Tuple[str, int]]]:
+        """One page of matching tasks after the keyset cursor, and the cursor of the next page"""
+        tasks, keys = self._select((person, status, room))
+        start = 0
+        if after is not None:
+            # Rows older than the cursor; keys run oldest first, the tasks newest first
+            start = len(tasks) - bisect_left(keys, (after[0] or "", after[1]))
+        rows = tasks[start:start + page_size]
+        if start + page_size >= len(tasks):
+            return rows, None
+        return rows, (rows[-1].created_at, rows[-1].id)
+
+    def next_assignee(self, current: str) -> str:
+        """Who a task goes to after ``current`` completes it"""
+        return next_member(self.members, current)
+
+    def rotation_calendar(self, days: int = 14) -> List[Dict]:
+        """Who does which scheduled task on which day over the coming ``days`` days"""
+        return rotation_calendar(self.pending, self.members, self.today, self.today + timedelta(days=days - 1))
+
+    def stats(self) -> Dict:
+        """Task counts in the shape of StorageBackend.task_stats, without daily_completions"""
+        def counts(index):
+            return {str(key): len(tasks) for key, tasks in index.items()}
+
+        return {"total": len(self.tasks), "by_person": counts(self.by_person), "by_status": counts(self.by_status),
+                "by_room": counts(self.by_room),
+                "by_frequency": {str(key): count for key, count in self.by_frequency.items()},
+                "pending_by_person_frequency": self.pending_by_person_frequency,
+                "overdue": self.overdue, "due_this_week": self.due_this_week}
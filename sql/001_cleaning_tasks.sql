@@ -0,0 +1,14 @@
+-- The tasks table as first released. Later migrations add household_id,
+-- updated_at and version, and the indexes every query relies on.
+CREATE TABLE IF NOT EXISTS cleaning_tasks (
+    id SERIAL PRIMARY KEY,
+    task_name VARCHAR(255) NOT NULL,
+    assigned_to VARCHAR(50) NOT NULL,
+    room VARCHAR(100) NOT NULL,
+    frequency VARCHAR(50) NOT NULL,
+    description TEXT,
+    status VARCHAR(20) DEFAULT 'pending',
+    due_date DATE,
+    created_at TIMESTAMP DEFAULT NOW(),
+    completed_at TIMESTAMP
+);
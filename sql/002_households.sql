@@ -0,0 +1,80 @@
+-- Households and their rotation rings. The later migrations scope every table
+-- and function by household_id.
+-- Existing single-couple data becomes household 1 with its original rotation.
+CREATE TABLE IF NOT EXISTS households (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    created_at TIMESTAMP DEFAULT NOW()
+);
+
+-- Tasks pass from each member to the member at the next position, wrapping around
+CREATE TABLE IF NOT EXISTS household_members (
+    household_id INTEGER NOT NULL REFERENCES households(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name VARCHAR(50) NOT NULL,
+    PRIMARY KEY (household_id, position),
+    UNIQUE (household_id, name)
+);
+
+INSERT INTO households (id, name) VALUES (1, 'Home') ON CONFLICT (id) DO NOTHING;
+INSERT INTO household_members (household_id, position, name)
+SELECT 1, position, name FROM (VALUES (0, 'Fernand'), (1, 'Yvonne')) AS defaults (position, name)
+WHERE NOT EXISTS (SELECT 1 FROM household_members WHERE household_id = 1);
+SELECT setval(pg_get_serial_sequence('households', 'id'), (SELECT max(id) FROM households));
+
+ALTER TABLE cleaning_tasks ADD COLUMN IF NOT EXISTS household_id INTEGER NOT NULL DEFAULT 1 REFERENCES households(id);
+
+-- Member after current_member in the household ring; the first member when
+-- current_member is not in the ring, unchanged when the ring is empty
+CREATE OR REPLACE FUNCTION next_member(household INTEGER, current_member VARCHAR)
+RETURNS VARCHAR
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT coalesce(
+        (SELECT n.name FROM household_members c
+         JOIN household_members n ON n.household_id = c.household_id AND n.position > c.position
+         WHERE c.household_id = household AND c.name = current_member
+         ORDER BY n.position LIMIT 1),
+        (SELECT f.name FROM household_members f WHERE f.household_id = household ORDER BY f.position LIMIT 1),
+        current_member
+    );
+$$;
+
+-- rpc('get_household', {"household": 1}) -> {"id", "name", "members": [...]} or null
+CREATE OR REPLACE FUNCTION get_household(household INTEGER)
+RETURNS json
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT json_build_object(
+        'id', h.id,
+        'name', h.name,
+        'members', (SELECT coalesce(json_agg(m.name ORDER BY m.position), '[]'::json)
+                    FROM household_members m WHERE m.household_id = h.id)
+    )
+    FROM households h WHERE h.id = household;
+$$;
+
+-- rpc('save_household', {"household": null | id, "name": ..., "members": [...]})
+-- creates or renames a household and replaces its ring in one transaction
+CREATE OR REPLACE FUNCTION save_household(household INTEGER, name VARCHAR, members VARCHAR[])
+RETURNS json
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    saved_id INTEGER;
+BEGIN
+    IF household IS NULL THEN
+        INSERT INTO households (name) VALUES (save_household.name) RETURNING id INTO saved_id;
+    ELSE
+        INSERT INTO households (id, name) VALUES (household, save_household.name)
+        ON CONFLICT (id) DO UPDATE SET name = EXCLUDED.name;
+        saved_id := household;
+    END IF;
+    DELETE FROM household_members WHERE household_id = saved_id;
+    INSERT INTO household_members (household_id, position, name)
+    SELECT saved_id, ordinality - 1, member FROM unnest(members) WITH ORDINALITY AS ring (member, ordinality);
+    RETURN get_household(saved_id);
+END;
+$$;
@@ -0,0 +1,18 @@
+-- Append-only completion log. One row is written for every task rotation, in the
+-- same statement as the rotation itself (see 006_complete_and_rotate_tasks.sql).
+CREATE TABLE IF NOT EXISTS task_completions (
+    id BIGSERIAL PRIMARY KEY,
+    household_id INTEGER NOT NULL DEFAULT 1 REFERENCES households(id),
+    task_id INTEGER REFERENCES cleaning_tasks(id) ON DELETE SET NULL,
+    completed_by VARCHAR(50) NOT NULL,
+    completed_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+ALTER TABLE task_completions ADD COLUMN IF NOT EXISTS household_id INTEGER NOT NULL DEFAULT 1 REFERENCES households(id);
+
+-- Weekly / monthly / yearly history are range scans within one household
+DROP INDEX IF EXISTS task_completions_completed_at_idx;
+DROP INDEX IF EXISTS task_completions_completed_by_idx;
+CREATE INDEX IF NOT EXISTS task_completions_household_completed_at_idx
+    ON task_completions (household_id, completed_at);
+CREATE INDEX IF NOT EXISTS task_completions_household_completed_by_idx
+    ON task_completions (household_id, completed_by, completed_at);
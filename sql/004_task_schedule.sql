@@ -0,0 +1,43 @@
+-- Recurrence rules and persisted due dates. A task is due one step of its
+-- frequency after its last completion (or its creation); "As needed" tasks have
+-- no due date. The rules mirror RULES in schedule.py.
+CREATE OR REPLACE FUNCTION next_due(frequency VARCHAR, last_done DATE)
+RETURNS DATE
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT (last_done + CASE frequency
+        WHEN 'Daily' THEN INTERVAL '1 day'
+        WHEN 'Weekly' THEN INTERVAL '7 days'
+        WHEN 'Bi-weekly' THEN INTERVAL '14 days'
+        WHEN 'Monthly' THEN INTERVAL '1 month'
+    END)::date;
+$$;
+
+-- "Overdue" and "due this week" are range scans within one household's pending tasks
+CREATE INDEX IF NOT EXISTS cleaning_tasks_household_status_due_date_idx
+    ON cleaning_tasks (household_id, status, due_date);
+-- Last completion of a task, for stamping due dates
+CREATE INDEX IF NOT EXISTS task_completions_task_completed_at_idx ON task_completions (task_id, completed_at);
+
+-- Stamp a due date on every scheduled task of the household that has none, in one
+-- statement. Called as rpc('schedule_tasks', {"household": 1}) after imports;
+-- returns the number of tasks stamped.
+CREATE OR REPLACE FUNCTION schedule_tasks(household INTEGER)
+RETURNS INTEGER
+LANGUAGE sql
+AS $$
+    WITH stamped AS (
+        UPDATE cleaning_tasks t
+        SET due_date = next_due(t.frequency, COALESCE(
+            (SELECT max(c.completed_at) FROM task_completions c WHERE c.task_id = t.id), t.created_at)::date)
+        WHERE t.household_id = household
+          AND t.due_date IS NULL
+          AND next_due(t.frequency, CURRENT_DATE) IS NOT NULL
+        RETURNING 1
+    )
+    SELECT count(*)::integer FROM stamped;
+$$;
+
+-- Schedule the tasks that existed before due dates were kept
+SELECT schedule_tasks(id) FROM households;
@@ -0,0 +1,19 @@
+-- Row versions for optimistic concurrency. Every update of a task bumps its
+-- version, so a writer that read version N can make its update conditional on
+-- `version = N` and learn from an empty result that someone else got there
+-- first, without holding a lock while the user edits.
+ALTER TABLE cleaning_tasks ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+
+CREATE OR REPLACE FUNCTION cleaning_tasks_bump_version() RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    NEW.version := OLD.version + 1;
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS cleaning_tasks_bump_version ON cleaning_tasks;
+CREATE TRIGGER cleaning_tasks_bump_version
+    BEFORE UPDATE ON cleaning_tasks
+    FOR EACH ROW EXECUTE FUNCTION cleaning_tasks_bump_version();
@@ -0,0 +1,41 @@
+-- Atomically mark tasks done, log the completion, hand them to the next member
+-- of the household's rotation ring and schedule their next due date.
+-- Called through PostgREST as
+--   rpc('complete_and_rotate_tasks', {"household": 1, "task_ids": [...], "versions": [...]}),
+-- so rotating one or many tasks is a single round trip and a single statement.
+-- With versions, a task only rotates if it is still at the version the caller
+-- saw; a second "Done" on the same rendering of a task is a no-op. Without
+-- them, the version read by the statement itself is checked, so two
+-- concurrent calls cannot both rotate (and log) the same task. Only the tasks
+-- that rotated are returned. No rows are locked beyond the UPDATE itself.
+-- Tasks of other households are left alone.
+DROP FUNCTION IF EXISTS complete_and_rotate_tasks(INTEGER[]);
+DROP FUNCTION IF EXISTS complete_and_rotate_tasks(INTEGER, INTEGER[]);
+
+CREATE OR REPLACE FUNCTION complete_and_rotate_tasks(household INTEGER, task_ids INTEGER[],
+                                                     versions INTEGER[] DEFAULT NULL)
+RETURNS SETOF cleaning_tasks
+LANGUAGE sql
+AS $$
+    WITH done AS (
+        SELECT t.id, t.assigned_to, t.version
+        FROM cleaning_tasks t
+        JOIN unnest(task_ids, versions) AS expected(id, version) ON expected.id = t.id
+        WHERE t.household_id = household
+          AND (expected.version IS NULL OR expected.version = t.version)
+    ), rotated AS (
+        -- A concurrent rotation bumps the version first; the WHERE is re-checked then and skips the row
+        UPDATE cleaning_tasks t
+        SET assigned_to = next_member(t.household_id, t.assigned_to),
+            status = 'pending',
+            due_date = next_due(t.frequency, CURRENT_DATE),
+            completed_at = NULL
+        FROM done
+        WHERE t.id = done.id AND t.version = done.version
+        RETURNING t.*
+    ), logged AS (
+        INSERT INTO task_completions (household_id, task_id, completed_by)
+        SELECT rotated.household_id, rotated.id, done.assigned_to FROM rotated JOIN done ON done.id = rotated.id
+    )
+    SELECT * FROM rotated;
+$$;
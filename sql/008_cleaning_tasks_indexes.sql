@@ -0,0 +1,7 @@
+-- Keyset pagination on (created_at, id) within a household, for Manage Tasks
+-- and streaming exports. Without it every page of an export re-sorts the
+-- table. Leading with household_id keeps a household's pages as cheap as if
+-- it had the table to itself; it replaces the single-tenant index.
+DROP INDEX IF EXISTS cleaning_tasks_created_at_id_idx;
+CREATE INDEX IF NOT EXISTS cleaning_tasks_household_created_at_id_idx
+    ON cleaning_tasks (household_id, created_at DESC, id DESC);
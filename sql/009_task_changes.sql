@@ -0,0 +1,60 @@
+-- Change feed for incremental sync.
+-- Every insert/update stamps updated_at, every delete leaves a tombstone, and
+-- rpc('task_changes', {"household": 1, "since": ...}) returns only what changed in
+-- that household after `since` in one round trip.
+ALTER TABLE cleaning_tasks ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP NOT NULL DEFAULT NOW();
+DROP INDEX IF EXISTS cleaning_tasks_updated_at_idx;
+CREATE INDEX IF NOT EXISTS cleaning_tasks_household_updated_at_idx ON cleaning_tasks (household_id, updated_at);
+
+CREATE OR REPLACE FUNCTION cleaning_tasks_touch() RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    NEW.updated_at := clock_timestamp();
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS cleaning_tasks_touch ON cleaning_tasks;
+CREATE TRIGGER cleaning_tasks_touch
+    BEFORE INSERT OR UPDATE ON cleaning_tasks
+    FOR EACH ROW EXECUTE FUNCTION cleaning_tasks_touch();
+
+CREATE TABLE IF NOT EXISTS task_tombstones (
+    task_id INTEGER PRIMARY KEY,
+    household_id INTEGER NOT NULL DEFAULT 1,
+    deleted_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+ALTER TABLE task_tombstones ADD COLUMN IF NOT EXISTS household_id INTEGER NOT NULL DEFAULT 1;
+DROP INDEX IF EXISTS task_tombstones_deleted_at_idx;
+CREATE INDEX IF NOT EXISTS task_tombstones_household_deleted_at_idx ON task_tombstones (household_id, deleted_at);
+
+CREATE OR REPLACE FUNCTION cleaning_tasks_tombstone() RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO task_tombstones (task_id, household_id, deleted_at) VALUES (OLD.id, OLD.household_id, clock_timestamp())
+    ON CONFLICT (task_id) DO UPDATE SET household_id = EXCLUDED.household_id, deleted_at = EXCLUDED.deleted_at;
+    RETURN OLD;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS cleaning_tasks_tombstone ON cleaning_tasks;
+CREATE TRIGGER cleaning_tasks_tombstone
+    AFTER DELETE ON cleaning_tasks
+    FOR EACH ROW EXECUTE FUNCTION cleaning_tasks_tombstone();
+
+DROP FUNCTION IF EXISTS task_changes(TIMESTAMP);
+
+CREATE OR REPLACE FUNCTION task_changes(household INTEGER, since TIMESTAMP)
+RETURNS json
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT json_build_object(
+        'rows', (SELECT coalesce(json_agg(t), '[]'::json) FROM cleaning_tasks t
+                 WHERE t.household_id = household AND t.updated_at > since),
+        'deleted', (SELECT coalesce(json_agg(json_build_object('id', task_id, 'deleted_at', deleted_at)), '[]'::json)
+                    FROM task_tombstones WHERE household_id = household AND deleted_at > since)
+    );
+$$;
@@ -0,0 +1,10 @@
+-- Manage Tasks filters by person, status or room and pages newest first. Each
+-- filter gets an index that serves both the filter and the (created_at, id)
+-- order, so a filtered page reads page_size rows instead of sorting every
+-- match, and a filtered count only touches the matching index range.
+CREATE INDEX IF NOT EXISTS cleaning_tasks_household_assigned_to_created_at_idx
+    ON cleaning_tasks (household_id, assigned_to, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS cleaning_tasks_household_status_created_at_idx
+    ON cleaning_tasks (household_id, status, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS cleaning_tasks_household_room_created_at_idx
+    ON cleaning_tasks (household_id, room, created_at DESC, id DESC);
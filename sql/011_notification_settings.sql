@@ -0,0 +1,59 @@
+-- Overdue alerts and daily digests (digest.py): who gets them and how far the
+-- worker got. recipients maps member names to e-mail addresses.
+CREATE TABLE IF NOT EXISTS notification_settings (
+    household_id INTEGER PRIMARY KEY REFERENCES households(id) ON DELETE CASCADE,
+    overdue_alerts BOOLEAN NOT NULL DEFAULT FALSE,
+    daily_digest BOOLEAN NOT NULL DEFAULT FALSE,
+    recipients JSONB NOT NULL DEFAULT '{}'::jsonb,
+    -- Overdue alerts were sent for the tasks due before this day
+    alerted_through DATE,
+    digest_sent_on DATE
+);
+
+-- The worker reads the households that have something switched on in one query
+CREATE INDEX IF NOT EXISTS notification_settings_enabled_idx
+    ON notification_settings (household_id) WHERE overdue_alerts OR daily_digest;
+
+-- rpc('get_notification_settings', {"household": 1}) -> the settings, defaults when none were saved
+CREATE OR REPLACE FUNCTION get_notification_settings(household INTEGER)
+RETURNS json
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT coalesce(
+        (SELECT row_to_json(s) FROM notification_settings s WHERE s.household_id = household),
+        json_build_object('household_id', household, 'overdue_alerts', false, 'daily_digest', false,
+                          'recipients', '{}'::json, 'alerted_through', null, 'digest_sent_on', null)
+    );
+$$;
+
+-- rpc('save_notification_settings', {"household": 1, "settings": {...}}) updates the keys given
+CREATE OR REPLACE FUNCTION save_notification_settings(household INTEGER, settings JSONB)
+RETURNS json
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO notification_settings (household_id) VALUES (household) ON CONFLICT (household_id) DO NOTHING;
+    UPDATE notification_settings SET
+        overdue_alerts = coalesce((settings->>'overdue_alerts')::boolean, overdue_alerts),
+        daily_digest = coalesce((settings->>'daily_digest')::boolean, daily_digest),
+        recipients = coalesce(settings->'recipients', recipients),
+        alerted_through = CASE WHEN settings ? 'alerted_through'
+                               THEN (settings->>'alerted_through')::date ELSE alerted_through END,
+        digest_sent_on = CASE WHEN settings ? 'digest_sent_on'
+                              THEN (settings->>'digest_sent_on')::date ELSE digest_sent_on END
+    WHERE household_id = household;
+    RETURN get_notification_settings(household);
+END;
+$$;
+
+-- rpc('enabled_notification_settings') -> settings of every household with alerts or digests on, with its name
+CREATE OR REPLACE FUNCTION enabled_notification_settings()
+RETURNS json
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT coalesce(json_agg(row_to_json(s)::jsonb || jsonb_build_object('household_name', h.name)), '[]'::json)
+    FROM notification_settings s JOIN households h ON h.id = s.household_id
+    WHERE s.overdue_alerts OR s.daily_digest;
+$$;
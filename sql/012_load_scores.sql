@@ -0,0 +1,42 @@
+-- Rolling mental-load score per member (fairness.py). Every completion decays the
+-- member's score by its age (halving every 14 days, fairness.HALF_LIFE_DAYS) and
+-- adds 1, so the score stays current in O(1) per completion and the app reads one
+-- row per member instead of summing the completion history.
+CREATE TABLE IF NOT EXISTS load_scores (
+    household_id INTEGER NOT NULL REFERENCES households(id) ON DELETE CASCADE,
+    person VARCHAR(50) NOT NULL,
+    score DOUBLE PRECISION NOT NULL,
+    -- The moment the score is valid at (its latest completion)
+    scored_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (household_id, person)
+);
+
+CREATE OR REPLACE FUNCTION record_load_score()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO load_scores AS s (household_id, person, score, scored_at)
+    VALUES (NEW.household_id, NEW.completed_by, 1, NEW.completed_at)
+    ON CONFLICT (household_id, person) DO UPDATE SET
+        score = CASE WHEN EXCLUDED.scored_at >= s.scored_at
+            THEN s.score * power(0.5, extract(epoch FROM EXCLUDED.scored_at - s.scored_at) / 86400.0 / 14) + 1
+            ELSE s.score + power(0.5, extract(epoch FROM s.scored_at - EXCLUDED.scored_at) / 86400.0 / 14) END,
+        scored_at = greatest(s.scored_at, EXCLUDED.scored_at);
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS task_completions_load_score ON task_completions;
+CREATE TRIGGER task_completions_load_score
+    AFTER INSERT ON task_completions
+    FOR EACH ROW EXECUTE FUNCTION record_load_score();
+
+-- Scores of the history so far
+INSERT INTO load_scores (household_id, person, score, scored_at)
+SELECT household_id, completed_by, sum(power(0.5, extract(epoch FROM latest - completed_at) / 86400.0 / 14)), latest
+FROM (SELECT household_id, completed_by, completed_at,
+             max(completed_at) OVER (PARTITION BY household_id, completed_by) AS latest
+      FROM task_completions) c
+GROUP BY household_id, completed_by, latest
+ON CONFLICT (household_id, person) DO NOTHING;
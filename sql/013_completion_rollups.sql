@@ -0,0 +1,33 @@
+-- Retention (retention.py): completions older than RETENTION_DAYS are written
+-- to archive files and then folded into monthly per-member counts here, so the
+-- completion log stays small however many years the app has run.
+-- Called through PostgREST as
+--   rpc('archive_completions', {"household": 1, "completion_ids": [...]})
+-- once per batch; counting and deleting happen in one statement, so a batch is
+-- either rolled up and removed or left entirely in place. Load scores
+-- (012_load_scores.sql) are kept by their trigger and do not change.
+CREATE TABLE IF NOT EXISTS completion_rollups (
+    household_id INTEGER NOT NULL REFERENCES households(id) ON DELETE CASCADE,
+    month DATE NOT NULL,
+    person VARCHAR(50) NOT NULL,
+    completions INTEGER NOT NULL,
+    PRIMARY KEY (household_id, month, person)
+);
+
+CREATE OR REPLACE FUNCTION archive_completions(household INTEGER, completion_ids BIGINT[])
+RETURNS INTEGER
+LANGUAGE sql
+AS $$
+    WITH retired AS (
+        DELETE FROM task_completions
+        WHERE household_id = household AND id = ANY(completion_ids)
+        RETURNING completed_by, completed_at
+    ), counted AS (
+        INSERT INTO completion_rollups AS r (household_id, month, person, completions)
+        SELECT household, date_trunc('month', completed_at)::date, completed_by, count(*)
+        FROM retired
+        GROUP BY 2, 3
+        ON CONFLICT (household_id, month, person) DO UPDATE SET completions = r.completions + EXCLUDED.completions
+    )
+    SELECT count(*)::integer FROM retired;
+$$;
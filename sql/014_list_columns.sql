@@ -0,0 +1,19 @@
+-- The change feed carries the list columns only (storage.LIST_COLUMNS), like every
+-- other task list: not the free-text description, which the app reads on its own
+-- where it shows it or with the full row when an edit opens, nor household_id, which
+-- the caller already knows. Same signature as in 009_task_changes.sql.
+CREATE OR REPLACE FUNCTION task_changes(household INTEGER, since TIMESTAMP)
+RETURNS json
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT json_build_object(
+        'rows', (SELECT coalesce(json_agg(t), '[]'::json)
+                 FROM (SELECT id, task_name, assigned_to, room, frequency, status, due_date, created_at,
+                              completed_at, updated_at, version
+                       FROM cleaning_tasks
+                       WHERE household_id = household AND updated_at > since) t),
+        'deleted', (SELECT coalesce(json_agg(json_build_object('id', task_id, 'deleted_at', deleted_at)), '[]'::json)
+                    FROM task_tombstones WHERE household_id = household AND deleted_at > since)
+    );
+$$;
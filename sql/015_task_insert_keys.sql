@@ -0,0 +1,26 @@
+-- Idempotent inserts for the local write journal (journal.py). Every queued
+-- insert carries a key generated by the client; replaying it after a crash
+-- that struck between the insert and the journal's acknowledgement finds the
+-- task it created instead of adding a second one.
+-- Called through PostgREST as
+--   rpc('insert_task_once', {"household": 1, "task": {...}, "key": "..."})
+-- and returns the task, whether this call or an earlier one inserted it.
+ALTER TABLE cleaning_tasks ADD COLUMN IF NOT EXISTS insert_key VARCHAR(36);
+CREATE UNIQUE INDEX IF NOT EXISTS cleaning_tasks_household_insert_key_idx
+    ON cleaning_tasks (household_id, insert_key);
+
+CREATE OR REPLACE FUNCTION insert_task_once(household INTEGER, task JSON, key VARCHAR)
+RETURNS SETOF cleaning_tasks
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO cleaning_tasks (household_id, task_name, assigned_to, room, frequency, description, status,
+                                due_date, created_at, completed_at, insert_key)
+    SELECT household, t.task_name, t.assigned_to, t.room, t.frequency, t.description,
+           coalesce(t.status, 'pending'), t.due_date, coalesce(t.created_at, now()), t.completed_at, key
+    FROM json_populate_record(NULL::cleaning_tasks, task) AS t
+    ON CONFLICT (household_id, insert_key) DO NOTHING;
+
+    RETURN QUERY SELECT * FROM cleaning_tasks WHERE household_id = household AND insert_key = key;
+END;
+$$;
@@ -0,0 +1,35 @@
+-- task_stats (sql/007_task_stats.sql) also counts each member's pending tasks
+-- per frequency, so the Statistics page weighs the load they carry without
+-- reading the task list:
+--   'pending_by_person_frequency': {"Fernand": {"Daily": 2, "Weekly": 5}, ...}
+CREATE OR REPLACE FUNCTION task_stats(household INTEGER, today DATE DEFAULT CURRENT_DATE)
+RETURNS json
+LANGUAGE sql
+STABLE
+AS $$
+    WITH tasks AS (SELECT * FROM cleaning_tasks WHERE household_id = household)
+    SELECT json_build_object(
+        'total', (SELECT count(*) FROM tasks),
+        'by_person', (SELECT coalesce(json_object_agg(assigned_to, n), '{}'::json)
+                      FROM (SELECT assigned_to, count(*) AS n FROM tasks GROUP BY assigned_to) s),
+        'by_status', (SELECT coalesce(json_object_agg(status, n), '{}'::json)
+                      FROM (SELECT status, count(*) AS n FROM tasks GROUP BY status) s),
+        'by_room', (SELECT coalesce(json_object_agg(room, n), '{}'::json)
+                    FROM (SELECT room, count(*) AS n FROM tasks GROUP BY room) s),
+        'by_frequency', (SELECT coalesce(json_object_agg(frequency, n), '{}'::json)
+                         FROM (SELECT frequency, count(*) AS n FROM tasks GROUP BY frequency) s),
+        'pending_by_person_frequency', (
+            SELECT coalesce(json_object_agg(assigned_to, frequencies), '{}'::json)
+            FROM (SELECT assigned_to, json_object_agg(frequency, n) AS frequencies
+                  FROM (SELECT assigned_to, frequency, count(*) AS n FROM tasks
+                        WHERE status = 'pending' GROUP BY assigned_to, frequency) c
+                  GROUP BY assigned_to) s),
+        'daily_completions', (SELECT coalesce(json_object_agg(day, n ORDER BY day), '{}'::json)
+                              FROM (SELECT completed_at::date AS day, count(*) AS n FROM task_completions
+                                    WHERE household_id = household AND completed_at >= today - 90
+                                    GROUP BY 1) s),
+        'overdue', (SELECT count(*) FROM tasks WHERE status = 'pending' AND due_date < today),
+        'due_this_week', (SELECT count(*) FROM tasks WHERE status = 'pending'
+                          AND due_date BETWEEN today AND today + (7 - extract(isodow FROM today)::int))
+    );
+$$;
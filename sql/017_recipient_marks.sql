@@ -0,0 +1,38 @@
+-- The digest worker (digest.py) records what it sent each recipient as soon
+-- as that message went out, so a household whose batch failed half way is
+-- not sent the same digest twice when the worker tries again:
+--   recipient_marks = {"Fernand": {"digest_sent_on": "2026-10-17", "alerted_through": "2026-10-17"}, ...}
+ALTER TABLE notification_settings ADD COLUMN IF NOT EXISTS recipient_marks JSONB NOT NULL DEFAULT '{}'::jsonb;
+
+CREATE OR REPLACE FUNCTION get_notification_settings(household INTEGER)
+RETURNS json
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT coalesce(
+        (SELECT row_to_json(s) FROM notification_settings s WHERE s.household_id = household),
+        json_build_object('household_id', household, 'overdue_alerts', false, 'daily_digest', false,
+                          'recipients', '{}'::json, 'alerted_through', null, 'digest_sent_on', null,
+                          'recipient_marks', '{}'::json)
+    );
+$$;
+
+CREATE OR REPLACE FUNCTION save_notification_settings(household INTEGER, settings JSONB)
+RETURNS json
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO notification_settings (household_id) VALUES (household) ON CONFLICT (household_id) DO NOTHING;
+    UPDATE notification_settings SET
+        overdue_alerts = coalesce((settings->>'overdue_alerts')::boolean, overdue_alerts),
+        daily_digest = coalesce((settings->>'daily_digest')::boolean, daily_digest),
+        recipients = coalesce(settings->'recipients', recipients),
+        alerted_through = CASE WHEN settings ? 'alerted_through'
+                               THEN (settings->>'alerted_through')::date ELSE alerted_through END,
+        digest_sent_on = CASE WHEN settings ? 'digest_sent_on'
+                              THEN (settings->>'digest_sent_on')::date ELSE digest_sent_on END,
+        recipient_marks = coalesce(settings->'recipient_marks', recipient_marks)
+    WHERE household_id = household;
+    RETURN get_notification_settings(household);
+END;
+$$;
@@ -0,0 +1,1078 @@
+"""
+Storage backends for the cleaning_tasks table.
+
+CleaningTaskManager talks to a StorageBackend instead of a Supabase client so
+the same business logic can run against the hosted database or a local SQLite
+file (dev, CI and the offline kiosk).
+"""
+
+import asyncio
+import functools
+import json
+import math
+import sqlite3
+import threading
+from typing import List, Dict, Optional, Tuple
+
+from migrations import Migration, migrate_sqlite, sqlite_statements
+
+TABLE = "cleaning_tasks"
+COMPLETIONS_TABLE = "task_completions"
+HOUSEHOLDS_TABLE = "households"
+MEMBERS_TABLE = "household_members"
+NOTIFICATIONS_TABLE = "notification_settings"
+LOAD_SCORES_TABLE = "load_scores"
+ROLLUPS_TABLE = "completion_rollups"
+TOMBSTONES_TABLE = "task_tombstones"
+# Columns of task lists (the replica, the pages' snapshot, due tasks and rotated rows): not the
+# free-text description, which views read on its own (select_notes) or with the full row when an
+# edit opens (get_task), nor household_id, which every query is scoped by
+LIST_COLUMNS = ("id", "task_name", "assigned_to", "room", "frequency", "status", "due_date", "created_at",
+                "completed_at", "updated_at", "version")
+LIST_SELECT = ",".join(LIST_COLUMNS)
+
+
+def list_row(row: Dict) -> Dict:
+    """A task row cut down to LIST_COLUMNS, so lists hold one shape whichever write returned the row"""
+    return {column: row[column] for column in LIST_COLUMNS if column in row}
+
+# Columns of completion events; household_id is implied by the scope
+COMPLETION_SELECT = "id,task_id,completed_by,completed_at"
+
+# Household that existing single-couple data belongs to, with its original rotation
+DEFAULT_HOUSEHOLD_ID = 1
+DEFAULT_MEMBERS = ("Fernand", "Yvonne")
+
+
+def next_member(members: List[str], current: str) -> str:
+    """Member after ``current`` in the rotation ring (the first member if ``current`` left the ring)"""
+    if not members:
+        return current
+    if current not in members:
+        return members[0]
+    return members[(members.index(current) + 1) % len(members)]
+
+
+class StorageBackend:
+    """Interface every task storage engine implements
+
+    Every task query is scoped to one household and leads with its id, so
+    the indexes on (household_id, ...) keep a household's queries as cheap
+    as if it were the only one in the table.
+    """
+
+    def insert_task(self, household_id: int, task_data: Dict) -> Dict:
+        """Insert a task and return the stored row"""
+        raise NotImplementedError
+
+    def insert_task_once(self, household_id: int, task_data: Dict, key: str) -> Dict:
+        """Insert a task unless one with the same insert key exists, and return the stored row either way
+
+        The write journal gives every queued insert a key, so an insert that
+        reached the database before a crash is found, not repeated, when the
+        journal is replayed.
+        """
+        raise NotImplementedError
+
+    def select_tasks(self, household_id: int, eq: Optional[Dict] = None, gte: Optional[Dict] = None,
+                     order_by: str = "created_at", desc: bool = True) -> List[Dict]:
+        """Return tasks (LIST_COLUMNS) matching the equality / lower-bound filters"""
+        raise NotImplementedError
+
+    def select_tasks_page(self, household_id: int, eq: Optional[Dict] = None, page_size: int = 25,
+                          after: Optional[Tuple[str, int]] = None) -> List[Dict]:
+        """Return up to page_size tasks (LIST_COLUMNS) by (created_at, id) DESC, strictly after the keyset cursor"""
+        raise NotImplementedError
+
+    def select_full_tasks_page(self, household_id: int, eq: Optional[Dict] = None, page_size: int = 1000,
+                               after: Optional[Tuple[str, int]] = None) -> List[Dict]:
+        """select_tasks_page with every column, for exports and archives, which keep the descriptions"""
+        raise NotImplementedError
+
+    def count_tasks(self, household_id: int, eq: Optional[Dict] = None) -> int:
+        """Count tasks matching the equality filters without transferring rows"""
+        raise NotImplementedError
+
+    def select_notes(self, household_id: int, eq: Optional[Dict] = None,
+                     task_ids: Optional[List[int]] = None) -> Dict[int, str]:
+        """Descriptions of the matching tasks (filters and, when given, ids) by task id; empty ones are left out"""
+        raise NotImplementedError
+
+    def insert_tasks(self, household_id: int, rows: List[Dict]) -> int:
+        """Insert a batch of tasks in one request without echoing them back"""
+        raise NotImplementedError
+
+    def get_task(self, household_id: int, task_id: int) -> Optional[Dict]:
+        """Return a single task with every column, or None"""
+        raise NotImplementedError
+
+    def update_task(self, household_id: int, task_id: int, updates: Dict,
+                    version: Optional[int] = None) -> Optional[Dict]:
+        """Apply updates to a task and return the updated row
+
+        With ``version``, the update only applies while the task is still at
+        that version. None means no row matched: the task is gone or, with a
+        version, someone else changed it first. Every update bumps the version.
+        """
+        raise NotImplementedError
+
+    def update_tasks(self, household_id: int, task_ids: List[int], updates: Dict) -> List[Dict]:
+        """Apply the same updates to several tasks in one request and return the updated rows"""
+        raise NotImplementedError
+
+    def delete_task(self, household_id: int, task_id: int) -> bool:
+        """Delete a task, returning whether a row was removed"""
+        raise NotImplementedError
+
+    def complete_and_rotate(self, household_id: int, task_ids: List[int],
+                            versions: Optional[List[int]] = None) -> List[Dict]:
+        """Atomically complete tasks and rotate them to the next member, returning the rotated rows
+
+        With ``versions`` (one per task id), a task only rotates while it is
+        still at that version, so repeating a "Done" is a no-op; a None
+        version is not checked. Tasks that did not rotate are left out of
+        the result; rows carry LIST_COLUMNS.
+        """
+        raise NotImplementedError
+
+    def select_due(self, household_id: int, until: str) -> List[Dict]:
+        """Return pending tasks (LIST_COLUMNS) due on or before ``until``, soonest first"""
+        raise NotImplementedError
+
+    def schedule_tasks(self, household_id: int) -> int:
+        """Stamp a due date on every scheduled task without one; returns how many were stamped"""
+        raise NotImplementedError
+
+    def select_completions(self, household_id: int, start: str, end: Optional[str] = None,
+                           person: Optional[str] = None) -> List[Dict]:
+        """Return completion events in [start, end), newest first"""
+        raise NotImplementedError
+
+    def select_changes(self, household_id: int, since: str) -> Dict:
+        """Rows (LIST_COLUMNS) updated and ids deleted after ``since``:
+        {"rows": [...], "deleted": [{"id", "deleted_at"}]}"""
+        raise NotImplementedError
+
+    def task_stats(self, household_id: int, today: str) -> Dict:
+        """Grouped counts for the statistics page (see sql/016_task_stats_pending_load.sql for the shape)"""
+        raise NotImplementedError
+
+    def get_household(self, household_id: int) -> Optional[Dict]:
+        """Return {"id", "name", "members": [names in rotation order]} or None"""
+        raise NotImplementedError
+
+    def save_household(self, household_id: Optional[int], name: str, members: List[str]) -> Dict:
+        """Create (household_id None) or rename a household and replace its rotation ring"""
+        raise NotImplementedError
+
+    def get_notification_settings(self, household_id: int) -> Dict:
+        """Return {"household_id", "overdue_alerts", "daily_digest", "recipients": {member: email},
+        "alerted_through", "digest_sent_on", "recipient_marks": {member: {"alerted_through", "digest_sent_on"}}},
+        with defaults when none were saved"""
+        raise NotImplementedError
+
+    def save_notification_settings(self, household_id: int, settings: Dict) -> Dict:
+        """Update the given keys of a household's notification settings and return all of them"""
+        raise NotImplementedError
+
+    def enabled_notification_settings(self) -> List[Dict]:
+        """Settings (plus "household_name") of every household with overdue alerts or digests on"""
+        raise NotImplementedError
+
+    def get_load_scores(self, household_id: int) -> List[Dict]:
+        """Each member's rolling load score: {"person", "score", "scored_at"} (see sql/012_load_scores.sql)"""
+        raise NotImplementedError
+
+    def select_old_completions(self, household_id: int, before: str, limit: int,
+                               after: Optional[Tuple[str, int]] = None) -> List[Dict]:
+        """Up to ``limit`` completion events older than ``before``, by (completed_at, id), strictly after the cursor"""
+        raise NotImplementedError
+
+    def archive_completions(self, household_id: int, completion_ids: List[int]) -> int:
+        """Atomically add completions to the monthly rollups and delete them; returns how many were removed"""
+        raise NotImplementedError
+
+    def select_completion_rollups(self, household_id: int) -> List[Dict]:
+        """Completions archived per member and month: {"month", "person", "completions"}, oldest first"""
+        raise NotImplementedError
+
+    def delete_tasks(self, household_id: int, task_ids: List[int]) -> int:
+        """Delete several tasks in one request, returning how many were removed"""
+        raise NotImplementedError
+
+    def prune_tombstones(self, household_id: int, before: str) -> int:
+        """Forget deletions older than ``before`` (the change feed no longer reports them); returns how many"""
+        raise NotImplementedError
+
+
+class SupabaseBackend(StorageBackend):
+    """Hosted Postgres through the Supabase / PostgREST client"""
+
+    def __init__(self, client):
+        self.db = client
+
+    # Every method builds a PostgREST request and hands it to _run together
+    # with a reader for the response, so AsyncSupabaseBackend can reuse the
+    # same requests by overriding _run alone.
+    def _run(self, query, read):
+        return read(query.execute())
+
+    @staticmethod
+    def _first(result):
+        return result.data[0] if result.data else None
+
+    def _scoped(self, household_id: int, query):
+        return query.eq("household_id", household_id)
+
+    def insert_task(self, household_id: int, task_data: Dict) -> Dict:
+        task_data = dict(task_data, household_id=household_id)
+        return self._run(self.db.table(TABLE).insert(task_data),
+                         lambda result: result.data[0] if result.data else task_data)
+
+    def insert_task_once(self, household_id: int, task_data: Dict, key: str) -> Dict:
+        # Server-side function from sql/015_task_insert_keys.sql
+        return self._run(self.db.rpc("insert_task_once", {"household": household_id, "task": task_data, "key": key}),
+                         self._first)
+
+    def insert_tasks(self, household_id: int, rows: List[Dict]) -> int:
+        from postgrest.types import ReturnMethod
+        rows = [dict(row, household_id=household_id) for row in rows]
+        return self._run(self.db.table(TABLE).insert(rows, returning=ReturnMethod.minimal),
+                         lambda result: len(rows))
+
+    def select_tasks(self, household_id: int, eq: Optional[Dict] = None, gte: Optional[Dict] = None,
+                     order_by: str = "created_at", desc: bool = True) -> List[Dict]:
+        query = self._scoped(household_id, self.db.table(TABLE).select(LIST_SELECT))
+        for column, value in (eq or {}).items():
+            query = query.eq(column, value)
+        for column, value in (gte or {}).items():
+            query = query.gte(column, value)
+        return self._run(query.order(order_by, desc=desc), lambda result: result.data)
+
+    def select_tasks_page(self, household_id: int, eq: Optional[Dict] = None, page_size: int = 25,
+                          after: Optional[Tuple[str, int]] = None) -> List[Dict]:
+        return self._select_page(LIST_SELECT, household_id, eq, page_size, after)
+
+    def select_full_tasks_page(self, household_id: int, eq: Optional[Dict] = None, page_size: int = 1000,
+                               after: Optional[Tuple[str, int]] = None) -> List[Dict]:
+        return self._select_page("*", household_id, eq, page_size, after)
+
+    def _select_page(self, columns: str, household_id: int, eq: Optional[Dict], page_size: int,
+                     after: Optional[Tuple[str, int]]) -> List[Dict]:
+        query = self._scoped(household_id, self.db.table(TABLE).select(columns))
+        for column, value in (eq or {}).items():
+            query = query.eq(column, value)
+        if after:
+            created_at, task_id = after
+            # Quoted so the timestamp's ':' and '.' survive PostgREST's logic-tree parser
+            query = query.or_(f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{int(task_id)})')
+        query = query.order("created_at", desc=True).order("id", desc=True).limit(page_size)
+        return self._run(query, lambda result: result.data)
+
+    def count_tasks(self, household_id: int, eq: Optional[Dict] = None) -> int:
+        query = self._scoped(household_id, self.db.table(TABLE).select("id", count="exact", head=True))
+        for column, value in (eq or {}).items():
+            query = query.eq(column, value)
+        return self._run(query, lambda result: result.count or 0)
+
+    def select_notes(self, household_id: int, eq: Optional[Dict] = None,
+                     task_ids: Optional[List[int]] = None) -> Dict[int, str]:
+        query = self._scoped(household_id, self.db.table(TABLE).select("id,description")).neq("description", "")
+        for column, value in (eq or {}).items():
+            query = query.eq(column, value)
+        if task_ids is not None:
+            query = query.in_("id", list(task_ids))
+        return self._run(query, lambda result: {row['id']: row['description'] for row in result.data})
+
+    def get_task(self, household_id: int, task_id: int) -> Optional[Dict]:
+        return self._run(self._scoped(household_id, self.db.table(TABLE).select("*").eq("id", task_id)), self._first)
+
+    def update_task(self, household_id: int, task_id: int, updates: Dict,
+                    version: Optional[int] = None) -> Optional[Dict]:
+        query = self._scoped(household_id, self.db.table(TABLE).update(updates).eq("id", task_id))
+        if version is not None:
+            query = query.eq("version", version)
+        return self._run(query, self._first)
+
+    def update_tasks(self, household_id: int, task_ids: List[int], updates: Dict) -> List[Dict]:
+        query = self._scoped(household_id, self.db.table(TABLE).update(updates).in_("id", list(task_ids)))
+        return self._run(query, lambda result: result.data)
+
+    def delete_task(self, household_id: int, task_id: int) -> bool:
+        from postgrest.types import CountMethod, ReturnMethod
+        # Counted instead of echoed back
+        query = self.db.table(TABLE).delete(count=CountMethod.exact, returning=ReturnMethod.minimal)
+        return self._run(self._scoped(household_id, query.eq("id", task_id)), lambda result: bool(result.count))
+
+    def complete_and_rotate(self, household_id: int, task_ids: List[int],
+                            versions: Optional[List[int]] = None) -> List[Dict]:
+        # Server-side function from sql/006_complete_and_rotate_tasks.sql
+        return self._run(self.db.rpc("complete_and_rotate_tasks",
+                                     {"household": household_id, "task_ids": list(task_ids),
+                                      "versions": list(versions) if versions is not None else None})
+                         .select(LIST_SELECT),
+                         lambda result: result.data or [])
+
+    def select_due(self, household_id: int, until: str) -> List[Dict]:
+        query = self._scoped(household_id, self.db.table(TABLE).select(LIST_SELECT)).eq("status", "pending")
+        query = query.lte("due_date", until).order("due_date").order("id")
+        return self._run(query, lambda result: result.data)
+
+    def schedule_tasks(self, household_id: int) -> int:
+        # Server-side function from sql/004_task_schedule.sql
+        return self._run(self.db.rpc("schedule_tasks", {"household": household_id}),
+                         lambda result: result.data or 0)
+
+    def select_completions(self, household_id: int, start: str, end: Optional[str] = None,
+                           person: Optional[str] = None) -> List[Dict]:
+        query = self._scoped(household_id, self.db.table(COMPLETIONS_TABLE).select(COMPLETION_SELECT))
+        query = query.gte("completed_at", start)
+        if end:
+            query = query.lt("completed_at", end)
+        if person:
+            query = query.eq("completed_by", person)
+        return self._run(query.order("completed_at", desc=True), lambda result: result.data)
+
+    def select_changes(self, household_id: int, since: str) -> Dict:
+        # Server-side change feed from sql/009_task_changes.sql, narrowed by sql/014_list_columns.sql
+        return self._run(self.db.rpc("task_changes", {"household": household_id, "since": since}),
+                         lambda result: result.data)
+
+    def task_stats(self, household_id: int, today: str) -> Dict:
+        # Server-side aggregate from sql/016_task_stats_pending_load.sql
+        return self._run(self.db.rpc("task_stats", {"household": household_id, "today": today}),
+                         lambda result: result.data)
+
+    def get_household(self, household_id: int) -> Optional[Dict]:
+        # Server-side functions from sql/002_households.sql
+        return self._run(self.db.rpc("get_household", {"household": household_id}), lambda result: result.data)
+
+    def save_household(self, household_id: Optional[int], name: str, members: List[str]) -> Dict:
+        return self._run(self.db.rpc("save_household",
+                                     {"household": household_id, "name": name, "members": list(members)}),
+                         lambda result: result.data)
+
+    def get_notification_settings(self, household_id: int) -> Dict:
+        # Server-side functions from sql/011_notification_settings.sql and sql/017_recipient_marks.sql
+        return self._run(self.db.rpc("get_notification_settings", {"household": household_id}),
+                         lambda result: result.data)
+
+    def save_notification_settings(self, household_id: int, settings: Dict) -> Dict:
+        return self._run(self.db.rpc("save_notification_settings", {"household": household_id, "settings": settings}),
+                         lambda result: result.data)
+
+    def enabled_notification_settings(self) -> List[Dict]:
+        return self._run(self.db.rpc("enabled_notification_settings", {}), lambda result: result.data or [])
+
+    def get_load_scores(self, household_id: int) -> List[Dict]:
+        query = self._scoped(household_id, self.db.table(LOAD_SCORES_TABLE).select("person,score,scored_at"))
+        return self._run(query, lambda result: result.data)
+
+    def select_old_completions(self, household_id: int, before: str, limit: int,
+                               after: Optional[Tuple[str, int]] = None) -> List[Dict]:
+        query = self._scoped(household_id, self.db.table(COMPLETIONS_TABLE).select("*")).lt("completed_at", before)
+        if after:
+            completed_at, completion_id = after
+            query = query.or_(f'completed_at.gt."{completed_at}",'
+                              f'and(completed_at.eq."{completed_at}",id.gt.{int(completion_id)})')
+        return self._run(query.order("completed_at").order("id").limit(limit), lambda result: result.data)
+
+    def archive_completions(self, household_id: int, completion_ids: List[int]) -> int:
+        # Server-side function from sql/013_completion_rollups.sql
+        return self._run(self.db.rpc("archive_completions",
+                                     {"household": household_id, "completion_ids": list(completion_ids)}),
+                         lambda result: result.data or 0)
+
+    def select_completion_rollups(self, household_id: int) -> List[Dict]:
+        query = self._scoped(household_id, self.db.table(ROLLUPS_TABLE).select("month,person,completions"))
+        return self._run(query.order("month").order("person"), lambda result: result.data)
+
+    def delete_tasks(self, household_id: int, task_ids: List[int]) -> int:
+        from postgrest.types import CountMethod, ReturnMethod
+        query = self.db.table(TABLE).delete(count=CountMethod.exact, returning=ReturnMethod.minimal)
+        return self._run(self._scoped(household_id, query.in_("id", list(task_ids))),
+                         lambda result: result.count or 0)
+
+    def prune_tombstones(self, household_id: int, before: str) -> int:
+        from postgrest.types import CountMethod, ReturnMethod
+        query = self.db.table(TOMBSTONES_TABLE).delete(count=CountMethod.exact, returning=ReturnMethod.minimal)
+        return self._run(self._scoped(household_id, query.lt("deleted_at", before)),
+                         lambda result: result.count or 0)
+
+
+class AsyncSupabaseBackend(SupabaseBackend):
+    """SupabaseBackend over the async client; every method returns an awaitable"""
+
+    async def _run(self, query, read):
+        return read(await query.execute())
+
+
+class ThreadedBackend:
+    """Async view of a synchronous backend that runs each call in a worker thread"""
+
+    def __init__(self, backend: StorageBackend):
+        self.backend = backend
+
+    def __getattr__(self, name):
+        method = getattr(self.backend, name)
+
+        async def call(*args, **kwargs):
+            # run_in_executor rather than asyncio.to_thread, which needs Python 3.9
+            return await asyncio.get_running_loop().run_in_executor(None, functools.partial(method, *args, **kwargs))
+        return call
+
+
+class SQLiteBackend(StorageBackend):
+    """Local SQLite file in WAL mode with the same schema as the hosted database"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS households (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name VARCHAR(100) NOT NULL,
+        created_at TIMESTAMP DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime'))
+    );
+
+    -- The rotation ring: tasks pass from each member to the one at the next position
+    CREATE TABLE IF NOT EXISTS household_members (
+        household_id INTEGER NOT NULL REFERENCES households(id) ON DELETE CASCADE,
+        position INTEGER NOT NULL,
+        name VARCHAR(50) NOT NULL,
+        PRIMARY KEY (household_id, position),
+        UNIQUE (household_id, name)
+    );
+
+    CREATE TABLE IF NOT EXISTS cleaning_tasks (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        household_id INTEGER NOT NULL DEFAULT 1 REFERENCES households(id),
+        task_name VARCHAR(255) NOT NULL,
+        assigned_to VARCHAR(50) NOT NULL,
+        room VARCHAR(100) NOT NULL,
+        frequency VARCHAR(50) NOT NULL,
+        description TEXT,
+        status VARCHAR(20) DEFAULT 'pending',
+        due_date DATE,
+        created_at TIMESTAMP DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime')),
+        completed_at TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime')),
+        version INTEGER NOT NULL DEFAULT 1
+    );
+
+    CREATE TABLE IF NOT EXISTS task_completions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        household_id INTEGER NOT NULL DEFAULT 1 REFERENCES households(id),
+        task_id INTEGER REFERENCES cleaning_tasks(id) ON DELETE SET NULL,
+        completed_by VARCHAR(50) NOT NULL,
+        completed_at TIMESTAMP NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime'))
+    );
+
+    CREATE TABLE IF NOT EXISTS task_tombstones (
+        task_id INTEGER PRIMARY KEY,
+        household_id INTEGER NOT NULL DEFAULT 1,
+        deleted_at TIMESTAMP NOT NULL
+    );
+    """
+
+    # Indexes and triggers, applied once columns added later exist
+    INDEXES_AND_TRIGGERS = """
+    -- Single-tenant indexes from before households; every query now leads with household_id
+    DROP INDEX IF EXISTS cleaning_tasks_created_at_id_idx;
+    DROP INDEX IF EXISTS cleaning_tasks_updated_at_idx;
+    DROP INDEX IF EXISTS task_completions_completed_at_idx;
+    DROP INDEX IF EXISTS task_completions_completed_by_idx;
+    DROP INDEX IF EXISTS task_tombstones_deleted_at_idx;
+
+    -- Keyset pagination (Manage Tasks, exports) walks this index
+    CREATE INDEX IF NOT EXISTS cleaning_tasks_household_created_at_id_idx
+        ON cleaning_tasks (household_id, created_at, id);
+    CREATE INDEX IF NOT EXISTS cleaning_tasks_household_updated_at_idx ON cleaning_tasks (household_id, updated_at);
+    CREATE INDEX IF NOT EXISTS task_completions_household_completed_at_idx
+        ON task_completions (household_id, completed_at);
+    CREATE INDEX IF NOT EXISTS task_completions_household_completed_by_idx
+        ON task_completions (household_id, completed_by, completed_at);
+    CREATE INDEX IF NOT EXISTS task_tombstones_household_deleted_at_idx ON task_tombstones (household_id, deleted_at);
+    -- Overdue / due-this-week range scans and the last completion of a task
+    CREATE INDEX IF NOT EXISTS cleaning_tasks_household_status_due_date_idx
+        ON cleaning_tasks (household_id, status, due_date);
+    CREATE INDEX IF NOT EXISTS task_completions_task_completed_at_idx ON task_completions (task_id, completed_at);
+
+    CREATE TRIGGER IF NOT EXISTS cleaning_tasks_touch_insert AFTER INSERT ON cleaning_tasks
+    WHEN NEW.updated_at IS NULL
+    BEGIN
+        UPDATE cleaning_tasks SET updated_at = strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime') WHERE id = NEW.id;
+    END;
+
+    -- Every update also bumps the row version (optimistic concurrency); the
+    -- insert trigger's own stamping (OLD.updated_at still NULL) does not count
+    DROP TRIGGER IF EXISTS cleaning_tasks_touch_update;
+    CREATE TRIGGER cleaning_tasks_touch_update AFTER UPDATE ON cleaning_tasks
+    WHEN OLD.updated_at IS NOT NULL
+    BEGIN
+        UPDATE cleaning_tasks SET updated_at = strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime'),
+                                  version = OLD.version + 1
+        WHERE id = NEW.id;
+    END;
+
+    DROP TRIGGER IF EXISTS cleaning_tasks_tombstone;
+    CREATE TRIGGER cleaning_tasks_tombstone AFTER DELETE ON cleaning_tasks
+    BEGIN
+        INSERT OR REPLACE INTO task_tombstones (task_id, household_id, deleted_at)
+        VALUES (OLD.id, OLD.household_id, strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime'));
+    END;
+    """
+
+    # Manage Tasks filters, each paged newest first straight off its index (sql/010_task_filter_indexes.sql)
+    FILTER_INDEXES = """
+    CREATE INDEX IF NOT EXISTS cleaning_tasks_household_assigned_to_created_at_idx
+        ON cleaning_tasks (household_id, assigned_to, created_at, id);
+    CREATE INDEX IF NOT EXISTS cleaning_tasks_household_status_created_at_idx
+        ON cleaning_tasks (household_id, status, created_at, id);
+    CREATE INDEX IF NOT EXISTS cleaning_tasks_household_room_created_at_idx
+        ON cleaning_tasks (household_id, room, created_at, id);
+    """
+
+    # Overdue alerts and daily digests (sql/011_notification_settings.sql); recipients is JSON text
+    NOTIFICATION_SETTINGS = f"""
+    CREATE TABLE IF NOT EXISTS {NOTIFICATIONS_TABLE} (
+        household_id INTEGER PRIMARY KEY REFERENCES households(id) ON DELETE CASCADE,
+        overdue_alerts INTEGER NOT NULL DEFAULT 0,
+        daily_digest INTEGER NOT NULL DEFAULT 0,
+        recipients TEXT NOT NULL DEFAULT '{{}}',
+        alerted_through DATE,
+        digest_sent_on DATE
+    );
+    CREATE INDEX IF NOT EXISTS notification_settings_enabled_idx
+        ON {NOTIFICATIONS_TABLE} (household_id) WHERE overdue_alerts OR daily_digest;
+    """
+    # Rolling load scores kept by a completion trigger (sql/012_load_scores.sql, fairness.py)
+    LOAD_SCORES = f"""
+    CREATE TABLE IF NOT EXISTS {LOAD_SCORES_TABLE} (
+        household_id INTEGER NOT NULL REFERENCES households(id) ON DELETE CASCADE,
+        person VARCHAR(50) NOT NULL,
+        score REAL NOT NULL,
+        scored_at TIMESTAMP NOT NULL,
+        PRIMARY KEY (household_id, person)
+    );
+    CREATE TRIGGER IF NOT EXISTS task_completions_load_score AFTER INSERT ON {COMPLETIONS_TABLE}
+    BEGIN
+        INSERT INTO {LOAD_SCORES_TABLE} (household_id, person, score, scored_at)
+        VALUES (NEW.household_id, NEW.completed_by, 1, NEW.completed_at)
+        ON CONFLICT (household_id, person) DO UPDATE SET
+            score = CASE WHEN excluded.scored_at >= scored_at
+                THEN score * pow(0.5, (julianday(excluded.scored_at) - julianday(scored_at)) / 14) + 1
+                ELSE score + pow(0.5, (julianday(scored_at) - julianday(excluded.scored_at)) / 14) END,
+            scored_at = max(scored_at, excluded.scored_at);
+    END;
+    INSERT INTO {LOAD_SCORES_TABLE} (household_id, person, score, scored_at)
+    SELECT c.household_id, c.completed_by,
+           SUM(pow(0.5, (julianday(latest.completed_at) - julianday(c.completed_at)) / 14)), latest.completed_at
+    FROM {COMPLETIONS_TABLE} c
+    JOIN (SELECT household_id, completed_by, MAX(completed_at) AS completed_at FROM {COMPLETIONS_TABLE}
+          GROUP BY household_id, completed_by) latest
+      ON latest.household_id = c.household_id AND latest.completed_by = c.completed_by
+    WHERE true
+    GROUP BY c.household_id, c.completed_by
+    ON CONFLICT (household_id, person) DO NOTHING;
+    """
+    # Monthly completion counts kept when old completions are archived (sql/013_completion_rollups.sql)
+    COMPLETION_ROLLUPS = f"""
+    CREATE TABLE IF NOT EXISTS {ROLLUPS_TABLE} (
+        household_id INTEGER NOT NULL REFERENCES households(id) ON DELETE CASCADE,
+        month DATE NOT NULL,
+        person VARCHAR(50) NOT NULL,
+        completions INTEGER NOT NULL,
+        PRIMARY KEY (household_id, month, person)
+    );
+    """
+    # Keys of inserts queued in the write journal (sql/015_task_insert_keys.sql)
+    INSERT_KEYS = f"""
+    ALTER TABLE {TABLE} ADD COLUMN insert_key VARCHAR(36);
+    CREATE UNIQUE INDEX IF NOT EXISTS cleaning_tasks_household_insert_key_idx ON {TABLE} (household_id, insert_key);
+    """
+    # What the digest worker sent each recipient, so a household interrupted mid-batch is not sent twice
+    RECIPIENT_MARKS = f"""
+    ALTER TABLE {NOTIFICATIONS_TABLE} ADD COLUMN recipient_marks TEXT NOT NULL DEFAULT '{{}}';
+    """
+    NOTIFICATION_COLUMNS = ("overdue_alerts", "daily_digest", "recipients", "alerted_through", "digest_sent_on",
+                            "recipient_marks")
+    # Notification settings stored as JSON text
+    NOTIFICATION_JSON = ("recipients", "recipient_marks")
+
+    # Columns added before versioned migrations; files from then get them in the baseline
+    ADDED_COLUMNS = {
+        TABLE: {"updated_at": "TIMESTAMP", "household_id": "INTEGER NOT NULL DEFAULT 1",
+                "version": "INTEGER NOT NULL DEFAULT 1"},
+        COMPLETIONS_TABLE: {"household_id": "INTEGER NOT NULL DEFAULT 1"},
+        "task_tombstones": {"household_id": "INTEGER NOT NULL DEFAULT 1"},
+    }
+
+    COLUMNS = ("id", "household_id", "task_name", "assigned_to", "room", "frequency", "description",
+               "status", "due_date", "created_at", "completed_at", "updated_at", "version", "insert_key")
+
+    # Next member of the task's household ring; the first member when the
+    # assignee is not (or no longer) in the ring, unchanged for an empty ring
+    NEXT_MEMBER = f"""
+    COALESCE(
+        (SELECT n.name FROM {MEMBERS_TABLE} c
+         JOIN {MEMBERS_TABLE} n ON n.household_id = c.household_id AND n.position > c.position
+         WHERE c.household_id = {TABLE}.household_id AND c.name = {TABLE}.assigned_to
+         ORDER BY n.position LIMIT 1),
+        (SELECT f.name FROM {MEMBERS_TABLE} f WHERE f.household_id = {TABLE}.household_id
+         ORDER BY f.position LIMIT 1),
+        assigned_to)
+    """
+
+    # Due date one step of the task's frequency after {last_done} (schedule.RULES);
+    # months are clamped to the end of shorter months like Postgres does
+    NEXT_DUE = """
+    CASE frequency
+        WHEN 'Daily' THEN date({last_done}, '+1 day')
+        WHEN 'Weekly' THEN date({last_done}, '+7 days')
+        WHEN 'Bi-weekly' THEN date({last_done}, '+14 days')
+        WHEN 'Monthly' THEN min(date({last_done}, '+1 month'), date({last_done}, 'start of month', '+2 months', '-1 day'))
+    END
+    """
+    SCHEDULED = "('Daily', 'Weekly', 'Bi-weekly', 'Monthly')"
+
+    def __init__(self, path: str = "mymental.db"):
+        self.path = path
+        # Streamlit shares one manager across script threads, so the
+        # connection is shared too and every access goes through the lock.
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.lock = threading.RLock()
+        with self.lock:
+            if path != ":memory:":
+                self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute("PRAGMA foreign_keys=ON")
+            try:
+                self.conn.execute("SELECT pow(2, 1)")
+            except sqlite3.OperationalError:
+                # SQLite builds without the math functions; the load-score trigger needs pow
+                self.conn.create_function("pow", 2, math.pow, deterministic=True)
+            migrate_sqlite(self.conn, self.migrations)
+            if not self.conn.execute(f"SELECT 1 FROM {HOUSEHOLDS_TABLE} WHERE id = ?",
+                                     (DEFAULT_HOUSEHOLD_ID,)).fetchone():
+                self._write_household(DEFAULT_HOUSEHOLD_ID, "Home", DEFAULT_MEMBERS)
+            # Tasks from before due dates were kept
+            self._schedule()
+
+    @property
+    def migrations(self) -> List[Migration]:
+        """Versioned migrations of the local file, oldest first (recorded in PRAGMA user_version)"""
+        return [
+            (1, "baseline", self._baseline),
+            (2, "task_filter_indexes", self.FILTER_INDEXES),
+            (3, "notification_settings", self.NOTIFICATION_SETTINGS),
+            (4, "load_scores", self.LOAD_SCORES),
+            (5, "completion_rollups", self.COMPLETION_ROLLUPS),
+            (6, "task_insert_keys", self.INSERT_KEYS),
+            (7, "recipient_marks", self.RECIPIENT_MARKS),
+        ]
+
+    def _baseline(self, conn: sqlite3.Connection):
+        """The schema as of versioned migrations; also brings files created before them up to date"""
+        for statement in sqlite_statements(self.SCHEMA):
+            conn.execute(statement)
+        for table, columns in self.ADDED_COLUMNS.items():
+            existing = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+            for column, column_type in columns.items():
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+        conn.execute(f"UPDATE {TABLE} SET updated_at = created_at WHERE updated_at IS NULL")
+        for statement in sqlite_statements(self.INDEXES_AND_TRIGGERS):
+            conn.execute(statement)
+
+    def _check_columns(self, columns):
+        for column in columns:
+            if column not in self.COLUMNS:
+                raise ValueError(f"Unknown column: {column}")
+
+    @staticmethod
+    def _order_clause(order_by: str, desc: bool) -> str:
+        # Match Postgres NULL ordering: NULLS LAST ascending, NULLS FIRST descending
+        if desc:
+            return f"{order_by} IS NULL DESC, {order_by} DESC"
+        return f"{order_by} IS NULL, {order_by}"
+
+    def insert_task(self, household_id: int, task_data: Dict) -> Dict:
+        task_data = dict(task_data, household_id=household_id)
+        self._check_columns(task_data)
+        columns = ", ".join(task_data)
+        placeholders = ", ".join("?" for _ in task_data)
+        with self.lock:
+            cursor = self.conn.execute(
+                f"INSERT INTO {TABLE} ({columns}) VALUES ({placeholders})",
+                list(task_data.values()),
+            )
+            return self.get_task(household_id, cursor.lastrowid)
+
+    def insert_task_once(self, household_id: int, task_data: Dict, key: str) -> Dict:
+        task_data = dict(task_data, household_id=household_id, insert_key=key)
+        self._check_columns(task_data)
+        columns = ", ".join(task_data)
+        placeholders = ", ".join("?" for _ in task_data)
+        with self.lock:
+            self.conn.execute(f"INSERT INTO {TABLE} ({columns}) VALUES ({placeholders}) "
+                              "ON CONFLICT (household_id, insert_key) DO NOTHING", list(task_data.values()))
+            row = self.conn.execute(f"SELECT * FROM {TABLE} WHERE household_id = ? AND insert_key = ?",
+                                    (household_id, key)).fetchone()
+        return dict(row)
+
+    def insert_tasks(self, household_id: int, rows: List[Dict]) -> int:
+        if not rows:
+            return 0
+        # executemany needs one column list, so every row is padded to the union of keys
+        columns = sorted({column for row in rows for column in row} | {"household_id"})
+        self._check_columns(columns)
+        placeholders = ", ".join("?" for _ in columns)
+        with self.lock:
+            self.conn.execute("BEGIN")
+            try:
+                self.conn.executemany(
+                    f"INSERT INTO {TABLE} ({', '.join(columns)}) VALUES ({placeholders})",
+                    [[household_id if column == "household_id" else row.get(column) for column in columns]
+                     for row in rows],
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    def _where(self, household_id: int, eq: Dict) -> Tuple[List[str], List]:
+        self._check_columns(eq)
+        return (["household_id = ?"] + [f"{column} = ?" for column in eq]), [household_id] + list(eq.values())
+
+    def select_tasks(self, household_id: int, eq: Optional[Dict] = None, gte: Optional[Dict] = None,
+                     order_by: str = "created_at", desc: bool = True) -> List[Dict]:
+        gte = gte or {}
+        self._check_columns(list(gte) + [order_by])
+        clauses, params = self._where(household_id, eq or {})
+        clauses += [f"{column} >= ?" for column in gte]
+        params += list(gte.values())
+        sql = f"SELECT {LIST_SELECT} FROM {TABLE} WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY " + self._order_clause(order_by, desc)
+        with self.lock:
+            return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def select_tasks_page(self, household_id: int, eq: Optional[Dict] = None, page_size: int = 25,
+                          after: Optional[Tuple[str, int]] = None) -> List[Dict]:
+        return self._select_page(LIST_SELECT, household_id, eq, page_size, after)
+
+    def select_full_tasks_page(self, household_id: int, eq: Optional[Dict] = None, page_size: int = 1000,
+                               after: Optional[Tuple[str, int]] = None) -> List[Dict]:
+        return self._select_page("*", household_id, eq, page_size, after)
+
+    def _select_page(self, columns: str, household_id: int, eq: Optional[Dict], page_size: int,
+                     after: Optional[Tuple[str, int]]) -> List[Dict]:
+        clauses, params = self._where(household_id, eq or {})
+        if after:
+            clauses.append("(created_at < ? OR (created_at = ? AND id < ?))")
+            params += [after[0], after[0], after[1]]
+        sql = f"SELECT {columns} FROM {TABLE} WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        with self.lock:
+            return [dict(row) for row in self.conn.execute(sql, params + [page_size])]
+
+    def count_tasks(self, household_id: int, eq: Optional[Dict] = None) -> int:
+        clauses, params = self._where(household_id, eq or {})
+        with self.lock:
+            return self.conn.execute(f"SELECT COUNT(*) FROM {TABLE} WHERE " + " AND ".join(clauses),
+                                     params).fetchone()[0]
+
+    def select_notes(self, household_id: int, eq: Optional[Dict] = None,
+                     task_ids: Optional[List[int]] = None) -> Dict[int, str]:
+        clauses, params = self._where(household_id, eq or {})
+        if task_ids is not None:
+            clauses.append(f"id IN ({', '.join('?' for _ in task_ids)})")
+            params += list(task_ids)
+        with self.lock:
+            return dict(self.conn.execute(f"SELECT id, description FROM {TABLE} WHERE "
+                                          + " AND ".join(clauses + ["description <> ''"]), params).fetchall())
+
+    def get_task(self, household_id: int, task_id: int) -> Optional[Dict]:
+        with self.lock:
+            row = self.conn.execute(f"SELECT * FROM {TABLE} WHERE household_id = ? AND id = ?",
+                                    (household_id, task_id)).fetchone()
+        return dict(row) if row else None
+
+    def update_task(self, household_id: int, task_id: int, updates: Dict,
+                    version: Optional[int] = None) -> Optional[Dict]:
+        self._check_columns(updates)
+        assignments = ", ".join(f"{column} = ?" for column in updates)
+        sql = f"UPDATE {TABLE} SET {assignments} WHERE household_id = ? AND id = ?"
+        params = list(updates.values()) + [household_id, task_id]
+        if version is not None:
+            sql += " AND version = ?"
+            params.append(version)
+        with self.lock:
+            if self.conn.execute(sql, params).rowcount == 0:
+                return None
+            return self.get_task(household_id, task_id)
+
+    def update_tasks(self, household_id: int, task_ids: List[int], updates: Dict) -> List[Dict]:
+        if not task_ids:
+            return []
+        self._check_columns(updates)
+        assignments = ", ".join(f"{column} = ?" for column in updates)
+        where = f"household_id = ? AND id IN ({', '.join('?' for _ in task_ids)})"
+        params = [household_id] + list(task_ids)
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.execute(f"UPDATE {TABLE} SET {assignments} WHERE {where}", list(updates.values()) + params)
+                rows = self.conn.execute(f"SELECT {LIST_SELECT} FROM {TABLE} WHERE {where}", params).fetchall()
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return [dict(row) for row in rows]
+
+    def delete_task(self, household_id: int, task_id: int) -> bool:
+        with self.lock:
+            cursor = self.conn.execute(f"DELETE FROM {TABLE} WHERE household_id = ? AND id = ?",
+                                       (household_id, task_id))
+        return cursor.rowcount > 0
+
+    def complete_and_rotate(self, household_id: int, task_ids: List[int],
+                            versions: Optional[List[int]] = None) -> List[Dict]:
+        if not task_ids:
+            return []
+        next_due = self.NEXT_DUE.format(last_done="date('now', 'localtime')")
+
+        def scope(ids):
+            return f"household_id = ? AND id IN ({', '.join('?' for _ in ids)})", [household_id] + list(ids)
+
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                if versions is not None:
+                    # Only tasks still at the version the caller saw rotate
+                    where, params = scope(task_ids)
+                    current = dict(self.conn.execute(f"SELECT id, version FROM {TABLE} WHERE {where}",
+                                                     params).fetchall())
+                    task_ids = [task_id for task_id, version in zip(task_ids, versions)
+                                if version is None or current.get(task_id) == version]
+                where, params = scope(task_ids)
+                self.conn.execute(
+                    f"INSERT INTO {COMPLETIONS_TABLE} (household_id, task_id, completed_by) "
+                    f"SELECT household_id, id, assigned_to FROM {TABLE} WHERE {where}",
+                    params,
+                )
+                self.conn.execute(
+                    f"UPDATE {TABLE} SET assigned_to = {self.NEXT_MEMBER}, "
+                    f"status = 'pending', completed_at = NULL, due_date = {next_due} WHERE {where}",
+                    params,
+                )
+                rows = self.conn.execute(f"SELECT {LIST_SELECT} FROM {TABLE} WHERE {where}", params).fetchall()
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return [dict(row) for row in rows]
+
+    def select_due(self, household_id: int, until: str) -> List[Dict]:
+        with self.lock:
+            return [dict(row) for row in self.conn.execute(
+                f"SELECT {LIST_SELECT} FROM {TABLE} WHERE household_id = ? AND status = 'pending' AND due_date <= ? "
+                "ORDER BY due_date, id", (household_id, until))]
+
+    def _schedule(self, household_id: Optional[int] = None) -> int:
+        # One UPDATE stamps every unscheduled task (of one household, or all of them)
+        last_done = (f"COALESCE((SELECT MAX(c.completed_at) FROM {COMPLETIONS_TABLE} c "
+                     f"WHERE c.task_id = {TABLE}.id), {TABLE}.created_at)")
+        sql = (f"UPDATE {TABLE} SET due_date = {self.NEXT_DUE.format(last_done=last_done)} "
+               f"WHERE due_date IS NULL AND frequency IN {self.SCHEDULED}")
+        if household_id is None:
+            return self.conn.execute(sql).rowcount
+        return self.conn.execute(sql + " AND household_id = ?", (household_id,)).rowcount
+
+    def schedule_tasks(self, household_id: int) -> int:
+        with self.lock:
+            return self._schedule(household_id)
+
+    def select_completions(self, household_id: int, start: str, end: Optional[str] = None,
+                           person: Optional[str] = None) -> List[Dict]:
+        sql = f"SELECT {COMPLETION_SELECT} FROM {COMPLETIONS_TABLE} WHERE household_id = ? AND completed_at >= ?"
+        params = [household_id, start]
+        if end:
+            sql += " AND completed_at < ?"
+            params.append(end)
+        if person:
+            sql += " AND completed_by = ?"
+            params.append(person)
+        with self.lock:
+            return [dict(row) for row in self.conn.execute(sql + " ORDER BY completed_at DESC", params)]
+
+    def select_changes(self, household_id: int, since: str) -> Dict:
+        with self.lock:
+            rows = self.conn.execute(f"SELECT {LIST_SELECT} FROM {TABLE} WHERE household_id = ? AND updated_at > ?",
+                                     (household_id, since)).fetchall()
+            deleted = self.conn.execute(
+                "SELECT task_id AS id, deleted_at FROM task_tombstones WHERE household_id = ? AND deleted_at > ?",
+                (household_id, since)).fetchall()
+        return {"rows": [dict(row) for row in rows], "deleted": [dict(row) for row in deleted]}
+
+    def _pending_by_person_frequency(self, household_id: int) -> Dict[str, Dict[str, int]]:
+        pending: Dict[str, Dict[str, int]] = {}
+        for person, frequency, count in self.conn.execute(
+                f"SELECT assigned_to, frequency, COUNT(*) FROM {TABLE} WHERE household_id = ? AND status = 'pending' "
+                "GROUP BY assigned_to, frequency", (household_id,)):
+            pending.setdefault(person, {})[frequency] = count
+        return pending
+
+    def task_stats(self, household_id: int, today: str) -> Dict:
+        def grouped(sql, params=()):
+            return {key: count for key, count in self.conn.execute(sql, (household_id,) + params)}
+
+        def by(column):
+            return grouped(f"SELECT {column}, COUNT(*) FROM {TABLE} WHERE household_id = ? GROUP BY {column}")
+
+        with self.lock:
+            return {
+                "total": self.conn.execute(f"SELECT COUNT(*) FROM {TABLE} WHERE household_id = ?",
+                                           (household_id,)).fetchone()[0],
+                "by_person": by("assigned_to"),
+                "by_status": by("status"),
+                "by_room": by("room"),
+                "by_frequency": by("frequency"),
+                "pending_by_person_frequency": self._pending_by_person_frequency(household_id),
+                "daily_completions": grouped(
+                    f"SELECT date(completed_at) AS day, COUNT(*) FROM {COMPLETIONS_TABLE} "
+                    "WHERE household_id = ? AND completed_at >= date(?, '-90 days') GROUP BY day ORDER BY day",
+                    (today,)),
+                "overdue": self.conn.execute(
+                    f"SELECT COUNT(*) FROM {TABLE} WHERE household_id = ? AND status = 'pending' AND due_date < ?",
+                    (household_id, today)).fetchone()[0],
+                # From today through Sunday
+                "due_this_week": self.conn.execute(
+                    f"SELECT COUNT(*) FROM {TABLE} WHERE household_id = ? AND status = 'pending' "
+                    "AND due_date BETWEEN ? AND date(?, 'weekday 0')", (household_id, today, today)).fetchone()[0],
+            }
+
+    def get_household(self, household_id: int) -> Optional[Dict]:
+        with self.lock:
+            row = self.conn.execute(f"SELECT id, name FROM {HOUSEHOLDS_TABLE} WHERE id = ?",
+                                    (household_id,)).fetchone()
+            if row is None:
+                return None
+            members = [member[0] for member in self.conn.execute(
+                f"SELECT name FROM {MEMBERS_TABLE} WHERE household_id = ? ORDER BY position", (household_id,))]
+        return {"id": row["id"], "name": row["name"], "members": members}
+
+    def _write_household(self, household_id: Optional[int], name: str, members) -> int:
+        if household_id is None:
+            household_id = self.conn.execute(f"INSERT INTO {HOUSEHOLDS_TABLE} (name) VALUES (?)",
+                                             (name,)).lastrowid
+        else:
+            self.conn.execute(f"INSERT INTO {HOUSEHOLDS_TABLE} (id, name) VALUES (?, ?) "
+                              "ON CONFLICT (id) DO UPDATE SET name = excluded.name", (household_id, name))
+        self.conn.execute(f"DELETE FROM {MEMBERS_TABLE} WHERE household_id = ?", (household_id,))
+        self.conn.executemany(f"INSERT INTO {MEMBERS_TABLE} (household_id, position, name) VALUES (?, ?, ?)",
+                              [(household_id, position, member) for position, member in enumerate(members)])
+        return household_id
+
+    def save_household(self, household_id: Optional[int], name: str, members: List[str]) -> Dict:
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                household_id = self._write_household(household_id, name, members)
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            return self.get_household(household_id)
+
+    @staticmethod
+    def _notification_settings(row: sqlite3.Row) -> Dict:
+        return dict(row, overdue_alerts=bool(row["overdue_alerts"]), daily_digest=bool(row["daily_digest"]),
+                    recipients=json.loads(row["recipients"]), recipient_marks=json.loads(row["recipient_marks"]))
+
+    def get_notification_settings(self, household_id: int) -> Dict:
+        with self.lock:
+            row = self.conn.execute(f"SELECT * FROM {NOTIFICATIONS_TABLE} WHERE household_id = ?",
+                                    (household_id,)).fetchone()
+        if row is None:
+            return {"household_id": household_id, "overdue_alerts": False, "daily_digest": False,
+                    "recipients": {}, "alerted_through": None, "digest_sent_on": None, "recipient_marks": {}}
+        return self._notification_settings(row)
+
+    def save_notification_settings(self, household_id: int, settings: Dict) -> Dict:
+        for column in settings:
+            if column not in self.NOTIFICATION_COLUMNS:
+                raise ValueError(f"Unknown column: {column}")
+        values = {column: json.dumps(value) if column in self.NOTIFICATION_JSON else value
+                  for column, value in settings.items()}
+        columns = ["household_id"] + list(values)
+        updates = ", ".join(f"{column} = excluded.{column}" for column in values) or "household_id = household_id"
+        with self.lock:
+            self.conn.execute(f"INSERT INTO {NOTIFICATIONS_TABLE} ({', '.join(columns)}) "
+                              f"VALUES ({', '.join('?' for _ in columns)}) "
+                              f"ON CONFLICT (household_id) DO UPDATE SET {updates}",
+                              [household_id] + list(values.values()))
+            return self.get_notification_settings(household_id)
+
+    def enabled_notification_settings(self) -> List[Dict]:
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT s.*, h.name AS household_name FROM {NOTIFICATIONS_TABLE} s "
+                f"JOIN {HOUSEHOLDS_TABLE} h ON h.id = s.household_id "
+                "WHERE s.overdue_alerts OR s.daily_digest").fetchall()
+        return [self._notification_settings(row) for row in rows]
+
+    def get_load_scores(self, household_id: int) -> List[Dict]:
+        with self.lock:
+            return [dict(row) for row in self.conn.execute(
+                f"SELECT person, score, scored_at FROM {LOAD_SCORES_TABLE} WHERE household_id = ?", (household_id,))]
+
+    def select_old_completions(self, household_id: int, before: str, limit: int,
+                               after: Optional[Tuple[str, int]] = None) -> List[Dict]:
+        sql = f"SELECT * FROM {COMPLETIONS_TABLE} WHERE household_id = ? AND completed_at < ?"
+        params = [household_id, before]
+        if after:
+            sql += " AND (completed_at > ? OR (completed_at = ? AND id > ?))"
+            params += [after[0], after[0], after[1]]
+        with self.lock:
+            return [dict(row) for row in self.conn.execute(sql + " ORDER BY completed_at, id LIMIT ?",
+                                                           params + [limit])]
+
+    def archive_completions(self, household_id: int, completion_ids: List[int]) -> int:
+        if not completion_ids:
+            return 0
+        where = f"household_id = ? AND id IN ({', '.join('?' for _ in completion_ids)})"
+        params = [household_id] + list(completion_ids)
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.execute(
+                    f"INSERT INTO {ROLLUPS_TABLE} (household_id, month, person, completions) "
+                    f"SELECT household_id, date(completed_at, 'start of month'), completed_by, COUNT(*) "
+                    f"FROM {COMPLETIONS_TABLE} WHERE {where} GROUP BY 1, 2, 3 "
+                    "ON CONFLICT (household_id, month, person) DO UPDATE SET "
+                    "completions = completions + excluded.completions", params)
+                removed = self.conn.execute(f"DELETE FROM {COMPLETIONS_TABLE} WHERE {where}", params).rowcount
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return removed
+
+    def select_completion_rollups(self, household_id: int) -> List[Dict]:
+        with self.lock:
+            return [dict(row) for row in self.conn.execute(
+                f"SELECT month, person, completions FROM {ROLLUPS_TABLE} WHERE household_id = ? "
+                "ORDER BY month, person", (household_id,))]
+
+    def delete_tasks(self, household_id: int, task_ids: List[int]) -> int:
+        if not task_ids:
+            return 0
+        with self.lock:
+            return self.conn.execute(
+                f"DELETE FROM {TABLE} WHERE household_id = ? AND id IN ({', '.join('?' for _ in task_ids)})",
+                [household_id] + list(task_ids)).rowcount
+
+    def prune_tombstones(self, household_id: int, before: str) -> int:
+        with self.lock:
+            return self.conn.execute(f"DELETE FROM {TOMBSTONES_TABLE} WHERE household_id = ? AND deleted_at < ?",
+                                     (household_id, before)).rowcount
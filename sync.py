@@ -0,0 +1,110 @@
+"""
+Incremental sync of the cleaning_tasks table.
+
+TaskReplica keeps a local copy of one household's tasks and refreshes it from the
+backend's change feed (rows whose updated_at moved, plus delete tombstones)
+instead of refetching the whole table, so a rerun only transfers what the
+other partner changed since the last sync. Rows are kept decoded, as Tasks.
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from models import Task
+from storage import StorageBackend, list_row
+
+# Rows are re-read this far behind the cursor so a transaction that started
+# before the last sync but committed after it is not missed.
+SYNC_OVERLAP_SECONDS = 5
+# Cursor used after syncing an empty table: every later change is newer
+EPOCH = "1970-01-01T00:00:00"
+
+
+class TaskReplica:
+    """Local snapshot of a household's tasks, kept current by delta syncs"""
+
+    def __init__(self, backend: StorageBackend, household_id: int, interval: float = 2.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.db = backend
+        self.household_id = household_id
+        self.interval = interval
+        self.clock = clock
+        self.rows: Dict[int, Task] = {}
+        self.cursor: Optional[str] = None
+        self.last_sync: Optional[float] = None
+        self.full_loads = 0
+        self.delta_rows = 0
+        self._ordered: Optional[List[Task]] = None
+        self._lock = threading.RLock()
+
+    def _advance(self, stamp: Optional[str]):
+        if stamp and (self.cursor is None or stamp > self.cursor):
+            self.cursor = stamp
+
+    def _since(self) -> str:
+        return (datetime.fromisoformat(self.cursor) - timedelta(seconds=SYNC_OVERLAP_SECONDS)).isoformat()
+
+    def sync(self) -> int:
+        """Pull changes from the backend and return how many rows changed"""
+        with self._lock:
+            if self.cursor is None:
+                rows = [Task.from_row(row) for row in self.db.select_tasks(self.household_id)]
+                self.rows = {task.id: task for task in rows}
+                for task in rows:
+                    self._advance(task.updated_at)
+                self.full_loads += 1
+                changed = len(rows)
+            else:
+                changes = self.db.select_changes(self.household_id, self._since())
+                changed = 0
+                for row in changes['rows']:
+                    current = self.rows.get(row['id'])
+                    if current is None or current.updated_at != row.get('updated_at'):
+                        self.rows[row['id']] = Task.from_row(row)
+                        changed += 1
+                    self._advance(row.get('updated_at'))
+                for tombstone in changes['deleted']:
+                    if self.rows.pop(tombstone['id'], None) is not None:
+                        changed += 1
+                    self._advance(tombstone['deleted_at'])
+                self.delta_rows += len(changes['rows']) + len(changes['deleted'])
+            if self.cursor is None:
+                self.cursor = EPOCH
+            if changed:
+                self._ordered = None
+            self.last_sync = self.clock()
+            return changed
+
+    def maybe_sync(self) -> int:
+        """Sync unless the last sync is younger than ``interval`` seconds"""
+        with self._lock:
+            if self.last_sync is not None and self.clock() - self.last_sync < self.interval:
+                return 0
+            return self.sync()
+
+    def apply(self, rows: List[Dict], deleted_ids: List[int] = ()):
+        """Fold rows written by this process in without waiting for the next sync"""
+        with self._lock:
+            if self.cursor is None:
+                return
+            for row in rows:
+                if 'id' in row:
+                    self.rows[row['id']] = Task.from_row(list_row(row))
+            for task_id in deleted_ids:
+                self.rows.pop(task_id, None)
+            self._ordered = None
+
+    def assignee(self, task_id: int) -> Optional[str]:
+        """Who the task is assigned to as of the last sync (None when it is unknown)"""
+        task = self.rows.get(task_id)
+        return task.assigned_to if task else None
+
+    def tasks(self) -> List[Task]:
+        """All of the household's tasks, newest first (the same order as select_tasks)"""
+        with self._lock:
+            if self._ordered is None:
+                self._ordered = sorted(self.rows.values(), key=lambda task: (task.created_at or "", task.id),
+                                       reverse=True)
+            return list(self._ordered)
@@ -1,15 +1,288 @@
-from database import SupabaseClient
+from database import (get_storage_backend, CACHE_TTL_SECONDS, CACHE_MAX_ENTRIES, SYNC_INTERVAL_SECONDS, HOUSEHOLD_ID,
+                      JOURNAL_PATH, JOURNAL_FLUSH_INTERVAL_SECONDS, RETENTION_DAYS)
+from storage import StorageBackend, list_row, next_member
+from cache import TaskCache, HOUSEHOLD_KEY, LOAD_KEY
+from sync import TaskReplica
+from journal import MutationJournal, JournalFlusher, WriteRefused, replay
+from metrics import InstrumentedBackend, MetricsRegistry, METRICS
+from models import Status, Task, decode_rows
+from errors import Conflict, InvalidInput, NotFound
+from fairness import LoadScores
+from schedule import next_due, rotation_calendar
+from snapshot import TaskSnapshot
 from datetime import datetime, date, timedelta
-from typing import List, Dict, Optional
-import streamlit as st
+from typing import Any, Callable, List, Dict, IO, Iterable, Optional, Tuple
+import logging
+import re
+import weakref
+import data_io
+import retention
+
+logger = logging.getLogger(__name__)
+
+# Times a conditional write is re-applied on top of concurrent changes to other fields
+WRITE_RETRIES = 3
+
+EMAIL = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+# Fields a task edit from the API or the CLI may change
+EDITABLE_FIELDS = ("task_name", "assigned_to", "room", "frequency", "description", "status", "due_date")
+NO_NOTIFICATIONS = {"overdue_alerts": False, "daily_digest": False, "recipients": {}}
+
+EMPTY_STATS = {"total": 0, "by_person": {}, "by_status": {}, "by_room": {}, "by_frequency": {},
+               "pending_by_person_frequency": {}, "daily_completions": {}, "overdue": 0, "due_this_week": 0}
+
+def period_start(period: str, today: date) -> date:
+    """First day of the current week (Monday), month or year"""
+    if period == "week":
+        return today - timedelta(days=today.weekday())
+    if period == "month":
+        return today.replace(day=1)
+    if period == "year":
+        return today.replace(month=1, day=1)
+    raise InvalidInput(f"Unknown period: {period}")
+
+def clean_household(name: str, members: Iterable[str]) -> Tuple[str, List[str]]:
+    """Strip and validate a household name and its rotation ring (unique names of up to 50 characters)"""
+    name = (name or "").strip()
+    if not name or len(name) > 100:
+        raise InvalidInput("A household needs a name of up to 100 characters")
+    cleaned = [member.strip() for member in members if member and member.strip()]
+    if not cleaned:
+        raise InvalidInput("A household needs at least one member")
+    if len(set(cleaned)) != len(cleaned):
+        raise InvalidInput("Member names must be unique")
+    if any(len(member) > 50 for member in cleaned):
+        raise InvalidInput("Member names are limited to 50 characters")
+    return name, cleaned
+
+def clean_recipients(recipients: Dict[str, str], members: Iterable[str]) -> Dict[str, str]:
+    """Strip and validate the members' e-mail addresses, dropping blank ones"""
+    cleaned = {member: (recipients.get(member) or "").strip() for member in members}
+    for member, email in cleaned.items():
+        if email and not EMAIL.match(email):
+            raise InvalidInput(f"Not an e-mail address for {member}: {email}")
+    return {member: email for member, email in cleaned.items() if email}
+
+def clean_updates(updates: Dict) -> Dict:
+    """Validate a task edit that comes from outside the app (API, CLI): editable fields and known statuses only"""
+    if not updates:
+        raise InvalidInput("Nothing to update")
+    unknown = sorted(set(updates) - set(EDITABLE_FIELDS))
+    if unknown:
+        raise InvalidInput(f"Cannot edit {', '.join(unknown)}")
+    for field in EDITABLE_FIELDS:
+        if updates.get(field) is not None and not isinstance(updates[field], str):
+            raise InvalidInput(f"{field} must be a string, not {type(updates[field]).__name__}")
+    for field in ("task_name", "assigned_to", "room", "frequency"):
+        if field in updates and not (updates[field] or "").strip():
+            raise InvalidInput(f"{field} cannot be empty")
+    if updates.get("due_date"):
+        try:
+            date.fromisoformat(updates["due_date"])
+        except (TypeError, ValueError):
+            raise InvalidInput(f"due_date must be YYYY-MM-DD, not {updates['due_date']!r}")
+    if "status" in updates:
+        if updates["status"] not in Status.values():
+            raise InvalidInput(f"status must be one of {', '.join(Status.values())}")
+        completed = updates["status"] == Status.COMPLETED
+        updates = dict(updates, completed_at=datetime.now().isoformat() if completed else None)
+    return updates
+
+def scheduled_updates(updates: Dict, today: date) -> Dict:
+    """Reschedule from today when the frequency changes without a new due date"""
+    if "frequency" in updates and not updates.get("due_date"):
+        due = next_due(updates["frequency"], today)
+        return dict(updates, due_date=due.isoformat() if due else None)
+    return updates
+
+class VersionConflict(Conflict):
+    """A task changed since it was read, in fields the rejected write also changes"""
+
+    def __init__(self, task: Task, fields: List[str]):
+        super().__init__(f"'{task.task_name}' was changed by someone else meanwhile "
+                         f"({', '.join(fields)}); review it and try again")
+        self.task = task
+        self.fields = fields
+
+def conflicting_fields(updates: Dict, base: Task, current: Task) -> List[str]:
+    """Fields of ``updates`` that changed between the task the write was based on and the current one"""
+    return [column for column in updates if getattr(current, column) != getattr(base, column)]
 
 class CleaningTaskManager:
-    def __init__(self):
-        self.db = SupabaseClient().get_client()
+    def __init__(self, backend: Optional[StorageBackend] = None, household_id: int = HOUSEHOLD_ID,
+                 cache_ttl: float = CACHE_TTL_SECONDS,
+                 cache_size: int = CACHE_MAX_ENTRIES, sync_interval: float = SYNC_INTERVAL_SECONDS,
+                 metrics: MetricsRegistry = METRICS, on_error: Optional[Callable[[str], Any]] = None,
+                 journal_path: Optional[str] = JOURNAL_PATH,
+                 journal_flush_interval: float = JOURNAL_FLUSH_INTERVAL_SECONDS):
+        # Failures are reported through on_error (st.error in the app) and logged otherwise
+        self.report_error = on_error or logger.error
+        # Every backend call is timed and counted per method and page
+        self.metrics = metrics
+        self.db = InstrumentedBackend(backend or get_storage_backend(), metrics)
+        # Every query is scoped to this household
+        self.household_id = household_id
+        self.cache = TaskCache(ttl=cache_ttl, max_entries=cache_size)
+        # Full task lists come from a replica refreshed with delta syncs
+        self.replica = TaskReplica(self.db, household_id, interval=sync_interval)
+        # With a write journal, task writes are queued locally and flushed by a background thread
+        self.journal = MutationJournal(journal_path) if journal_path else None
+        self.flusher = None
+        if self.journal:
+            self.flusher = JournalFlusher(self.journal, self.db, household_id, self._flush_update, self._flushed,
+                                          interval=journal_flush_interval).start()
+            # The flusher only holds the manager weakly; stop it once the manager is dropped
+            weakref.finalize(self, self.flusher.close)
+    
+    def close(self):
+        """Stop the journal flusher and close the journal; queued writes stay for the next manager"""
+        if self.flusher:
+            self.flusher.stop()
+            self.journal.close()
+            self.journal = self.flusher = None
+    
+    def _after_write(self, task_id: Optional[int], row: Optional[Dict], created: bool = False):
+        """Keep the query cache and the replica in step with a write"""
+        self.cache.apply_write(task_id, row, created)
+        self.replica.apply([row] if row else [], [] if row or created else [task_id])
+    
+    def _synced_tasks(self) -> List[Task]:
+        self.replica.maybe_sync()
+        return self._with_queued(self.replica.tasks())
+    
+    def _with_queued(self, tasks: List[Task], queued: Optional[List[Dict]] = None, full: bool = False) -> List[Task]:
+        """Tasks as they will be once the queued writes are flushed (new ones first)
+
+        Queued writes carry every column they set; unless ``full``, the
+        predicted tasks keep the list columns only, like the tasks around them.
+        """
+        if self.journal is None:
+            return tasks
+        queued = self.journal.pending(self.household_id) if queued is None else queued
+        if not queued:
+            return tasks
+        touched = {mutation['task_id'] for mutation in queued}
+        predicted = replay({task.id: task.to_row() for task in tasks if task.id in touched}, queued,
+                           self.get_members(), date.today())
+        predicted = {task_id: row and Task.from_row(row if full else list_row(row))
+                     for task_id, row in predicted.items()}
+        created = [task for task_id, task in predicted.items() if task_id < 0 and task]
+        current = (predicted.get(task.id, task) for task in tasks)
+        return created[::-1] + [task for task in current if task is not None]
+    
+    def _enqueue(self, kind: str, task_ids: List[int], payloads: List[Dict],
+                 versions: Optional[List[Optional[int]]] = None):
+        """Queue writes for the flusher; writes on top of queued ones are chained to them"""
+        queued = self.journal.pending(self.household_id)
+        tasks = {task.id: task for task in self._with_queued(self.replica.tasks(), queued)}
+        pending_ids = {mutation['task_id'] for mutation in queued}
+        mutations = []
+        for task_id, payload, version in zip(task_ids, payloads, versions or [None] * len(task_ids)):
+            task_id = None if task_id is None else self.journal.resolve_id(task_id)
+            chained = task_id in pending_ids
+            label = tasks[task_id].task_name if task_id in tasks else payload.get('task_name', "")
+            mutations.append({"kind": kind, "task_id": task_id, "version": None if chained else version,
+                              "chained": chained, "payload": payload, "label": label})
+        self.journal.append(self.household_id, mutations)
+        self.flusher.notify()
+    
+    def _flush_update(self, task_id: int, updates: Dict, base: Optional[Dict]) -> Optional[Dict]:
+        """Update for the flusher, which keeps conflicts as failed writes instead of retrying them"""
+        try:
+            return self._update(task_id, updates, base and Task.from_row(base))
+        except (VersionConflict, LookupError) as e:
+            raise WriteRefused(str(e))
+    
+    def _flushed(self, rows: List[Dict], deleted_ids: List[int]):
+        """Fold a write the flusher sent into the query cache and the replica"""
+        self.cache.invalidate(lambda key: key != HOUSEHOLD_KEY)
+        self.replica.apply(rows, deleted_ids)
+    
+    def pending_writes(self) -> int:
+        """Number of queued writes not flushed yet"""
+        return self.journal.count(self.household_id) if self.journal else 0
+    
+    def failed_writes(self) -> List[Dict]:
+        """Queued writes that could not be saved (label, kind, error, created_at)"""
+        return self.journal.failed(self.household_id) if self.journal else []
+    
+    def dismiss_failed_writes(self):
+        """Forget the failed writes once they have been shown"""
+        if self.journal:
+            self.journal.discard(self.household_id)
+    
+    def flush_writes(self) -> int:
+        """Send the queued writes now, in the calling thread; returns how many were settled"""
+        try:
+            return self.flusher.flush_all() if self.flusher else 0
+        except Exception as e:
+            self.report_error(f"Error saving queued changes: {str(e)}")
+            return 0
+    
+    def cache_stats(self) -> Dict:
+        """Cache hit/miss counters and replica sync counters"""
+        stats = self.cache.stats()
+        stats.update({"full_loads": self.replica.full_loads, "delta_rows": self.replica.delta_rows})
+        return stats
+    
+    def get_household(self) -> Dict:
+        """Get the household's name and rotation ring"""
+        try:
+            household = self.cache.get_or_load(HOUSEHOLD_KEY, lambda: self.db.get_household(self.household_id))
+        except Exception as e:
+            self.report_error(f"Error fetching household: {str(e)}")
+            household = None
+        return household or {"id": self.household_id, "name": "", "members": []}
+    
+    def get_members(self) -> List[str]:
+        """Get the household members in rotation order"""
+        return self.get_household()['members']
+    
+    def next_assignee(self, current: str) -> str:
+        """Get who a task goes to after ``current`` completes it"""
+        return next_member(self.get_members(), current)
+    
+    def save_household(self, name: str, members: List[str]) -> bool:
+        """Rename the household and replace its rotation ring"""
+        try:
+            household = self.db.save_household(self.household_id, *clean_household(name, members))
+            self.cache.set(HOUSEHOLD_KEY, household)
+            return True
+        except Exception as e:
+            self.report_error(f"Error saving household: {str(e)}")
+            return False
+    
+    def create_household(self, name: str, members: List[str]) -> Optional[int]:
+        """Create another household and return its id"""
+        try:
+            return self.db.save_household(None, *clean_household(name, members))['id']
+        except Exception as e:
+            self.report_error(f"Error creating household: {str(e)}")
+            return None
+    
+    def get_notification_settings(self) -> Dict:
+        """Get whether overdue alerts and daily digests are on and who receives them"""
+        try:
+            return self.db.get_notification_settings(self.household_id)
+        except Exception as e:
+            self.report_error(f"Error fetching notification settings: {str(e)}")
+            return dict(NO_NOTIFICATIONS)
+    
+    def save_notification_settings(self, overdue_alerts: bool, daily_digest: bool, recipients: Dict[str, str]) -> bool:
+        """Switch overdue alerts and daily digests and set the members' e-mail addresses"""
+        try:
+            self.db.save_notification_settings(self.household_id, {
+                "overdue_alerts": overdue_alerts, "daily_digest": daily_digest,
+                "recipients": clean_recipients(recipients, self.get_members())})
+            return True
+        except Exception as e:
+            self.report_error(f"Error saving notification settings: {str(e)}")
+            return False
     
     def create_task(self, task_name: str, assigned_to: str, room: str, frequency: str, description: str = "", due_date: date = None) -> bool:
-        """Create a new cleaning task"""
+        """Create a new cleaning task, due one step of its frequency from today unless a due date is given"""
         try:
+            due_date = due_date or next_due(frequency, date.today())
             task_data = {
                 "task_name": task_name,
                 "assigned_to": assigned_to,
@@ -22,110 +295,347 @@ class CleaningTaskManager:
                 "completed_at": None
             }
             
-            result = self.db.table("cleaning_tasks").insert(task_data).execute()
+            if self.journal:
+                self._enqueue("create", [None], [task_data])
+                return True
+            row = self.db.insert_task(self.household_id, task_data)
+            self._after_write(None, row, created=True)
             return True
         except Exception as e:
-            st.error(f"Error creating task: {str(e)}")
+            self.report_error(f"Error creating task: {str(e)}")
             return False
     
-    def get_all_tasks(self) -> List[Dict]:
+    def get_all_tasks(self) -> List[Task]:
         """Get all cleaning tasks"""
         try:
-            result = self.db.table("cleaning_tasks").select("*").order("created_at", desc=True).execute()
-            return result.data
+            return self._synced_tasks()
         except Exception as e:
-            st.error(f"Error fetching tasks: {str(e)}")
+            self.report_error(f"Error fetching tasks: {str(e)}")
             return []
     
-    def get_tasks_by_person(self, person: str) -> List[Dict]:
+    @staticmethod
+    def _filters(person: Optional[str], status: Optional[str], room: Optional[str]) -> Dict:
+        """Column filters for the set (non-empty) values"""
+        return {column: value for column, value in
+                (("assigned_to", person), ("status", status), ("room", room)) if value}
+    
+    def get_tasks_page(self, person: Optional[str] = None, status: Optional[str] = None, room: Optional[str] = None,
+                       page_size: int = 25, after: Optional[Tuple[str, int]] = None) -> Tuple[List[Task], Optional[Tuple[str, int]]]:
+        """Get one page of filtered tasks and the keyset cursor for the next page"""
+        filters = self._filters(person, status, room)
+        try:
+            snapshot = self._queued_snapshot()
+            if snapshot:
+                return snapshot.page(person, status, room, page_size, after)
+            # One extra row tells us whether another page exists
+            rows = list(self.cache.get_or_load(
+                ("page", tuple(sorted(filters.items())), page_size, after),
+                lambda: decode_rows(self.db.select_tasks_page(self.household_id, eq=filters,
+                                                              page_size=page_size + 1, after=after))))
+            if len(rows) <= page_size:
+                return rows, None
+            rows = rows[:page_size]
+            return rows, (rows[-1].created_at, rows[-1].id)
+        except Exception as e:
+            self.report_error(f"Error fetching tasks: {str(e)}")
+            return [], None
+    
+    def count_tasks(self, person: Optional[str] = None, status: Optional[str] = None, room: Optional[str] = None) -> int:
+        """Count filtered tasks without fetching them"""
+        filters = self._filters(person, status, room)
+        try:
+            snapshot = self._queued_snapshot()
+            if snapshot:
+                return snapshot.count(person, status, room)
+            return self.cache.get_or_load(("count", tuple(sorted(filters.items()))),
+                                          lambda: self.db.count_tasks(self.household_id, eq=filters))
+        except Exception as e:
+            self.report_error(f"Error counting tasks: {str(e)}")
+            return 0
+
+    def get_task(self, task_id: int) -> Optional[Task]:
+        """Get one task with every column (task lists carry the list columns only), as of the queued writes"""
+        try:
+            row = self.db.get_task(self.household_id, task_id)
+            tasks = self._with_queued([Task.from_row(row)] if row else [], full=True)
+            return next((task for task in tasks if task.id == task_id), None)
+        except Exception as e:
+            self.report_error(f"Error fetching task: {str(e)}")
+            return None
+
+    def get_notes(self, person: Optional[str] = None, status: Optional[str] = None, room: Optional[str] = None,
+                  task_ids: Optional[List[int]] = None) -> Dict[int, str]:
+        """Descriptions of the filtered tasks (only of ``task_ids``, when given) by task id, including queued edits"""
+        filters = self._filters(person, status, room)
+        ids = None if task_ids is None else tuple(task_ids)
+        try:
+            notes = dict(self.cache.get_or_load(
+                ("notes", tuple(sorted(filters.items())), ids),
+                lambda: self.db.select_notes(self.household_id, eq=filters,
+                                             task_ids=None if ids is None else list(ids))))
+            queued = self.journal.pending(self.household_id) if self.journal else []
+            # Queued creates and edits carry their description until they are flushed
+            touched = {mutation['task_id'] for mutation in queued}
+            for task in self._with_queued(self.replica.tasks(), queued, full=True) if queued else []:
+                if task.id in touched and task.description is not None and (ids is None or task.id in ids) and all(
+                        getattr(task, column) == value for column, value in filters.items()):
+                    notes[task.id] = task.description
+            return notes
+        except Exception as e:
+            self.report_error(f"Error fetching notes: {str(e)}")
+            return {}
+
+    def get_tasks_by_person(self, person: str) -> List[Task]:
         """Get tasks assigned to a specific person"""
         try:
-            result = self.db.table("cleaning_tasks").select("*").eq("assigned_to", person).order("created_at", desc=True).execute()
-            return result.data
+            return [task for task in self._synced_tasks() if task.assigned_to == person]
         except Exception as e:
-            st.error(f"Error fetching tasks for {person}: {str(e)}")
+            self.report_error(f"Error fetching tasks for {person}: {str(e)}")
             return []
     
-    def get_pending_tasks(self) -> List[Dict]:
+    def get_pending_tasks(self) -> List[Task]:
         """Get all pending tasks"""
         try:
-            result = self.db.table("cleaning_tasks").select("*").eq("status", "pending").order("due_date").execute()
-            return result.data
+            pending = [task for task in self._synced_tasks() if task.is_pending()]
+            # Same order as the database query: due_date ascending, undated last
+            return sorted(pending, key=lambda task: (task.due_date is None, task.due_date or ""))
         except Exception as e:
-            st.error(f"Error fetching pending tasks: {str(e)}")
+            self.report_error(f"Error fetching pending tasks: {str(e)}")
             return []
     
-    def complete_and_rotate_task(self, task_id: int) -> bool:
+    def get_due_tasks(self, until: date) -> List[Task]:
+        """Get pending tasks due on or before ``until`` (overdue ones included), soonest first"""
+        try:
+            return list(self.cache.get_or_load(
+                ("due", until.isoformat()), lambda: decode_rows(self.db.select_due(self.household_id, until.isoformat()))))
+        except Exception as e:
+            self.report_error(f"Error fetching due tasks: {str(e)}")
+            return []
+    
+    def get_overdue_tasks(self) -> List[Task]:
+        """Get pending tasks whose due date has passed"""
+        return self.get_due_tasks(date.today() - timedelta(days=1))
+    
+    def get_rotation_calendar(self, days: int = 14) -> List[Dict]:
+        """Get who does which scheduled task on which day over the coming ``days`` days"""
+        today = date.today()
+        return rotation_calendar(self.get_pending_tasks(), self.get_members(), today, today + timedelta(days=days - 1))
+    
+    def complete_and_rotate_task(self, task_id: int, version: Optional[int] = None) -> bool:
         """Mark a task as done and rotate assignment for next week"""
+        return self.complete_and_rotate_tasks([task_id], None if version is None else [version])
+    
+    def complete_and_rotate_tasks(self, task_ids: List[int], versions: Optional[List[int]] = None) -> bool:
+        """Mark several tasks as done and rotate them in a single atomic request
+
+        With ``versions`` (as shown to the user), tasks that changed since,
+        e.g. because the other partner already marked them done, are left
+        alone and reported instead of rotating a second time.
+        """
         try:
-            # First get the current task
-            task_result = self.db.table("cleaning_tasks").select("*").eq("id", task_id).execute()
-            if not task_result.data:
-                return False
-            
-            task = task_result.data[0]
-            current_assignee = task['assigned_to']
-            
-            # Rotate assignment
-            new_assignee = "Yvonne" if current_assignee == "Fernand" else "Fernand"
-            
-            # Update task: mark as completed and rotate assignment
-            result = self.db.table("cleaning_tasks").update({
-                "status": "completed",
-                "completed_at": datetime.now().isoformat(),
-                "assigned_to": new_assignee
-            }).eq("id", task_id).execute()
-            
-            # Immediately reset to pending for the new assignee
-            reset_result = self.db.table("cleaning_tasks").update({
-                "status": "pending",
-                "completed_at": None
-            }).eq("id", task_id).execute()
-            
-            return True
+            if self.journal:
+                return self._enqueue_completions(task_ids, versions)
+            # Who completes each task, read before the rotation hands it on
+            completers = {task_id: self.replica.assignee(task_id) for task_id in task_ids}
+            rows = self.db.complete_and_rotate(self.household_id, task_ids, versions)
+            if rows:
+                self.cache.apply_rows(rows)
+                self.replica.apply(rows)
+                self._count_completions([completers.get(row['id']) for row in rows])
+            skipped = len(task_ids) - len(rows)
+            if versions is not None and skipped:
+                # Pick up whatever the other write changed
+                self.cache.invalidate()
+                self.replica.sync()
+                self.report_error(f"{skipped} task(s) were already done or changed since this page loaded; "
+                                  "they were left as they are")
+            return bool(rows)
         except Exception as e:
-            st.error(f"Error rotating task: {str(e)}")
+            self.report_error(f"Error rotating task: {str(e)}")
             return False
     
-    def reset_task(self, task_id: int) -> bool:
-        """Reset a completed task back to pending"""
+    def _enqueue_completions(self, task_ids: List[int], versions: Optional[List[int]]) -> bool:
+        """Queue completions; a repeated "Done" on the same rendering of a task is not queued twice"""
+        shown = {(mutation['task_id'], mutation['payload'].get('shown'))
+                 for mutation in self.journal.pending(self.household_id) if mutation['kind'] == "complete"}
+        versions = versions if versions is not None else [None] * len(task_ids)
+        fresh = [(task_id, version) for task_id, version in zip(task_ids, versions)
+                 if version is None or (self.journal.resolve_id(task_id), version) not in shown]
+        if fresh:
+            # Who completes each task once the writes queued before it are applied
+            tasks = {task.id: task for task in self._with_queued(self.replica.tasks())}
+            self._enqueue("complete", [task_id for task_id, _ in fresh],
+                          [{"shown": version} for _, version in fresh], [version for _, version in fresh])
+            self._count_completions([tasks[task_id].assigned_to if task_id in tasks else None for task_id, _ in fresh])
+        skipped = len(task_ids) - len(fresh)
+        if skipped:
+            self.report_error(f"{skipped} task(s) were already done or changed since this page loaded; "
+                              "they were left as they are")
+        return bool(fresh)
+    
+    def _count_completions(self, completers: List[Optional[str]]):
+        """Add completions to the cached load scores, O(1) each; reload them when a completer is unknown"""
+        if None in completers:
+            self.cache.invalidate(lambda key: key == LOAD_KEY)
+            return
+        now = datetime.now()
+
+        def record(scores: LoadScores) -> LoadScores:
+            for person in completers:
+                scores.record(person, now)
+            return scores
+        self.cache.patch(LOAD_KEY, record)
+    
+    def _update(self, task_id: int, updates: Dict, base: Optional[Task]) -> Optional[Dict]:
+        """Blind update, or conditional on ``base``'s version and retried while nobody touched the same fields"""
+        if base is None:
+            return self.db.update_task(self.household_id, task_id, updates)
+        version = base.version
+        for _ in range(WRITE_RETRIES):
+            row = self.db.update_task(self.household_id, task_id, updates, version=version)
+            if row is not None:
+                return row
+            row = self.db.get_task(self.household_id, task_id)
+            self._after_write(task_id, row)
+            if row is None:
+                raise NotFound(f"'{base.task_name}' was deleted meanwhile")
+            current = Task.from_row(row)
+            fields = conflicting_fields(updates, base, current)
+            if fields:
+                raise VersionConflict(current, fields)
+            version = current.version
+        raise VersionConflict(current, list(updates))
+    
+    def reset_task(self, task_id: int, base: Optional[Task] = None) -> bool:
+        """Reset a completed task back to pending (only if unchanged since ``base`` was read, when given)"""
         try:
-            result = self.db.table("cleaning_tasks").update({
-                "status": "pending",
-                "completed_at": None
-            }).eq("id", task_id).execute()
+            updates = {"status": "pending", "completed_at": None}
+            if self.journal:
+                self._enqueue("update", [task_id], [{"updates": updates, "base": base and base.to_row()}],
+                              [base and base.version])
+                return True
+            row = self._update(task_id, updates, base)
+            self._after_write(task_id, row)
             return True
         except Exception as e:
-            st.error(f"Error resetting task: {str(e)}")
+            self.report_error(f"Error resetting task: {str(e)}")
             return False
     
     def delete_task(self, task_id: int) -> bool:
         """Delete a task"""
         try:
-            result = self.db.table("cleaning_tasks").delete().eq("id", task_id).execute()
+            if self.journal:
+                self._enqueue("delete", [task_id], [{}])
+                return True
+            self.db.delete_task(self.household_id, task_id)
+            self._after_write(task_id, None)
             return True
         except Exception as e:
-            st.error(f"Error deleting task: {str(e)}")
+            self.report_error(f"Error deleting task: {str(e)}")
             return False
     
-    def update_task(self, task_id: int, updates: Dict) -> bool:
-        """Update a task"""
+    def update_task(self, task_id: int, updates: Dict, base: Optional[Task] = None) -> bool:
+        """Update a task; with ``base`` (the row the edit started from), concurrent edits are not overwritten"""
         try:
-            result = self.db.table("cleaning_tasks").update(updates).eq("id", task_id).execute()
+            updates = scheduled_updates(updates, date.today())
+            if self.journal:
+                self._enqueue("update", [task_id], [{"updates": updates, "base": base and base.to_row()}],
+                              [base and base.version])
+                return True
+            row = self._update(task_id, updates, base)
+            self._after_write(task_id, row)
             return True
         except Exception as e:
-            st.error(f"Error updating task: {str(e)}")
+            self.report_error(f"Error updating task: {str(e)}")
             return False
     
+    def get_completion_history(self, start: date, end: Optional[date] = None, person: Optional[str] = None) -> List[Dict]:
+        """Get completion events between start (inclusive) and end (exclusive), newest first"""
+        try:
+            since = start.isoformat()
+            until = end.isoformat() if end else None
+            return list(self.cache.get_or_load(
+                ("completions", since, until, person),
+                lambda: self.db.select_completions(self.household_id, since, until, person)))
+        except Exception as e:
+            self.report_error(f"Error fetching completion history: {str(e)}")
+            return []
+    
+    def get_completions_for_period(self, period: str = "week", person: Optional[str] = None) -> List[Dict]:
+        """Get completions for the current week, month or year"""
+        start = period_start(period, datetime.now().date())
+        return self.get_completion_history(start, person=person)
+    
     def get_completed_tasks_this_week(self) -> List[Dict]:
         """Get tasks completed this week"""
+        return self.get_completions_for_period("week")
+    
+    def get_task_stats(self) -> Dict:
+        """Get grouped task counts for the statistics page"""
         try:
-            # Calculate start of week (Monday)
-            today = datetime.now().date()
-            start_of_week = today - timedelta(days=today.weekday())
-            
-            result = self.db.table("cleaning_tasks").select("*").eq("status", "completed").gte("completed_at", start_of_week.isoformat()).execute()
-            return result.data
+            today = date.today().isoformat()
+            stats = self.cache.get_or_load(("stats", today),
+                                           lambda: self.db.task_stats(self.household_id, today)) or EMPTY_STATS
+            snapshot = self._queued_snapshot()
+            # The completion timeline is history, which queued writes do not change
+            return dict(stats, **snapshot.stats()) if snapshot else stats
+        except Exception as e:
+            self.report_error(f"Error fetching statistics: {str(e)}")
+            return EMPTY_STATS
+    
+    def get_load_scores(self) -> LoadScores:
+        """Get each member's rolling completion score (one row per member, see fairness.py)"""
+        try:
+            return self.cache.get_or_load(
+                LOAD_KEY, lambda: LoadScores.from_rows(self.db.get_load_scores(self.household_id)))
         except Exception as e:
-            st.error(f"Error fetching completed tasks: {str(e)}")
-            return []
\ No newline at end of file
+            self.report_error(f"Error fetching load scores: {str(e)}")
+            return LoadScores()
+    
+    def snapshot(self) -> TaskSnapshot:
+        """Read the household's tasks once and index them for every page and widget of a rerun"""
+        return TaskSnapshot(self.get_all_tasks(), self.get_members())
+    
+    def _queued_snapshot(self) -> Optional[TaskSnapshot]:
+        """A snapshot while writes are queued, which database pages and counts would not show yet"""
+        if self.journal and self.journal.count(self.household_id):
+            return self.snapshot()
+        return None
+    
+    def export_tasks(self, out: IO, fmt: str = "csv", page_size: int = 1000) -> int:
+        """Stream every task to a file in keyset pages; returns the number exported"""
+        return data_io.export_tasks(
+            lambda size, after: self.db.select_full_tasks_page(self.household_id, page_size=size, after=after),
+            out, fmt, page_size)
+    
+    def import_tasks(self, rows: Iterable[Dict], batch_size: int = 500) -> data_io.ImportReport:
+        """Validate rows and bulk insert them in batches, then schedule the ones without a due date"""
+        try:
+            report = data_io.import_tasks(lambda batch: self.db.insert_tasks(self.household_id, batch), rows, batch_size)
+            if report.inserted:
+                self.db.schedule_tasks(self.household_id)
+            return report
+        finally:
+            self.cache.invalidate()
+    
+    def apply_retention(self, days: int = RETENTION_DAYS, clear_completed: bool = True) -> Optional[retention.RetentionReport]:
+        """Archive completions older than ``days`` (and the completed tasks) and keep monthly rollups of them"""
+        try:
+            report = retention.apply_retention(self.db, self.household_id, days, clear_completed)
+            if report.tasks:
+                # Picks up the deletions' tombstones
+                self.replica.sync()
+            return report
+        except Exception as e:
+            self.report_error(f"Error archiving old data: {str(e)}")
+            return None
+        finally:
+            self.cache.invalidate()
+    
+    def get_completion_rollups(self) -> List[Dict]:
+        """Get the archived completions per member and month, oldest first"""
+        try:
+            return self.db.select_completion_rollups(self.household_id)
+        except Exception as e:
+            self.report_error(f"Error fetching archived history: {str(e)}")
+            return []
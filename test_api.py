@@ -0,0 +1,104 @@
+"""HTTP API routes, called in-process against SQLite"""
+
+import asyncio
+import json
+from urllib.parse import quote
+
+from api import TaskAPI
+from storage import LIST_COLUMNS, SQLiteBackend, ThreadedBackend
+
+
+async def call(api, method, path, body=None, query="", headers=()):
+    """(status, decoded JSON body) of one request"""
+    messages = [{"type": "http.request", "body": b"" if body is None else json.dumps(body).encode()}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    await api({"type": "http", "method": method, "path": path, "query_string": query.encode(),
+               "headers": [(name.encode(), value.encode()) for name, value in headers]}, receive, send)
+    return sent[0]["status"], json.loads(b"".join(message.get("body", b"") for message in sent[1:]))
+
+
+def api_with_tasks():
+    backend = SQLiteBackend(":memory:")
+    for i, room in enumerate(("Kitchen", "Bathroom")):
+        backend.insert_task(1, {"task_name": f"Task {i}", "assigned_to": "Fernand", "room": room,
+                                "frequency": "Weekly", "description": "With the blue cloth",
+                                "created_at": f"2026-01-0{i + 1}T00:00:00"})
+    return TaskAPI(ThreadedBackend(backend), token=None)
+
+
+def test_writes_and_pages_return_list_columns_only():
+    async def scenario():
+        api = api_with_tasks()
+        status, page = await call(api, "GET", "/tasks")
+        assert status == 200
+        assert [set(task) for task in page["tasks"]] == [set(LIST_COLUMNS)] * 2
+
+        status, task = await call(api, "PATCH", "/tasks/1", {"room": "Office"})
+        assert status == 200
+        assert set(task) == set(LIST_COLUMNS) and task["room"] == "Office"
+
+        status, rotated = await call(api, "POST", "/tasks/2/rotate")
+        assert status == 200 and set(rotated) == set(LIST_COLUMNS)
+
+        # The single task keeps every column
+        status, task = await call(api, "GET", "/tasks/1")
+        assert (task["description"], task["household_id"], task["room"]) == ("With the blue cloth", 1, "Office")
+
+    asyncio.run(scenario())
+
+
+def test_edits_with_wrong_types_are_rejected():
+    async def scenario():
+        api = api_with_tasks()
+        for body in ({"task_name": 5}, {"room": ["Kitchen"]}, {"description": {"text": "x"}}, {"status": 1}):
+            status, error = await call(api, "PATCH", "/tasks/1", body)
+            assert status == 400, body
+            assert "must be a string" in error["error"]
+        status, _ = await call(api, "PATCH", "/tasks", {"ids": [1], "set": {"assigned_to": 7}})
+        assert status == 400
+
+    asyncio.run(scenario())
+
+
+def test_edit_with_a_stale_version_is_a_conflict():
+    async def scenario():
+        api = api_with_tasks()
+        status, task = await call(api, "PATCH", "/tasks/1", {"room": "Office", "expected_version": 1})
+        assert (status, task["version"]) == (200, 2)
+
+        status, error = await call(api, "PATCH", "/tasks/1", {"room": "Garden", "expected_version": 1})
+        assert status == 409 and "it is at 2" in error["error"]
+
+        status, error = await call(api, "PATCH", "/tasks/1", {"room": "Garden"}, headers=[("If-Match", '"1"')])
+        assert status == 409
+        status, task = await call(api, "PATCH", "/tasks/1", {"room": "Garden"}, headers=[("If-Match", 'W/"2"')])
+        assert (status, task["room"], task["version"]) == (200, "Garden", 3)
+
+        status, _ = await call(api, "PATCH", "/tasks/99", {"room": "Garden", "expected_version": 1})
+        assert status == 404
+
+    asyncio.run(scenario())
+
+
+def test_cursors_are_parsed_before_they_reach_the_filter():
+    async def scenario():
+        api = api_with_tasks()
+        status, page = await call(api, "GET", "/tasks", query="limit=1")
+        assert (status, page["next"]) == (200, "2026-01-02T00:00:00,2")
+        status, page = await call(api, "GET", "/tasks", query="limit=1&after=" + quote(page["next"]))
+        assert [task["task_name"] for task in page["tasks"]] == ["Task 0"]
+
+        for cursor in ('2026-01-02T00:00:00",id.gt.0),x,2', "2026-01-02T00:00:00),2", "yesterday,2",
+                       "2026-01-02T00:00:00,two", "2"):
+            status, error = await call(api, "GET", "/tasks", query="after=" + quote(cursor))
+            assert status == 400, cursor
+            assert error["error"].startswith("Bad cursor")
+
+    asyncio.run(scenario())
@@ -23,19 +23,7 @@ except Exception as e:
     print(f'❌ Error: {str(e)}')
     if 'relation "public.cleaning_tasks" does not exist' in str(e) or 'does not exist' in str(e).lower():
         print('📋 The cleaning_tasks table needs to be created first.')
-        print('Create it in your Supabase SQL Editor with this command:')
-        print('''
-CREATE TABLE cleaning_tasks (
-    id SERIAL PRIMARY KEY,
-    task_name VARCHAR(255) NOT NULL,
-    assigned_to VARCHAR(50) NOT NULL,
-    room VARCHAR(100) NOT NULL,
-    frequency VARCHAR(50) NOT NULL,
-    description TEXT,
-    status VARCHAR(20) DEFAULT 'pending',
-    due_date DATE,
-    created_at TIMESTAMP DEFAULT NOW(),
-    completed_at TIMESTAMP
-);''')
+        print('Run `python migrations.py up` (with DATABASE_URL set), or paste the output of')
+        print('`python migrations.py sql` into your Supabase SQL Editor.')
     else:
         print('Please check your Supabase credentials and connection.')
\ No newline at end of file
@@ -0,0 +1,92 @@
+"""Export -> import round trip of a large generated file against SQLite"""
+
+import json
+
+from data_io import EXPORT_COLUMNS, export_tasks, import_tasks, iter_task_pages, read_rows
+from storage import DEFAULT_HOUSEHOLD_ID, SQLiteBackend
+
+ROWS = 100_000
+HOUSEHOLD = DEFAULT_HOUSEHOLD_ID
+
+
+def generated_tasks(count):
+    for i in range(count):
+        yield {
+            "task_name": f"Task {i}",
+            "assigned_to": ("Fernand", "Yvonne")[i % 2],
+            "room": "Kitchen",
+            "frequency": ("Daily", "Weekly", "As needed")[i % 3],
+            # Separators, quotes and line breaks must survive both formats
+            "description": 'Wipe, then dry: "both" sides\nand the handle' if i % 1000 == 0 else "",
+            "status": ("pending", "completed")[i % 5 == 0],
+            "due_date": f"2026-{1 + i % 12:02d}-{1 + i % 28:02d}",
+            "created_at": f"2026-01-01T00:00:00.{i + 1:06d}",
+            "completed_at": None,
+        }
+
+
+def backend_with(count):
+    backend = SQLiteBackend(":memory:")
+    batch = []
+    for task in generated_tasks(count):
+        batch.append(task)
+        if len(batch) == 10_000:
+            backend.insert_tasks(HOUSEHOLD, batch)
+            batch = []
+    backend.insert_tasks(HOUSEHOLD, batch)
+    return backend
+
+
+def all_rows(backend):
+    fetch = lambda size, after: backend.select_full_tasks_page(HOUSEHOLD, page_size=size, after=after)  # noqa: E731
+    return [{column: row[column] for column in EXPORT_COLUMNS if column != "id"}
+            for rows in iter_task_pages(fetch, 5000) for row in rows]
+
+
+def export(backend, path, fmt):
+    with open(path, "w", newline="", encoding="utf-8") as out:
+        return export_tasks(lambda size, after: backend.select_full_tasks_page(HOUSEHOLD, page_size=size,
+                                                                               after=after),
+                            out, fmt, page_size=5000)
+
+
+def test_round_trip_rejects_malformed_rows_one_by_one(tmp_path):
+    source = backend_with(ROWS)
+    path = tmp_path / "tasks.jsonl"
+    assert export(source, path, "jsonl") == ROWS
+
+    # Malformed rows after the first batch must not stop the rest of the file
+    lines = path.read_text(encoding="utf-8").splitlines(keepends=True)
+    bad = ["{not json\n", "[1, 2, 3]\n", json.dumps({"task_name": "No one", "room": "Kitchen",
+                                                    "frequency": "Weekly"}) + "\n",
+           json.dumps({"task_name": "Odd", "assigned_to": "Yvonne", "room": "Kitchen", "frequency": "Weekly",
+                       "status": "lost"}) + "\n"]
+    lines[1500:1500] = bad
+    path.write_text("".join(lines), encoding="utf-8")
+
+    target = SQLiteBackend(":memory:")
+    with open(path, encoding="utf-8") as rows:
+        report = import_tasks(lambda batch: target.insert_tasks(HOUSEHOLD, batch), read_rows(rows, "jsonl"),
+                              batch_size=1000)
+
+    assert report.inserted == ROWS
+    assert [line for line, _ in report.rejected] == [1501, 1502, 1503, 1504]
+    errors = [error for _, error in report.rejected]
+    assert errors[0].startswith("not valid JSON")
+    assert "not list" in errors[1]
+    assert errors[2] == "assigned_to is required"
+    assert errors[3].startswith("status must be one of")
+    assert all_rows(target) == all_rows(source)
+
+
+def test_csv_round_trip_keeps_descriptions(tmp_path):
+    source = backend_with(5000)
+    path = tmp_path / "tasks.csv"
+    assert export(source, path, "csv") == 5000
+
+    target = SQLiteBackend(":memory:")
+    with open(path, newline="", encoding="utf-8") as rows:
+        report = import_tasks(lambda batch: target.insert_tasks(HOUSEHOLD, batch), read_rows(rows, "csv"))
+
+    assert (report.inserted, report.rejected) == (5000, [])
+    assert all_rows(target) == all_rows(source)
@@ -0,0 +1,117 @@
+"""Digests and overdue alerts sent over SMTP to an in-process aiosmtpd server"""
+
+import socket
+from datetime import date, datetime, timedelta
+from email import message_from_bytes
+
+import pytest
+
+from digest import DigestWorker, SMTPTransport
+from storage import DEFAULT_HOUSEHOLD_ID, SQLiteBackend
+
+controller = pytest.importorskip("aiosmtpd.controller")
+
+HOUSEHOLD = DEFAULT_HOUSEHOLD_ID
+TODAY = date(2026, 10, 14)
+NOW = datetime(2026, 10, 14, 9, 0)
+RECIPIENTS = {"Fernand": "fernand@example.org", "Yvonne": "yvonne@example.org"}
+
+
+class Mailbox:
+    """aiosmtpd handler keeping every accepted message, refusing the addresses in ``refused``"""
+
+    def __init__(self):
+        self.messages = []
+        self.refused = set()
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address in self.refused:
+            return "550 mailbox unavailable"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(message_from_bytes(envelope.content))
+        return "250 Message accepted"
+
+    def to(self, address):
+        return [message for message in self.messages if message["To"] == address]
+
+
+@pytest.fixture
+def mailbox():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    box = Mailbox()
+    server = controller.Controller(box, hostname="127.0.0.1", port=port)
+    server.start()
+    box.transport = SMTPTransport("127.0.0.1", port, sender="tasks@example.org", timeout=5)
+    yield box
+    server.stop()
+
+
+def backend_with(settings, due_offsets):
+    """A household whose tasks fall due ``due_offsets`` days from TODAY, alternating between the members"""
+    backend = SQLiteBackend(":memory:")
+    backend.insert_tasks(HOUSEHOLD, [{
+        "task_name": f"Task {i}", "assigned_to": ("Fernand", "Yvonne")[i % 2], "room": "Kitchen",
+        "frequency": "Weekly", "status": "pending", "due_date": (TODAY + timedelta(days=offset)).isoformat(),
+    } for i, offset in enumerate(due_offsets)])
+    backend.save_notification_settings(HOUSEHOLD, dict(settings, recipients=RECIPIENTS))
+    return backend
+
+
+def test_daily_digest_lists_overdue_and_due_soon_tasks(mailbox):
+    # Fernand: overdue, today, out of the window; Yvonne: overdue, tomorrow
+    backend = backend_with({"daily_digest": True}, [-3, -1, 0, 1, 5])
+    worker = DigestWorker(backend, mailbox.transport, digest_hour=8, due_soon_days=2)
+
+    assert worker.run_cycle(NOW.replace(hour=7)) == 0
+    assert worker.run_cycle(NOW) == 2
+
+    fernand, = mailbox.to("fernand@example.org")
+    assert fernand["Subject"] == "Home: 1 overdue, 1 due soon"
+    assert "Task 0" in fernand.get_payload() and "Task 2" in fernand.get_payload()
+    assert "Task 4" not in fernand.get_payload()
+    yvonne, = mailbox.to("yvonne@example.org")
+    assert yvonne["Subject"] == "Home: 1 overdue, 1 due soon"
+
+    settings = backend.get_notification_settings(HOUSEHOLD)
+    assert (settings["digest_sent_on"], settings["alerted_through"]) == (TODAY.isoformat(), None)
+    assert settings["recipient_marks"] == {person: {"digest_sent_on": TODAY.isoformat()} for person in RECIPIENTS}
+    # Sent once a day
+    assert worker.run_cycle(NOW + timedelta(hours=1)) == 0
+    assert worker.run_cycle(NOW + timedelta(days=1)) == 2
+
+
+def test_alerts_only_report_tasks_overdue_since_the_last_alert(mailbox):
+    backend = backend_with({"overdue_alerts": True, "alerted_through": (TODAY - timedelta(days=2)).isoformat()},
+                           [-5, -2, -1, 0])
+    worker = DigestWorker(backend, mailbox.transport, digest_hour=8)
+
+    assert worker.run_cycle(NOW) == 2
+    fernand, = mailbox.to("fernand@example.org")
+    assert fernand["Subject"] == "Home: 1 task(s) now overdue"
+    # Task 0 was overdue at the last alert already; Task 3 is due today
+    assert "Task 2" in fernand.get_payload() and "Task 0" not in fernand.get_payload()
+    yvonne, = mailbox.to("yvonne@example.org")
+    assert "Task 1" in yvonne.get_payload() and "Task 3" not in yvonne.get_payload()
+    assert backend.get_notification_settings(HOUSEHOLD)["alerted_through"] == TODAY.isoformat()
+
+
+def test_recipients_reached_before_a_failure_are_not_sent_again(mailbox):
+    backend = backend_with({"daily_digest": True}, [-1, -1])
+    worker = DigestWorker(backend, mailbox.transport, digest_hour=8)
+    mailbox.refused.add("yvonne@example.org")
+
+    assert worker.run_cycle(NOW) == 1
+    settings = backend.get_notification_settings(HOUSEHOLD)
+    assert settings["digest_sent_on"] is None
+    assert settings["recipient_marks"] == {"Fernand": {"digest_sent_on": TODAY.isoformat()}}
+
+    mailbox.refused.clear()
+    assert worker.run_cycle(NOW + timedelta(minutes=15)) == 1
+    assert len(mailbox.to("fernand@example.org")) == 1
+    assert len(mailbox.to("yvonne@example.org")) == 1
+    assert backend.get_notification_settings(HOUSEHOLD)["digest_sent_on"] == TODAY.isoformat()
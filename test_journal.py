@@ -0,0 +1,77 @@
+"""Flushing one write journal from several managers against a shared SQLite file"""
+
+import gc
+import threading
+
+from storage import DEFAULT_HOUSEHOLD_ID, SQLiteBackend
+from task_manager import CleaningTaskManager
+
+HOUSEHOLD = DEFAULT_HOUSEHOLD_ID
+# Long enough that the background threads stay idle unless notified
+INTERVAL = 3600
+
+
+def manager_for(tmp_path):
+    return CleaningTaskManager(SQLiteBackend(str(tmp_path / "tasks.db")), HOUSEHOLD,
+                               journal_path=str(tmp_path / "journal.db"), journal_flush_interval=INTERVAL)
+
+
+def stored_names(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "tasks.db"))
+    return sorted(row["task_name"] for row in backend.select_tasks(HOUSEHOLD))
+
+
+def test_managers_sharing_a_journal_insert_each_task_once(tmp_path):
+    managers = [manager_for(tmp_path) for _ in range(2)]
+    for i in range(20):
+        assert managers[i % 2].create_task(f"Task {i:02d}", "Fernand", "Kitchen", "Weekly")
+
+    start = threading.Barrier(len(managers))
+
+    def flush(manager):
+        start.wait()
+        for _ in range(5):
+            manager.flush_writes()
+
+    threads = [threading.Thread(target=flush, args=(manager,)) for manager in managers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for manager in managers:
+        manager.flush_writes()
+
+    assert stored_names(tmp_path) == [f"Task {i:02d}" for i in range(20)]
+    assert [manager.pending_writes() for manager in managers] == [0, 0]
+    for manager in managers:
+        manager.close()
+
+
+def test_insert_replayed_after_a_lost_ack_is_not_repeated(tmp_path):
+    manager = manager_for(tmp_path)
+    assert manager.create_task("Water the plants", "Yvonne", "Living room", "Weekly")
+    journal = manager.journal
+    acks = journal.ack
+
+    def crash(seqs):
+        # The insert reached the backend, the process died before the journal heard of it
+        if list(seqs):
+            raise OSError("process killed")
+    journal.ack = crash
+    assert manager.flush_writes() == 0
+    journal.ack = acks
+    manager.close()
+
+    replayed = manager_for(tmp_path)
+    assert replayed.flush_writes() == 1
+    assert stored_names(tmp_path) == ["Water the plants"]
+    replayed.close()
+
+
+def test_discarded_manager_stops_its_flusher(tmp_path):
+    manager = manager_for(tmp_path)
+    thread = manager.flusher.thread
+    del manager
+    gc.collect()
+    thread.join(5)
+    assert not thread.is_alive()
@@ -0,0 +1,38 @@
+"""Every storage query against a seeded SQLite file must be served by an index (see benchmarks/query_plans.py)"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+
+from query_plans import problems, queries, traced  # noqa: E402
+from run_benchmarks import seed  # noqa: E402
+from storage import SQLiteBackend  # noqa: E402
+
+# Tasks per household; enough for ANALYZE to prefer indexes over scans
+SIZE = 2000
+QUERIES = queries()
+
+
+@pytest.fixture(scope="module")
+def backend():
+    backend = SQLiteBackend(":memory:")
+    seed(backend, SIZE)
+    seed(backend, SIZE, backend.save_household(None, "Other household", ["Fernand", "Yvonne"])["id"])
+    with backend.lock:
+        backend.conn.execute("ANALYZE")
+    return backend
+
+
+# In order: the writes at the end must not change what the reads before them see
+@pytest.mark.parametrize("name", list(QUERIES))
+def test_query_is_served_by_an_index(backend, name):
+    statements = traced(backend, QUERIES[name])
+    assert statements, f"{name} issued no statement"
+    failures = []
+    for sql in statements:
+        plan, found = problems(backend.conn, sql)
+        failures += [f"{problem}\n    {' '.join(sql.split())}\n    " + "\n    ".join(plan) for problem in found]
+    assert not failures, "\n".join(failures)
@@ -0,0 +1,98 @@
+"""Archives stay free of duplicates when a run is interrupted and rerun later"""
+
+import json
+from datetime import date
+
+import pytest
+
+from retention import Archive, apply_retention
+from storage import DEFAULT_HOUSEHOLD_ID, SQLiteBackend
+
+HOUSEHOLD = DEFAULT_HOUSEHOLD_ID
+
+
+def backend_with_completions():
+    """Completions on every day of March and April 2024"""
+    backend = SQLiteBackend(":memory:")
+    with backend.lock:
+        backend.conn.executemany(
+            "INSERT INTO task_completions (household_id, completed_by, completed_at) VALUES (?, ?, ?)",
+            [(HOUSEHOLD, ("Fernand", "Yvonne")[day % 2], f"2024-{month:02d}-{day:02d}T10:00:00")
+             for month in (3, 4) for day in range(1, 31)])
+        backend.conn.commit()
+    return backend
+
+
+class CountingArchive(Archive):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.writes = []
+
+    def write(self, household_id, table, partition, rows, columns):
+        self.writes.append((table, partition, len(rows)))
+        return super().write(household_id, table, partition, rows, columns)
+
+
+def archived(path):
+    with open(path, encoding="utf-8") as source:
+        return [json.loads(line)['id'] for line in source]
+
+
+def test_rerun_with_a_later_cutoff_archives_each_row_once(tmp_path, monkeypatch):
+    backend = backend_with_completions()
+    archive = Archive(str(tmp_path), fmt="jsonl")
+
+    def lost(household_id, completion_ids):
+        raise ConnectionError("connection reset")
+
+    # The first run writes March's first batch, then loses the connection before deleting it
+    monkeypatch.setattr(backend, "archive_completions", lost)
+    with pytest.raises(ConnectionError):
+        apply_retention(backend, HOUSEHOLD, days=366, archive=archive, batch_size=7,
+                        today=date(2025, 3, 16))
+    monkeypatch.undo()
+
+    # A day later the cutoff has moved, so the batches start and end on other rows
+    report = apply_retention(backend, HOUSEHOLD, days=366, archive=archive, batch_size=7,
+                             today=date(2025, 4, 20))
+    march = tmp_path / f"household={HOUSEHOLD}" / "completions" / "month=2024-03" / "2024-03.jsonl"
+    april = tmp_path / f"household={HOUSEHOLD}" / "completions" / "month=2024-04" / "2024-04.jsonl"
+    assert sorted(report.files) == [str(march), str(april)]
+    assert archived(march) == list(range(1, 31))
+    assert archived(april) == list(range(31, 49))
+    assert report.completions == 48
+    assert sorted(path.name for path in march.parent.iterdir()) == ["2024-03.jsonl"]
+
+
+def test_files_named_by_id_range_are_merged(tmp_path):
+    backend = backend_with_completions()
+    archive = Archive(str(tmp_path), fmt="jsonl")
+    directory = tmp_path / f"household={HOUSEHOLD}" / "completions" / "month=2024-03"
+    directory.mkdir(parents=True)
+    (directory / "1-3.jsonl").write_text("".join(
+        json.dumps({"id": i, "household_id": HOUSEHOLD, "task_id": None, "completed_by": "Fernand",
+                    "completed_at": f"2024-03-0{i}T10:00:00"}) + "\n" for i in (1, 2, 3)))
+    with backend.lock:
+        backend.conn.execute("DELETE FROM task_completions WHERE id <= 2")
+        backend.conn.commit()
+
+    apply_retention(backend, HOUSEHOLD, days=366, archive=archive, today=date(2025, 4, 1))
+    assert [path.name for path in directory.iterdir()] == ["2024-03.jsonl"]
+    assert archived(directory / "2024-03.jsonl") == list(range(1, 31))
+
+
+def test_each_month_is_written_once_per_run(tmp_path):
+    backend = backend_with_completions()
+    backend.insert_tasks(HOUSEHOLD, [{
+        "task_name": f"Task {i}", "assigned_to": "Fernand", "room": "Kitchen", "frequency": "Weekly",
+        "status": ("completed", "pending")[i % 4 == 3], "created_at": f"2024-0{1 + i // 10}-{1 + i % 10:02d}T08:00:00",
+    } for i in range(30)])
+    archive = CountingArchive(str(tmp_path), fmt="jsonl")
+
+    report = apply_retention(backend, HOUSEHOLD, days=366, archive=archive, batch_size=4, today=date(2025, 5, 1))
+    assert archive.writes == [("completions", "month=2024-03", 30), ("completions", "month=2024-04", 29),
+                              ("tasks", "month=2024-03", 8), ("tasks", "month=2024-02", 7),
+                              ("tasks", "month=2024-01", 8)]
+    assert (report.completions, report.tasks) == (59, 23)
+    assert backend.select_old_completions(HOUSEHOLD, "2024-04-30", 100) == []
+    assert backend.count_tasks(HOUSEHOLD) == 7
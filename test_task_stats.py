@@ -0,0 +1,64 @@
+"""The database's grouped counts and pages agree with the snapshot the This Week page reads"""
+
+from datetime import date, timedelta
+
+from storage import DEFAULT_HOUSEHOLD_ID, SQLiteBackend
+from task_manager import CleaningTaskManager
+
+HOUSEHOLD = DEFAULT_HOUSEHOLD_ID
+FREQUENCIES = ("Daily", "Weekly", "Bi-weekly", "Monthly", "As needed")
+
+
+def manager_with_tasks(tmp_path, journal=False):
+    backend = SQLiteBackend(str(tmp_path / "tasks.db"))
+    today = date.today()
+    backend.insert_tasks(HOUSEHOLD, [{
+        "task_name": f"Task {i}",
+        "assigned_to": ("Fernand", "Yvonne")[i % 2],
+        "room": ("Kitchen", "Bathroom", "Office")[i % 3],
+        "frequency": FREQUENCIES[i % 5],
+        "status": ("pending", "pending", "completed")[i % 3],
+        "due_date": (today + timedelta(days=i % 20 - 10)).isoformat(),
+        "created_at": f"2026-01-01T00:00:{i:02d}",
+    } for i in range(60)])
+    return CleaningTaskManager(backend, HOUSEHOLD, journal_path=str(tmp_path / "journal.db") if journal else None,
+                               journal_flush_interval=3600)
+
+
+def test_task_stats_match_the_snapshot(tmp_path):
+    manager = manager_with_tasks(tmp_path)
+    stats = manager.get_task_stats()
+    snapshot = manager.snapshot()
+    assert {key: value for key, value in stats.items() if key != "daily_completions"} == snapshot.stats()
+    assert stats["pending_by_person_frequency"]["Fernand"] == {"Daily": 4, "Bi-weekly": 4, "As needed": 4,
+                                                               "Weekly": 4, "Monthly": 4}
+
+
+def test_pages_and_counts_show_queued_writes(tmp_path):
+    manager = manager_with_tasks(tmp_path, journal=True)
+    assert manager.count_tasks(room="Office") == 20
+    assert manager.create_task("Dust the shelves", "Yvonne", "Office", "Weekly")
+
+    assert manager.count_tasks(room="Office") == 21
+    page, cursor = manager.get_tasks_page(room="Office", page_size=5)
+    assert page[0].task_name == "Dust the shelves" and cursor is not None
+    assert manager.get_task_stats()["by_room"]["Office"] == 21
+
+    manager.flush_writes()
+    assert manager.count_tasks(room="Office") == 21
+    assert manager.get_tasks_page(room="Office", page_size=5)[0][0].task_name == "Dust the shelves"
+    manager.close()
+
+
+def test_written_rows_join_the_snapshot_in_list_shape(tmp_path):
+    manager = manager_with_tasks(tmp_path)
+    manager.get_all_tasks()
+    assert manager.create_task("Descale the kettle", "Yvonne", "Kitchen", "Monthly", "Vinegar, then rinse twice")
+    created, *_, oldest = manager.get_all_tasks()
+    assert manager.update_task(oldest.id, {"room": "Office"})
+    assert manager.complete_and_rotate_task(oldest.id)
+
+    tasks = manager.snapshot().tasks
+    assert tasks[0].task_name == "Descale the kettle"
+    assert {(task.description, task.household_id) for task in tasks} == {(None, None)}
+    assert manager.get_task(created.id).description == "Vinegar, then rinse twice"